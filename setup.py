@@ -11,7 +11,7 @@ with open('README.rst') as readme_file:
 with open('HISTORY.rst') as history_file:
     history = history_file.read()
 
-requirements = ['Click>=6.0', 'gym']
+requirements = ['Click>=6.0', 'gym', 'numpy>=1.20']
 
 setup_requirements = ['pytest-runner', ]
 
@@ -0,0 +1,139 @@
+"""Benchmark every registered stock_gym environment"""
+
+import multiprocessing
+import platform
+import resource
+import sys
+import time
+import traceback
+
+import numpy as np
+
+from gym.envs.registration import load, registry
+
+import stock_gym
+from stock_gym.envs import stocks  # noqa: F401, registers the environments
+
+
+TOTAL_SPACE_SIZES = [1024, 4096]
+OBSERVATION_SIZES = [16, 64]
+
+
+def registered_ids():
+    """Ids of every environment registered by stock_gym"""
+    specs = getattr(registry, 'env_specs', registry)
+    return [
+        env_id for env_id, spec in specs.items()
+        if str(spec.entry_point).startswith('stock_gym.')
+    ]
+
+
+def peak_rss():
+    """Peak resident set size of this process, in bytes"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def latencies(timings):
+    """Summarize per call timings, in seconds"""
+    timings = np.asarray(timings, dtype=np.float64)
+    return {
+        'calls': len(timings),
+        'mean': float(timings.mean()),
+        'p50': float(np.percentile(timings, 50)),
+        'p99': float(np.percentile(timings, 99)),
+    }
+
+
+def bench_env(env_id, total_space_size, observation_size,
+              steps=1000, resets=100, seed=0):
+    """Measure construction, reset and step costs of one environment"""
+    result = {
+        'env_id': env_id,
+        'total_space_size': total_space_size,
+        'observation_size': observation_size,
+    }
+    rss_start = peak_rss()
+    try:
+        market_class = load(registry[env_id].entry_point)
+
+        start = time.perf_counter()
+        env = market_class(
+            total_space_size=total_space_size,
+            observation_size=observation_size,
+        )
+        result['construct'] = time.perf_counter() - start
+        env.seed(seed)
+        env.action_space.seed(seed)
+
+        timings = []
+        for _ in range(resets):
+            start = time.perf_counter()
+            env.reset()
+            timings.append(time.perf_counter() - start)
+        result['reset'] = latencies(timings)
+
+        actions = [env.action_space.sample() for _ in range(steps)]
+        timings = []
+        env.reset()
+        for action in actions:
+            start = time.perf_counter()
+            observation, reward, done, info = env.step(action)
+            timings.append(time.perf_counter() - start)
+            if done:
+                env.reset()
+        result['step'] = latencies(timings)
+        result['step']['per_second'] = len(timings) / sum(timings)
+    except Exception as error:
+        result['error'] = ''.join(
+            traceback.format_exception_only(type(error), error)).strip()
+
+    result['peak_rss'] = peak_rss()
+    result['peak_rss_delta'] = result['peak_rss'] - rss_start
+    return result
+
+
+def _isolated(queue, args, kwargs):
+    queue.put(bench_env(*args, **kwargs))
+
+
+def bench_env_isolated(*args, **kwargs):
+    """Run bench_env in a fresh process so peak RSS is its own"""
+    ctx = multiprocessing.get_context('spawn')
+    queue = ctx.Queue()
+    process = ctx.Process(target=_isolated, args=(queue, args, kwargs))
+    process.start()
+    result = queue.get()
+    process.join()
+    return result
+
+
+def bench_envs(env_ids=None, total_space_sizes=None, observation_sizes=None,
+               steps=1000, resets=100, seed=0, isolate=True):
+    """Benchmark every environment id at every size setting
+        Returns a machine readable report, suitable for json.dump.
+    """
+    env_ids = env_ids or registered_ids()
+    total_space_sizes = total_space_sizes or TOTAL_SPACE_SIZES
+    observation_sizes = observation_sizes or OBSERVATION_SIZES
+    bench = bench_env_isolated if isolate else bench_env
+
+    results = []
+    for env_id in env_ids:
+        for total_space_size in total_space_sizes:
+            for observation_size in observation_sizes:
+                results.append(bench(
+                    env_id, total_space_size, observation_size,
+                    steps=steps, resets=resets, seed=seed,
+                ))
+
+    return {
+        'stock_gym': stock_gym.__version__,
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'steps': steps,
+        'resets': resets,
+        'seed': seed,
+        'results': results,
+    }
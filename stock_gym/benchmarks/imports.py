@@ -0,0 +1,48 @@
+"""Benchmark the cold start import of stock_gym"""
+
+import subprocess
+import sys
+
+
+def bench_import(module='stock_gym.envs.stocks'):
+    """Import module in a fresh interpreter under python -X importtime
+        Returns the import time of module, in seconds, the time spent in
+        stock_gym's own modules, and the self and cumulative seconds of
+        every module imported with it.
+    """
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        capture_output=True, text=True, check=True,
+    )
+    modules = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        own, cumulative, name = line[len('import time:'):].split('|')
+        modules[name.strip()] = {
+            'self': int(own) / 1e6,
+            'cumulative': int(cumulative) / 1e6,
+        }
+    return {
+        'module': module,
+        'seconds': modules[module]['cumulative'],
+        'own_seconds': sum(times['self'] for name, times in modules.items()
+                           if name.split('.')[0] == 'stock_gym'),
+        'modules': modules,
+    }
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    result = bench_import(*argv)
+    print(f"import {result['module']}: {result['seconds']:.3f}s, "
+          f"{len(result['modules'])} modules, "
+          f"{result['own_seconds']:.4f}s in stock_gym")
+    slowest = sorted(result['modules'].items(),
+                     key=lambda item: item[1]['self'], reverse=True)[:10]
+    for name, times in slowest:
+        print(f"{times['self']:>10.4f}s {name}")
+
+
+if __name__ == "__main__":
+    main()  # pragma: no cover
@@ -0,0 +1,82 @@
+"""Benchmark lot accounting on sells with many open lots"""
+
+import sys
+import time
+
+import numpy as np
+
+from stock_gym.envs.stocks.ledger import LotLedger
+
+
+def sorted_sells(lots, sells):
+    """Previous accounting: re-sort every open bid on each sell"""
+    bids = {}
+    for price, amount in lots:
+        bids[price] = bids.get(price, 0) + amount
+    for amount in sells:
+        for _bid, _amt in reversed(sorted(bids.items())):
+            if amount <= 0:
+                break
+            if amount >= _amt:
+                bids.pop(_bid)
+                amount -= _amt
+            else:
+                bids[_bid] -= amount
+                amount = 0
+
+
+def ledger_sells(lots, sells, accounting):
+    ledger = LotLedger(accounting)
+    for price, amount in lots:
+        ledger.add(price, amount)
+    for amount in sells:
+        for _ in ledger.consume(amount):
+            pass
+
+
+def bench_ledger(open_lots=50000, sells=5000, seed=0, sorted_sells_max=100):
+    """Time opening open_lots lots and then selling sells times
+        The previous, re-sorting accounting only runs the first
+        sorted_sells_max sells; compare the per sell times.
+    """
+    rng = np.random.default_rng(seed)
+    lots = list(zip(rng.random(open_lots).round(6).tolist(),
+                    rng.random(open_lots).tolist()))
+    sell_amounts = (rng.random(sells) * 2).tolist()
+
+    results = []
+    for accounting in LotLedger.accountings:
+        start = time.perf_counter()
+        ledger_sells(lots, sell_amounts, accounting)
+        elapsed = time.perf_counter() - start
+        results.append({
+            'accounting': accounting,
+            'sells': sells,
+            'seconds': elapsed,
+            'per_sell': elapsed / sells,
+        })
+
+    sells = min(sells, sorted_sells_max)
+    start = time.perf_counter()
+    sorted_sells(lots, sell_amounts[:sells])
+    elapsed = time.perf_counter() - start
+    results.append({
+        'accounting': 'sorted (previous)',
+        'sells': sells,
+        'seconds': elapsed,
+        'per_sell': elapsed / sells,
+    })
+    return results
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    sizes = [int(float(arg)) for arg in argv]
+    for result in bench_ledger(*sizes):
+        print(f"{result['accounting']:>18}: {result['sells']} sells in "
+              f"{result['seconds']:.3f}s, "
+              f"{result['per_sell'] * 1e6:.1f}us per sell")
+
+
+if __name__ == "__main__":
+    main()  # pragma: no cover
@@ -0,0 +1,74 @@
+"""Benchmark OHLCV tick generation and bar construction"""
+
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from stock_gym.envs.stocks.imarket import IOHLCVMarketEnv
+
+
+TICK_COUNTS = [10 ** 6, 10 ** 7]
+
+
+def generate_ticks(length, seed=0, start='1/1/2018', period='365D'):
+    """Random walk ticks at random times spread over period"""
+    rng = np.random.default_rng(seed)
+    prices = .1 * np.cumprod(1 + rng.uniform(-.001, .001, length))
+    quantity = rng.random(length)
+    span = pd.Timedelta(period).value
+    offsets = np.sort(rng.integers(0, span, length))
+    return pd.DataFrame(
+        {'price': prices, 'quantity': quantity},
+        index=pd.DatetimeIndex(pd.Timestamp(start).value + offsets,
+                               name='timestamp'),
+    )
+
+
+def bench_convert_to_ohlcv(tick_counts=None, seed=0):
+    """Time building an OHLCV market from tick_counts ticks each"""
+    tick_counts = TICK_COUNTS if tick_counts is None else tick_counts
+    results = []
+    for length in tick_counts:
+        ticks = generate_ticks(length, seed=seed)
+        start = time.perf_counter()
+        mkt = IOHLCVMarketEnv(data=ticks)
+        elapsed = time.perf_counter() - start
+        results.append({
+            'ticks': length,
+            'bars': len(mkt.data),
+            'seconds': elapsed,
+        })
+    return results
+
+
+def bench_generate_data(tick_counts=None, seed=0):
+    """Time generating tick_counts ticks each from a seeded market"""
+    tick_counts = TICK_COUNTS if tick_counts is None else tick_counts
+    mkt = IOHLCVMarketEnv(total_space_size=64, observation_size=8)
+    results = []
+    for length in tick_counts:
+        mkt.seed(seed)
+        start = time.perf_counter()
+        mkt._generate_data(length)
+        results.append({
+            'ticks': length,
+            'seconds': time.perf_counter() - start,
+        })
+    return results
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    tick_counts = [int(float(arg)) for arg in argv] or None
+    for result in bench_generate_data(tick_counts):
+        print(f"{result['ticks']:>10} ticks generated: "
+              f"{result['seconds']:.3f}s")
+    for result in bench_convert_to_ohlcv(tick_counts):
+        print(f"{result['ticks']:>10} ticks => {result['bars']:>8} bars: "
+              f"{result['seconds']:.3f}s")
+
+
+if __name__ == "__main__":
+    main()  # pragma: no cover
@@ -0,0 +1,55 @@
+"""Benchmark replaying ticks against a limit order book"""
+
+import sys
+import time
+
+import numpy as np
+
+from stock_gym.envs.stocks.orderbook import OrderBook
+
+
+TICK_COUNTS = [10 ** 6, 10 ** 7]
+
+
+def create_book(price, levels=100, spread=.01, amount=10):
+    """Book with levels resting buys below price and sells above it"""
+    book = OrderBook()
+    for level in range(1, levels + 1):
+        book.limit('buy', price * (1 - level * spread), amount)
+        book.limit('sell', price * (1 + level * spread), amount)
+    return book
+
+
+def bench_replay(tick_counts=None, levels=100, seed=0):
+    """Time replaying tick_counts random walk ticks each against a book"""
+    tick_counts = TICK_COUNTS if tick_counts is None else tick_counts
+    rng = np.random.default_rng(seed)
+    results = []
+    for length in tick_counts:
+        prices = .1 * np.cumprod(1 + rng.uniform(-.001, .001, length))
+        quantities = rng.random(length)
+        book = create_book(prices[0], levels=levels)
+
+        start = time.perf_counter()
+        fills = book.replay(prices, quantities)
+        elapsed = time.perf_counter() - start
+        results.append({
+            'ticks': length,
+            'fills': len(fills),
+            'seconds': elapsed,
+            'per_second': length / elapsed,
+        })
+    return results
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    tick_counts = [int(float(arg)) for arg in argv] or None
+    for result in bench_replay(tick_counts):
+        print(f"{result['ticks']:>10} ticks, {result['fills']:>6} fills: "
+              f"{result['seconds']:.3f}s, "
+              f"{result['per_second'] / 1e6:.1f}M ticks/s")
+
+
+if __name__ == "__main__":
+    main()  # pragma: no cover
@@ -0,0 +1,77 @@
+"""Benchmark stepping markets hosted by a MarketServer"""
+
+import asyncio
+import sys
+import threading
+import time
+
+from stock_gym.envs.stocks.basic import OHLCVMarketEnv
+from stock_gym.envs.stocks.server import MarketClient, MarketServer
+
+
+ENV_COUNTS = [1, 64, 1024]
+
+
+def start_server(market_class, address=('127.0.0.1', 0), **kwargs):
+    """Serve markets on a background event loop, returning the server and a
+        function stopping it"""
+    server = MarketServer(market_class, **kwargs)
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    asyncio.run_coroutine_threadsafe(server.start(address), loop).result()
+
+    def stop():
+        asyncio.run_coroutine_threadsafe(server.close(), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        loop.close()
+    return server, stop
+
+
+def bench_server(env_counts=None, steps=100, seed=0):
+    """Time steps of env_counts markets, each count driven in batches over
+        one connection"""
+    env_counts = ENV_COUNTS if env_counts is None else env_counts
+    server, stop = start_server(OHLCVMarketEnv, max_envs=max(env_counts),
+                                seed=seed)
+    results = []
+    try:
+        for count in env_counts:
+            client = MarketClient(server.address)
+            envs = [client.make() for _ in range(count)]
+            client.reset_many(envs)
+            actions = [[0.]] * count
+            batches = server.batches
+
+            start = time.perf_counter()
+            for _ in range(steps):
+                _, _, dones = client.step_many(envs, actions)
+                if dones.any():
+                    client.reset_many([env for env, done in zip(envs, dones)
+                                       if done])
+            elapsed = time.perf_counter() - start
+            client.close()
+            results.append({
+                'envs': count,
+                'steps': count * steps,
+                'batches': server.batches - batches,
+                'seconds': elapsed,
+                'per_second': count * steps / elapsed,
+            })
+    finally:
+        stop()
+    return results
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    env_counts = [int(arg) for arg in argv] or None
+    for result in bench_server(env_counts):
+        print(f"{result['envs']:>6} envs, {result['batches']:>6} batches: "
+              f"{result['seconds']:.3f}s, "
+              f"{result['per_second']:,.0f} steps/s")
+
+
+if __name__ == "__main__":
+    main()  # pragma: no cover
@@ -1,15 +1,153 @@
 # -*- coding: utf-8 -*-
 
 """Console script for stock_gym."""
+import json
 import sys
 import click
 from stock_gym import stock_gym
 
 
-@click.command()
-def main(args=None):
+@click.group(invoke_without_command=True)
+@click.pass_context
+def main(ctx, args=None):
     """Console script for stock_gym."""
-    stock_gym.main()
+    if ctx.invoked_subcommand is None:
+        stock_gym.main()
+    return 0
+
+
+@main.command()
+@click.option('--env-id', 'env_ids', multiple=True,
+              help='Environment id to benchmark (default: all registered).')
+@click.option('--total-space-size', 'total_space_sizes', type=int,
+              multiple=True, help='Data size(s) to benchmark.')
+@click.option('--observation-size', 'observation_sizes', type=int,
+              multiple=True, help='Observation window size(s) to benchmark.')
+@click.option('--steps', type=int, default=1000, show_default=True)
+@click.option('--resets', type=int, default=100, show_default=True)
+@click.option('--seed', type=int, default=0, show_default=True)
+@click.option('--isolate/--no-isolate', default=True, show_default=True,
+              help='Benchmark each setting in a fresh process.')
+@click.option('--output', type=click.File('w'), default='-',
+              help='JSON report file (default: stdout).')
+def bench(env_ids, total_space_sizes, observation_sizes, steps, resets, seed,
+          isolate, output):
+    """Benchmark registered environments, reporting JSON."""
+    from stock_gym.benchmarks.envs import bench_envs
+
+    report = bench_envs(
+        env_ids=list(env_ids),
+        total_space_sizes=list(total_space_sizes),
+        observation_sizes=list(observation_sizes),
+        steps=steps,
+        resets=resets,
+        seed=seed,
+        isolate=isolate,
+    )
+    json.dump(report, output, indent=2)
+    output.write('\n')
+    return 0
+
+
+@main.command()
+@click.option('--env-id', default='SinMarketEnv-v0', show_default=True,
+              help='Environment id to run.')
+@click.option('--episodes', type=click.IntRange(min=1), default=20,
+              show_default=True)
+@click.option('--steps', type=click.IntRange(min=1), default=1000,
+              show_default=True, help='Most steps per episode.')
+@click.option('--workers', type=click.IntRange(min=1), default=1,
+              show_default=True, help='Worker processes to split episodes over.')
+@click.option('--seed', type=int, default=0, show_default=True)
+@click.option('--policy', default='random', show_default=True,
+              help="'random', or 'module:function' called with "
+                   "(observation, env) for each action.")
+@click.option('--output', type=click.File('w'), default='-',
+              help='JSON report file (default: stdout).')
+def run(env_id, episodes, steps, workers, seed, policy, output):
+    """Run rollouts in parallel, reporting throughput and rewards as JSON."""
+    from stock_gym.rollout import run as run_rollouts
+
+    report = run_rollouts(
+        env_id,
+        episodes=episodes,
+        steps=steps,
+        workers=workers,
+        seed=seed,
+        policy=policy,
+    )
+    json.dump(report, output, indent=2)
+    output.write('\n')
+    return 0
+
+
+@main.command()
+@click.option('--env-id', default='SinMarketEnv-v0', show_default=True,
+              help='Environment id to sweep.')
+@click.option('--param', 'params', multiple=True, required=True,
+              help="Values to sweep, as 'name=value,value,...'.")
+@click.option('--episodes', type=click.IntRange(min=1), default=10,
+              show_default=True, help='Episodes per configuration.')
+@click.option('--steps', type=click.IntRange(min=1), default=1000,
+              show_default=True, help='Most steps per episode.')
+@click.option('--workers', type=click.IntRange(min=1), default=1,
+              show_default=True, help='Worker processes to run configs on.')
+@click.option('--seed', type=int, default=0, show_default=True)
+@click.option('--policy', default='random', show_default=True,
+              help="'random', or 'module:function' called with "
+                   "(observation, env) for each action.")
+@click.option('--dataset', default=None,
+              help='DatasetStore to sweep over, instead of generated data.')
+@click.option('--output', type=click.File('w'), default='-',
+              help='CSV results file (default: stdout).')
+def sweep(env_id, params, episodes, steps, workers, seed, policy, dataset,
+          output):
+    """Run every combination of params, writing a CSV row per config."""
+    import csv
+    from stock_gym.sweep import parse_param, sweep as run_sweep
+
+    writer = None
+    for row in run_sweep(
+            env_id,
+            dict(parse_param(param) for param in params),
+            episodes=episodes,
+            steps=steps,
+            workers=workers,
+            seed=seed,
+            policy=policy,
+            dataset=dataset):
+        if writer is None:
+            writer = csv.DictWriter(output, fieldnames=list(row))
+            writer.writeheader()
+        writer.writerow(row)
+        output.flush()
+    return 0
+
+
+@main.command()
+@click.option('--env-id', default='OHLCVMarketEnv-v0', show_default=True,
+              help='Environment id to serve.')
+@click.option('--host', default='127.0.0.1', show_default=True)
+@click.option('--port', type=int, default=7878, show_default=True)
+@click.option('--unix', 'path', default=None,
+              help='Listen on this Unix socket path instead of TCP.')
+@click.option('--max-envs', type=click.IntRange(min=1), default=4096,
+              show_default=True, help='Most markets served at once.')
+@click.option('--seed', type=int, default=None)
+def serve(env_id, host, port, path, max_envs, seed):
+    """Serve markets to remote agents until interrupted."""
+    import asyncio
+    from gym.envs.registration import load, registry
+    from stock_gym.envs.stocks.server import MarketServer
+
+    server = MarketServer(load(registry[env_id].entry_point),
+                          max_envs=max_envs, seed=seed)
+    address = path or (host, port)
+    click.echo(f"Serving {env_id} on {address}", err=True)
+    try:
+        asyncio.run(server.serve(address))
+    except KeyboardInterrupt:
+        pass
     return 0
 
 
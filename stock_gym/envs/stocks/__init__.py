@@ -1,11 +1,44 @@
 """Initialize the env.stocks module"""
 
+import importlib
+
 from gym.envs.registration import registry, register, make, spec
 
-# Public classes
-from stock_gym.envs.stocks.basic import LinMarketEnv, NegLinMarketEnv,\
-                                        SinMarketEnv, FlatLinMarketEnv, \
-                                        ContSinMarketEnv, OHLCVMarketEnv
+# Public classes, imported on first use so that registering the environments
+#  doesn't import pandas or any environment module
+_exports = {
+    'LinMarketEnv': 'stock_gym.envs.stocks.basic',
+    'NegLinMarketEnv': 'stock_gym.envs.stocks.basic',
+    'SinMarketEnv': 'stock_gym.envs.stocks.basic',
+    'FlatLinMarketEnv': 'stock_gym.envs.stocks.basic',
+    'ContSinMarketEnv': 'stock_gym.envs.stocks.basic',
+    'OHLCVMarketEnv': 'stock_gym.envs.stocks.basic',
+    'StreamingOHLCVMarketEnv': 'stock_gym.envs.stocks.basic',
+    'PortfolioMarketEnv': 'stock_gym.envs.stocks.basic',
+    'VecMarketEnv': 'stock_gym.envs.stocks.vector',
+    'SubprocMarketVecEnv': 'stock_gym.envs.stocks.vector',
+    'DatasetStore': 'stock_gym.envs.stocks.store',
+    'BarBuffer': 'stock_gym.envs.stocks.stream',
+    'socket_feed': 'stock_gym.envs.stocks.stream',
+    'TrajectoryRecorder': 'stock_gym.envs.stocks.record',
+    'TrajectoryReader': 'stock_gym.envs.stocks.record',
+    'OrderBook': 'stock_gym.envs.stocks.orderbook',
+    'MarketServer': 'stock_gym.envs.stocks.server',
+    'MarketClient': 'stock_gym.envs.stocks.server',
+    'RemoteMarketEnv': 'stock_gym.envs.stocks.server',
+}
+
+
+def __getattr__(name):
+    if name not in _exports:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_exports[name]), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_exports))
 
 
 register(
@@ -37,3 +70,13 @@ register(
     id='OHLCVMarketEnv-v0',
     entry_point='stock_gym.envs.stocks:OHLCVMarketEnv',
     )
+
+register(
+    id='StreamingOHLCVMarketEnv-v0',
+    entry_point='stock_gym.envs.stocks:StreamingOHLCVMarketEnv',
+    )
+
+register(
+    id='PortfolioMarketEnv-v0',
+    entry_point='stock_gym.envs.stocks:PortfolioMarketEnv',
+    )
@@ -1,11 +1,10 @@
 """Environments for trading"""
 
 import numpy as np
-import random
 
 from stock_gym.envs.stocks.imarket import \
     IOHLCVMarketEnv, IContinuousLinearMarketEnv, ILinearMarketEnv, \
-    IContinuousOHLCVMarketEnv
+    IContinuousOHLCVMarketEnv, IStreamingOHLCVMarketEnv, IPortfolioMarketEnv
 
 
 class SinMarketEnv(ILinearMarketEnv):
@@ -45,3 +44,11 @@ class ContSinMarketEnv(IContinuousLinearMarketEnv):
 
 class OHLCVMarketEnv(IContinuousOHLCVMarketEnv):
     pass
+
+
+class StreamingOHLCVMarketEnv(IStreamingOHLCVMarketEnv):
+    pass
+
+
+class PortfolioMarketEnv(IPortfolioMarketEnv):
+    pass
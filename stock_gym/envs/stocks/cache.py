@@ -0,0 +1,85 @@
+"""Process-wide cache of generated market data"""
+
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+
+def nbytes(value):
+    """Approximate memory held by a cached value"""
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True).sum())
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    return 0
+
+
+def freeze(value):
+    """Make value read-only: arrays in place, and frames as a copy over
+        one read-only array"""
+    if isinstance(value, np.ndarray):
+        value.flags.writeable = False
+    elif isinstance(value, pd.DataFrame):
+        values = np.array(value.to_numpy(dtype=np.result_type(*value.dtypes)),
+                          order='C')
+        values.flags.writeable = False
+        value = pd.DataFrame(values, index=value.index,
+                             columns=value.columns, copy=False)
+    return value
+
+
+class DatasetCache:
+    """Least recently used datasets, bounded by memory
+        Entries are dicts of attribute => value, restored onto markets
+            built with the same key. Values are shared between markets and
+            can't be modified: arrays are made read-only on the way in, and
+            frames are copied over read-only arrays, so writes raise rather
+            than reach other markets.
+    """
+    def __init__(self, max_bytes=512 * 2 ** 20):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()  # key => (dataset, bytes)
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    def get(self, key):
+        """Return the dataset cached for key, or None"""
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return entry[0]
+
+    def put(self, key, dataset):
+        """Cache dataset for key, evicting the least recently used"""
+        size = sum(nbytes(value) for value in dataset.values())
+        if size > self.max_bytes:
+            return
+        dataset = {attr: freeze(value) for attr, value in dataset.items()}
+
+        if key in self.entries:
+            self.bytes -= self.entries.pop(key)[1]
+        self.entries[key] = (dataset, size)
+        self.bytes += size
+        while self.bytes > self.max_bytes:
+            _, (_, evicted) = self.entries.popitem(last=False)
+            self.bytes -= evicted
+
+    def clear(self):
+        self.entries.clear()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+
+dataset_cache = DatasetCache()
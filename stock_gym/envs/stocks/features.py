@@ -0,0 +1,89 @@
+"""Technical indicators computed over whole price series
+
+Every indicator is trailing: its value at a row only uses that row and the
+ones before it. Rows before a full window use what is available, so no
+indicator leaves gaps.
+"""
+
+import numpy as np
+import pandas as pd
+
+
+def returns(price, volume=None, window=1):
+    """Fractional change in price over window rows"""
+    price = pd.Series(price)
+    return price.pct_change(window).fillna(0).to_numpy()
+
+
+def sma(price, volume=None, window=20):
+    """Simple moving average"""
+    return pd.Series(price).rolling(window, min_periods=1).mean().to_numpy()
+
+
+def ema(price, volume=None, window=20):
+    """Exponential moving average with a span of window rows"""
+    return pd.Series(price).ewm(span=window, adjust=False).mean().to_numpy()
+
+
+def rsi(price, volume=None, window=14):
+    """Relative strength index, scaled to 0-1, with Wilder's smoothing"""
+    change = pd.Series(price).diff().fillna(0)
+    smooth = dict(alpha=1 / window, adjust=False)
+    gain = change.clip(lower=0).ewm(**smooth).mean().to_numpy()
+    loss = (-change).clip(lower=0).ewm(**smooth).mean().to_numpy()
+    total = gain + loss
+    return np.divide(gain, total, out=np.full(len(total), .5),
+                     where=total > 0)
+
+
+def volatility(price, volume=None, window=20):
+    """Standard deviation of returns over window rows"""
+    return pd.Series(returns(price)).rolling(window, min_periods=1) \
+        .std(ddof=0).to_numpy()
+
+
+def vwap(price, volume=None, window=20):
+    """Volume weighted average price over window rows"""
+    assert volume is not None, "vwap needs a volume or quantity column"
+    price = np.asarray(price)
+    traded = pd.Series(price * volume).rolling(window, min_periods=1).sum()
+    volume = pd.Series(volume).rolling(window, min_periods=1).sum()
+    traded, volume = traded.to_numpy(), volume.to_numpy()
+    return np.divide(traded, volume, out=price.astype(np.float64),
+                     where=volume > 0)
+
+
+def running_moments(values):
+    """Mean and standard deviation of each row and the rows before it
+        Welford's updates, M2 += (x - previous mean) * (x - mean), summed
+        over the whole series at once along the first axis.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    count = np.arange(1, len(values) + 1).reshape(
+        (-1,) + (1,) * (values.ndim - 1))
+    mean = np.cumsum(values, axis=0) / count
+    previous = np.concatenate([np.zeros_like(values[:1]), mean[:-1]])
+    m2 = np.cumsum((values - previous) * (values - mean), axis=0)
+    return mean, np.sqrt(m2 / count)
+
+
+INDICATORS = {
+    'returns': returns,
+    'sma': sma,
+    'ema': ema,
+    'rsi': rsi,
+    'volatility': volatility,
+    'vwap': vwap,
+}
+
+
+def parse_indicator(spec):
+    """Split 'name' or 'name:window' into the indicator and its arguments"""
+    name, _, window = spec.partition(':')
+    assert name in INDICATORS, f"Invalid indicator: {spec}"
+    return INDICATORS[name], ({'window': int(window)} if window else {})
+
+
+def indicator_column(spec):
+    """Column name of an indicator spec, e.g. sma:20 => sma_20"""
+    return spec.replace(':', '_')
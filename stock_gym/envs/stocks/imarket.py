@@ -3,10 +3,12 @@
 import gym
 from gym import spaces
 import numpy as np
+import pandas as pd
 
 from stock_gym.envs.stocks.actions import ExchangeAction
 from stock_gym.envs.stocks.mixins import \
-    MarketEnvBase, ContinuousMixin, OHLCVMixin
+    MarketEnvBase, ContinuousMixin, OHLCVMixin, PortfolioMixin
+from stock_gym.envs.stocks.stream import BarBuffer, frame_feed
 
 
 class ILinearMarketEnv(MarketEnvBase):
@@ -19,7 +21,7 @@ class ILinearMarketEnv(MarketEnvBase):
                 f"Invalid Action: {action} of type: {type(action)}"
 
         # calculate price, reward, position, and bank (money)
-        price = self.data[self.idx + self.observation_size - 1]
+        price = self.prices[self.idx + self.observation_size - 1]
         reward = self.fee
         if action == 0:  # buy
             if self.position > 0:  # We can only invest once at a time
@@ -56,6 +58,57 @@ class ILinearMarketEnv(MarketEnvBase):
             {}
         )
 
+    def evaluate(self, actions, start_idx=None):
+        """Score an episode of actions from start_idx in one pass
+            Matches stepping from the current money and position after a
+            reset to start_idx, without changing either. Within an episode
+            money stays positive until its last step, so only the first buy
+            can fail for lack of money, and every step is computed with
+            cumulative sums over the episode.
+            Returns the rewards, money and position after each step, the
+            steps taken, and whether the last one was done.
+        """
+        actions = np.asarray(actions)
+        assert ((actions >= 0) & (actions < self.n_actions)).all(), \
+            f"Invalid Actions: {actions}"
+        price = self.episode_prices(len(actions), start_idx)
+        steps = len(price)
+        actions = actions[:steps]
+        buy = actions == 0
+        sell = actions == 1
+
+        # Position is the prices bought since the last sell, on top of the
+        #  opening position until the first one
+        bought = np.cumsum(price * buy)
+        last_sell = np.maximum.accumulate(
+            np.where(sell, np.arange(steps), -1))
+        position = np.where(
+            last_sell < 0, self.position + bought,
+            bought - bought[np.maximum(last_sell, 0)])
+        held = np.empty(steps)
+        held[:1] = self.position
+        held[1:] = position[:-1]
+
+        buy_reward = self.fee - self.fail_reward * (held > 0) - price
+        if steps and self.money <= 0:  # Can't buy if you have no money
+            buy_reward[0] = self.fee - self.fail_reward * (held[0] > 0) \
+                - self.fail_reward
+        returns = np.where(held <= 0, -1 * self.fail_reward, price - held)
+        sell_reward = self.fee + (held + returns)
+        reward = np.where(buy, buy_reward,
+                          np.where(sell, sell_reward, self.fee))
+
+        money = np.cumsum(np.concatenate([[self.money], reward]))[1:]
+        reward = np.where(sell, reward * self.reward_multiplier, reward)
+
+        done = money <= 0
+        done[self.max_observations - 1:] = True
+        if done.any():
+            steps = int(np.argmax(done)) + 1
+        return self.episode_result(
+            steps, bool(done.any()), rewards=reward, money=money,
+            position=position)
+
 
 class IContinuousLinearMarketEnv(MarketEnvBase, ContinuousMixin):
     """Linear market environment
@@ -63,7 +116,7 @@ class IContinuousLinearMarketEnv(MarketEnvBase, ContinuousMixin):
             allow for multiple consecutive buys or sells.
     """
     def get_price(self):
-        return self.data[self.idx + self.observation_size - 1]
+        return self.prices[self.idx + self.observation_size - 1]
 
     def step(self, amount):
         # calculate reward, updating price, position, and bank (money)
@@ -83,12 +136,23 @@ class IContinuousLinearMarketEnv(MarketEnvBase, ContinuousMixin):
             {}
         )
 
+    def evaluate(self, amounts, start_idx=None):
+        """Score an episode of amounts from start_idx in one pass
+            Matches stepping from the current money, position and lots after
+            a reset to start_idx, without changing them. Sells depend on
+            the lots open, so the episode runs in one loop over floats.
+            Returns the rewards, money, position and vested money after each
+            step, the steps taken, and whether the last one was done.
+        """
+        return self.evaluate_amounts(
+            amounts, self.episode_prices(len(amounts), start_idx))
+
 
-class IOHLCVMarketEnv(MarketEnvBase, OHLCVMixin):
+class IOHLCVMarketEnv(OHLCVMixin, MarketEnvBase):
     pass
 
 
-class IContinuousOHLCVMarketEnv(MarketEnvBase, ContinuousMixin, OHLCVMixin):
+class IContinuousOHLCVMarketEnv(OHLCVMixin, MarketEnvBase, ContinuousMixin):
     """
     Base Market Environment Interface
 
@@ -106,7 +170,7 @@ class IContinuousOHLCVMarketEnv(MarketEnvBase, ContinuousMixin, OHLCVMixin):
     reward reaches its maximum
     """
     def get_price(self):
-        return self.data.price.iloc[self.idx + self.observation_size - 1]
+        return self.prices[self.idx + self.observation_size - 1]
 
     def step(self, amount):
         # calculate reward, updating price, position, and bank (money)
@@ -125,3 +189,142 @@ class IContinuousOHLCVMarketEnv(MarketEnvBase, ContinuousMixin, OHLCVMixin):
             done,
             {}
         )
+
+    def evaluate(self, amounts, start_idx=None):
+        """Score an episode of amounts from start_idx in one pass
+            Matches stepping from the current money, position and lots after
+            a reset to start_idx, without changing them. Sells depend on
+            the lots open, so the episode runs in one loop over floats.
+            Returns the rewards, money, position and vested money after each
+            step, the steps taken, and whether the last one was done.
+        """
+        return self.evaluate_amounts(
+            amounts, self.episode_prices(len(amounts), start_idx))
+
+
+class IStreamingOHLCVMarketEnv(OHLCVMixin, ContinuousMixin, MarketEnvBase):
+    """Streaming OHLCV market environment
+        Paper trades against a feed of (timestamp, price, quantity) ticks,
+            such as stream.socket_feed, rather than a static dataset. Each
+            step consumes one tick, updating the current bar of a fixed size
+            ring buffer, and observes the latest observation_size bars.
+
+        data, when given, is a DataFrame of ticks replayed as the feed.
+            Without either, ticks are generated as in OHLCVMixin.
+
+        The run ends after max_observations steps, or when the feed runs dry.
+    """
+    feed = None  # Iterator of ticks
+    buffer_size = 1024  # Bars held in memory
+
+    configurables = [
+        'feed',
+        'buffer_size',
+    ]
+    profiled_phases = [
+        'pull',
+    ]
+
+    stream: BarBuffer = None
+
+    def add_data(self, data=None, length=None):
+        """Open the feed and an empty bar buffer"""
+        assert not self.ohlcv_levels, "Streaming markets have no ohlcv_levels"
+        assert not self.normalize, "Streaming markets have no normalize"
+        if self.feed is None:
+            if self.data is None:
+                self.data = self._generate_data(
+                    round((1 + self.samplesize) * self.total_space_size))
+            if not isinstance(self.data.index, pd.DatetimeIndex):
+                self.add_time_index()
+            self.feed = frame_feed(self.data)
+        self.feed = iter(self.feed)
+        self.data = None
+
+        self.buffer_size = max(self.buffer_size, self.observation_size)
+        self.stream = BarBuffer(self.buffer_size, self.ohclv_freq)
+        self.price_column = 'close'
+
+    def pull(self):
+        """Add the next tick to the buffer, returning False if the feed ended"""
+        tick = next(self.feed, None)
+        if tick is None:
+            return False
+        self.stream.add(*tick)
+        return True
+
+    def get_price(self):
+        return self.stream.latest(self.price_column)
+
+    def get_observation(self):
+        observation = self.stream.window(self.observation_size)
+        return observation.copy() if self.copy_observation else observation
+
+    def reset(self):
+        """Fill the buffer until it holds a full observation"""
+        self.observed = 0
+        while len(self.stream) < self.observation_size:
+            if not self.pull():
+                raise RuntimeError(
+                    f"Feed ended with {len(self.stream)} of "
+                    f"{self.observation_size} bars observed")
+        return self.get_observation()
+
+    def create_observation_space(self):
+        """One Box of the latest observation_size bars"""
+        if self.flat_observation_space:
+            return spaces.Box(
+                low=0,
+                high=1,
+                shape=(self.observation_size, len(BarBuffer.columns)),
+                dtype=self.dtype,
+            )
+        return super().create_observation_space()
+
+    def step(self, amount):
+        # calculate reward, updating price, position, and bank (money)
+        reward = self.calculate_reward(amount, self.get_price())
+
+        # End if we're out of money
+        done = self.money <= 0
+
+        # Take the next tick or end run if we're out of time or ticks
+        if not self._move_index() or not self.pull():
+            done = True
+
+        return (
+            self.get_observation(),
+            reward,
+            done,
+            {}
+        )
+
+
+class IPortfolioMarketEnv(PortfolioMixin, MarketEnvBase):
+    """Portfolio market environment
+        Trades n_assets price series at once from one cash balance. The
+            action is a vector of target weights or amounts per asset (see
+            PortfolioMixin), and the reward is the change in equity over the
+            step, net of fees.
+    """
+    def step(self, action):
+        # fill every asset at the current price, updating holdings and bank
+        price = self.get_price()
+        fills, fees = self.rebalance(action, price)
+
+        # Prep index for next observation or end run if we're out of time
+        done = not self._move_index()
+
+        # Mark holdings to the next price
+        next_price = self.get_price()
+        reward = self.holdings @ (next_price - price) - fees.sum()
+
+        # End if we're out of money
+        done = done or self.equity(next_price) <= 0
+
+        return (
+            self.get_observation(),
+            reward,
+            done,
+            {'fills': fills, 'fees': fees}
+        )
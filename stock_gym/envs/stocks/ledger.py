@@ -0,0 +1,140 @@
+"""Ledger of open positions for trading"""
+
+from collections import deque
+from collections.abc import Mapping
+import heapq
+
+
+class LotLedger(Mapping):
+    """Open lots, read as a mapping of bid_price => amount
+        Sells consume lots in the order given by accounting:
+            highest: highest bid price first
+            lifo: most recently opened lot first
+            fifo: oldest lot first
+            average: every lot at the average bid price
+
+        Opening and consuming a lot costs O(log n) in the number of open
+            price levels for highest, and O(1) otherwise.
+    """
+    accountings = ['highest', 'lifo', 'fifo', 'average']
+
+    def __init__(self, accounting='highest', lots=None):
+        assert accounting in self.accountings, \
+            f"Invalid accounting: {accounting}"
+        self.accounting = accounting
+        self.levels = {}  # bid_price => amount
+        self.heap = []  # negated open bid prices, for highest
+        self.lots = deque()  # [bid_price, amount] in opening order
+        self.counts = {}  # bid_price => open lots, for lifo and fifo
+        self.amount = 0  # total amount, for average
+        self.cost = 0  # total cost, for average
+
+        if lots is not None:
+            for price, amount in dict(lots).items():
+                self.add(price, amount)
+
+    def __getitem__(self, price):
+        return self.levels[price]
+
+    def __iter__(self):
+        return iter(self.levels)
+
+    def __len__(self):
+        return len(self.levels)
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.accounting!r}, {self.levels!r})"
+
+    def copy(self):
+        """Ledger of the same lots, opened and consumed independently"""
+        ledger = type(self)(self.accounting)
+        ledger.levels = dict(self.levels)
+        ledger.heap = list(self.heap)
+        ledger.lots = deque([price, amount] for price, amount in self.lots)
+        ledger.counts = dict(self.counts)
+        ledger.amount = self.amount
+        ledger.cost = self.cost
+        return ledger
+
+    def add(self, price, amount):
+        """Open a lot of amount at price"""
+        if self.accounting == 'average':
+            self.amount += amount
+            self.cost += price * amount
+            self.levels = {self.cost / self.amount: self.amount} \
+                if self.amount else {}
+            return
+
+        if price in self.levels:
+            self.levels[price] += amount
+        else:
+            self.levels[price] = amount
+            if self.accounting == 'highest':
+                heapq.heappush(self.heap, -price)
+
+        if self.accounting != 'highest':
+            if self.lots and self.lots[-1][0] == price:
+                self.lots[-1][1] += amount
+            else:
+                self.lots.append([price, amount])
+                self.counts[price] = self.counts.get(price, 0) + 1
+
+    def consume(self, amount):
+        """Consume up to amount from the open lots
+            Yields each (bid_price, amount) taken, in accounting order.
+        """
+        if self.accounting == 'average':
+            yield from self._consume_average(amount)
+        elif self.accounting == 'highest':
+            yield from self._consume_highest(amount)
+        else:
+            yield from self._consume_lots(amount)
+
+    def _consume_highest(self, amount):
+        while amount > 0 and self.heap:
+            price = -self.heap[0]
+            level = self.levels[price]
+            if amount >= level:
+                heapq.heappop(self.heap)
+                del self.levels[price]
+                amount -= level
+                yield price, level
+            else:
+                self.levels[price] -= amount
+                yield price, amount
+                amount = 0
+
+    def _consume_lots(self, amount):
+        take_last = self.accounting == 'lifo'
+        while amount > 0 and self.lots:
+            lot = self.lots[-1] if take_last else self.lots[0]
+            price, lot_amount = lot
+            if amount >= lot_amount:
+                if take_last:
+                    self.lots.pop()
+                else:
+                    self.lots.popleft()
+                taken = lot_amount
+            else:
+                lot[1] -= amount
+                taken = amount
+
+            # Drop the level once no other lot is open at its price
+            self.levels[price] -= taken
+            if taken == lot_amount:
+                self.counts[price] -= 1
+                if not self.counts[price]:
+                    del self.counts[price]
+                    del self.levels[price]
+            amount -= taken
+            yield price, taken
+
+    def _consume_average(self, amount):
+        if amount <= 0 or not self.amount:
+            return
+        price = self.cost / self.amount
+        taken = min(amount, self.amount)
+        self.amount -= taken
+        self.cost = price * self.amount
+        self.levels = {price: self.amount} if self.amount else {}
+        yield price, taken
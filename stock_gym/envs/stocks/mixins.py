@@ -1,14 +1,40 @@
 """Environment for trading"""
 
-from collections import defaultdict
-import random
+import copy
 
 import numpy as np
 import pandas as pd
+from pandas.tseries.frequencies import to_offset
 
 import gym
 from gym import spaces
-from gym.utils import seeding
+
+from stock_gym.envs.stocks.cache import dataset_cache
+from stock_gym.envs.stocks.features import \
+    indicator_column, parse_indicator, running_moments
+from stock_gym.envs.stocks.ledger import LotLedger
+from stock_gym.envs.stocks.profile import Profiler
+from stock_gym.envs.stocks.store import DatasetStore, is_dataset
+
+
+def create_rng(seed=None):
+    """Generator seeded from an int, a SeedSequence, or fresh entropy
+        Returns the generator and its SeedSequence, from which independent
+        streams for parallel markets can be spawned.
+    """
+    sequence = seed if isinstance(seed, np.random.SeedSequence) \
+        else np.random.SeedSequence(seed)
+    return np.random.Generator(np.random.PCG64(sequence)), sequence
+
+
+def collect(cls, name):
+    """Join the lists named name declared by cls and its mixins"""
+    items = []
+    for klass in reversed(cls.__mro__):
+        for item in vars(klass).get(name, []):
+            if item not in items:
+                items.append(item)
+    return items
 
 
 class MarketEnvBase(gym.Env):
@@ -26,10 +52,81 @@ class MarketEnvBase(gym.Env):
     start_price = .1
 
     columns = ['price']  # DataFrame columns
+    price_column = 'price'  # Column to trade at
     n_features = 1  # OHLCV == 5, linear values == 1
     n_actions = 3  # buy, sell, stay
 
-    data: pd.DataFrame = None
+    # Data is held for stepping as one C-contiguous array of dtype, with
+    #  column names mapped to indices; data is a DataFrame view over it
+    _data = None
+    values: np.ndarray = None
+    column_index: dict = None
+    frame_index: pd.Index = None
+    price_index = 0  # Column of price_column in values
+    prices: np.ndarray = None  # View of price_column in values
+    dtype = np.float64
+
+    # Indicators added as columns, as 'name' or 'name:window'; see features
+    indicators = []
+
+    # Serve observations as read-only views into a precomputed window array
+    window_view = False
+    copy_observation = False  # Copy views for agents that mutate observations
+    windows: np.ndarray = None
+
+    # Describe observations with one Box rather than a Tuple of Tuples
+    flat_observation_space = True
+
+    # Normalize observations, per feature, by one of:
+    #  minmax: to 0-1 over the window
+    #  pct_change: change relative to the window's first bar
+    #  zscore: by the running mean and deviation as of the window's last bar
+    normalize = None
+    normalizations = ['minmax', 'pct_change', 'zscore']
+    norm_offset: np.ndarray = None  # per window start, subtracted
+    norm_scale: np.ndarray = None  # per window start, then multiplied
+
+    # Share generated data between markets built with identical parameters
+    cache_data = True
+    random_seed = None  # Seed for self.np_random, drawn at random if None
+    seed_sequence: np.random.SeedSequence = None
+
+    # Draw this many episode starts at a time; 0 draws one on each reset
+    start_batch = 0
+    starts = None  # Iterator over drawn starts
+    stochastic_data = False  # Generated data depends on the seed
+
+    # Attributes that determine generated data, and those the cache restores
+    generation_params = [
+        'total_space_size',
+        'n_features',
+        'columns',
+        'volitility',
+        'start_price',
+        'indicators',
+    ]
+    cache_attrs = [
+        'data',
+    ]
+
+    # Time the phases of each step, and report them in each step's info
+    profile = False
+    profile_info = False
+    profiler: Profiler = None
+    profiled_phases = [
+        'step',
+        'calculate_reward',
+        'get_price',
+        'get_observation',
+        '_move_index',
+    ]
+
+    # Attributes holding what a market has traded, see save_trading_state
+    trading_state = [
+        'money',
+        'position',
+        'vested',
+    ]
 
     configurables = [
         'max_observations',
@@ -38,10 +135,22 @@ class MarketEnvBase(gym.Env):
         'fee',
         'money',
         'reward_multiplier',
+        'fail_reward',
         'columns',
         'n_features',
         'n_actions',
         'data',
+        'window_view',
+        'copy_observation',
+        'flat_observation_space',
+        'normalize',
+        'dtype',
+        'indicators',
+        'cache_data',
+        'random_seed',
+        'start_batch',
+        'profile',
+        'profile_info',
     ]
 
     position = 0  # Amount vested
@@ -55,26 +164,74 @@ class MarketEnvBase(gym.Env):
     def __init__(self, **kwargs):
         self._set_params(kwargs)
 
+        self.seed(self.random_seed)
+        self.add_data(self.data)
+
         self.action_space = self.create_action_space()
         self.observation_space = self.create_observation_space()
 
-        self.seed()
-        self.add_data(self.data)
+        if self.profile or self.profile_info:
+            self.profiler = Profiler(
+                self, collect(type(self), 'profiled_phases'),
+                info=self.profile_info)
+
+    @classmethod
+    def get_configurables(cls):
+        """Configurables declared by this class and its mixins"""
+        return collect(cls, 'configurables')
+
+    def save_trading_state(self):
+        """Copy of the money, position and lots this market holds"""
+        return {name: copy.deepcopy(vars(self)[name])
+                for name in collect(type(self), 'trading_state')
+                if name in vars(self)}
+
+    def restore_trading_state(self, state):
+        """Return to a state from save_trading_state
+            Attributes the market didn't hold then fall back to their class
+            defaults.
+        """
+        for name in collect(type(self), 'trading_state'):
+            if name in state:
+                setattr(self, name, copy.deepcopy(state[name]))
+            elif name in vars(self):
+                delattr(self, name)
 
     def _set_params(self, kwargs):
-        for parm in self.configurables:
+        for parm in self.get_configurables():
             val = kwargs.pop(parm, None)
             if val is not None:
                 setattr(self, parm, val)
 
+    def stats(self):
+        """Call counts and timings of each profiled phase, in seconds"""
+        return {} if self.profiler is None else self.profiler.stats()
+
+    @property
+    def data(self):
+        """Backend data; for tables, a DataFrame view built over values on
+            first access"""
+        if self._data is None and self.column_index is not None:
+            self._data = pd.DataFrame(
+                self.values,
+                index=self.frame_index,
+                columns=list(self.column_index),
+                copy=False,
+            )
+        return self._data
+
+    @data.setter
+    def data(self, data):
+        self._data = data
+
     def shape(self):
-        return (self.n_features, len(self.data))
+        return (self.n_features, len(self.values))
 
     def observation_shape(self):
         return (self.n_features, self.observation_size)
 
     def _gen_element(self, last_price):
-        change = 2 * self.volitility * random.random()
+        change = 2 * self.volitility * self.np_random.random()
         if change > self.volitility:
             change -= (2 * self.volitility)
         return last_price + last_price * change
@@ -88,17 +245,176 @@ class MarketEnvBase(gym.Env):
         )
 
     def add_data(self, data=None, length=None):
-        """Add data to backend"""
+        """Add data to backend
+            data may also be a DatasetStore, or the path to one, in which
+            case the stored values are memory-mapped rather than copied.
+        """
+        if is_dataset(self.data):
+            self.data = DatasetStore.open(self.data).frame()
+        elif self.data is None and is_dataset(data):
+            self.data = DatasetStore.open(data).frame()
+
+        key = cached = None
+        if self.data is None and data is None and self.is_cacheable():
+            key = self.dataset_key(length)
+            cached = dataset_cache.get(key)
+            if cached is not None:
+                for attr, value in cached.items():
+                    setattr(self, attr, value)
+
         if self.data is None:  # allows for init override of data
             self.data = self._generate_data(length=length) \
                         if data is None \
                         else pd.DataFrame(data, columns=self.columns)
         else:
-            self.total_space_size = len(self.data)
-            if self.observation_size > self.total_space_size:
-                self.observation_size = self.total_space_size
-            if self.max_observations > self.total_space_size:
-                self.max_observations = self.total_space_size
+            self.fit_data_size()
+        self.prepare_data()
+
+        if key is not None and cached is None:
+            dataset_cache.put(key, {
+                attr: getattr(self, attr) for attr in collect(
+                    type(self), 'cache_attrs')
+            })
+
+    def is_cacheable(self):
+        """Test, returning True if generated data may be shared
+            Data drawn from an unseeded generator is never generated twice,
+            so it is not cached.
+        """
+        return self.cache_data and \
+            not (self.stochastic_data and self.random_seed is None)
+
+    def dataset_key(self, length=None):
+        """Key identifying the data this market generates"""
+        params = []
+        for parm in collect(type(self), 'generation_params'):
+            val = getattr(self, parm)
+            params.append((parm, tuple(val) if isinstance(val, list) else val))
+        seed = self.data_seed if self.stochastic_data else None
+        return (type(self), length, tuple(params), seed)
+
+    def fit_data_size(self):
+        """Fit the space, window and run sizes to the backend data"""
+        self.total_space_size = len(self.data)
+        if self.observation_size > self.total_space_size:
+            self.observation_size = self.total_space_size
+        if self.max_observations > self.total_space_size:
+            self.max_observations = self.total_space_size
+
+    def prepare_data(self):
+        """Precompute step-time structures over the backend data"""
+        self.store_values()
+        if self.window_view:
+            self.windows = self.create_windows()
+        if self.normalize:
+            self.norm_offset, self.norm_scale = self.create_normalization()
+
+    def store_values(self):
+        """Convert the backend data, once, to a C-contiguous array
+            DataFrames are dropped in favour of values, keeping their index
+            and columns to rebuild a view on demand.
+        """
+        data = self._data
+        if isinstance(data, pd.DataFrame):
+            self.values = np.ascontiguousarray(data.to_numpy(dtype=self.dtype))
+            self.column_index = {
+                col: ix for ix, col in enumerate(data.columns)}
+            self.frame_index = data.index
+            self._data = None
+        else:
+            self.values = np.ascontiguousarray(data, dtype=self.dtype)
+            self.column_index = None
+            self.frame_index = None
+            self._data = self.values
+        if self.indicators:
+            self.add_indicators()
+
+        if self.column_index is not None:
+            self.price_index = self.column_index.get(self.price_column, 0)
+        self.prices = self.values if self.values.ndim == 1 \
+            else self.values[:, self.price_index]
+
+    def add_indicators(self):
+        """Append a column to values for each configured indicator
+            Indicators are computed once over the whole series, from the
+            price column and, for vwap, the volume or quantity column.
+            Columns already present, such as those of cached data, are kept.
+        """
+        if self.values.ndim == 1:
+            self.values = self.values[:, np.newaxis]
+            self.column_index = {self.price_column: 0}
+            self._data = None
+        columns = self.column_index
+        price = self.values[:, columns.get(self.price_column, 0)]
+        volume_column = 'volume' if 'volume' in columns else 'quantity'
+        volume = self.values[:, columns[volume_column]] \
+            if volume_column in columns else None
+
+        added = []
+        for spec in self.indicators:
+            column = indicator_column(spec)
+            if column in columns:
+                continue
+            indicator, kwargs = parse_indicator(spec)
+            added.append(indicator(price, volume, **kwargs))
+            columns[column] = len(columns)
+        if added:
+            self.values = np.ascontiguousarray(np.column_stack(
+                [self.values] + added).astype(self.dtype, copy=False))
+            self._data = None
+        self.n_features = self.values.shape[1]
+
+    def create_windows(self):
+        """Create a read-only sliding window view over a contiguous copy of
+            the data, indexed by observation start"""
+        values = self.values
+        windows = np.lib.stride_tricks.sliding_window_view(
+            values, self.observation_size, axis=0)
+        if windows.ndim > 2:  # (start, feature, window) => (start, window, ...)
+            windows = windows.swapaxes(1, 2)
+        return windows
+
+    def create_normalization(self, values=None):
+        """Precompute the offset and scale normalizing each window
+            Indexed by window start, so normalizing an observation is
+            (window - offset[idx]) * scale[idx]. Features without range,
+            deviation, or a first bar to divide by normalize to 0.
+            Windows are of values, self.values by default.
+        """
+        assert self.normalize in self.normalizations, \
+            f"Invalid normalize: {self.normalize}"
+        values = self.values if values is None else values
+        size = self.observation_size
+        if self.normalize == 'pct_change':
+            offset = values[:len(values) - size + 1]
+            spread = offset
+        elif self.normalize == 'minmax':
+            rolling = pd.DataFrame(values.reshape(len(values), -1)) \
+                .rolling(size)
+            offset = rolling.min().to_numpy()[size - 1:]
+            spread = rolling.max().to_numpy()[size - 1:] - offset
+            offset = offset.reshape((-1,) + values.shape[1:])
+            spread = spread.reshape(offset.shape)
+        else:
+            mean, std = running_moments(values)
+            offset, spread = mean[size - 1:], std[size - 1:]
+
+        scale = np.zeros(spread.shape)
+        np.divide(1, spread, out=scale, where=spread != 0)
+        return (np.ascontiguousarray(offset, dtype=self.dtype),
+                scale.astype(self.dtype))
+
+    def normalize_observation(self, observation, idx=None):
+        """Normalize a window starting at idx, the current index by default"""
+        idx = self.idx if idx is None else idx
+        return (observation - self.norm_offset[idx]) * self.norm_scale[idx]
+
+    def observation_bounds(self):
+        """Low and high of observed features"""
+        if self.normalize in (None, 'minmax'):
+            # Range is 0-1 for normalized gradients
+            return 0, 1
+        return -np.inf, np.inf
 
     def _move_index(self):
         if self.observed == self.max_observations - 1:
@@ -107,21 +423,59 @@ class MarketEnvBase(gym.Env):
         self.idx += 1
         return True
 
+    def episode_prices(self, length, start_idx=None):
+        """Prices observed by an episode of length steps from start_idx
+            start_idx defaults to the current index. Episodes end after
+            max_observations steps.
+        """
+        start = (self.idx if start_idx is None else start_idx) + \
+            self.observation_size - 1
+        return self.prices[start:start + min(length, self.max_observations)]
+
+    def episode_result(self, steps, done, **trajectories):
+        """Report of an evaluated episode, cut at its first done step"""
+        result = {name: values[:steps]
+                  for name, values in trajectories.items()}
+        result['steps'] = steps
+        result['done'] = done
+        return result
+
     def get_observation(self):
         """Grab next piece of data, update index"""
-        return self.data[self.idx:self.idx + self.observation_size]
+        if self.windows is not None:
+            observation = self.windows[self.idx]
+        else:
+            observation = self.values[self.idx:self.idx + self.observation_size]
+        if self.norm_scale is not None:
+            return self.normalize_observation(observation)
+        return observation.copy() if self.copy_observation else observation
 
     def seed(self, seed=None):
-        self.np_random, seed = seeding.np_random(seed)
-        return [seed]
+        """Seed self.np_random, which draws all of this market's randomness
+            seed may be an int, or a SeedSequence such as one spawned for
+            this market by a vectorized or parallel runner.
+        """
+        self.np_random, self.seed_sequence = create_rng(seed)
+        self.data_seed = (self.seed_sequence.entropy,
+                          self.seed_sequence.spawn_key)
+        self.starts = None
+        return [self.seed_sequence.entropy]
 
     def set_random_index(self):
         """Reset the pointer for a new run"""
         self.observed = 0
-        self.idx = np.random.randint(
-            self.total_space_size -
+        high = self.total_space_size - \
             (self.observation_size + self.max_observations - 2)
-        )
+        if not self.start_batch:
+            self.idx = int(self.np_random.integers(high))
+            return
+
+        idx = None if self.starts is None else next(self.starts, None)
+        if idx is None:
+            self.starts = iter(self.np_random.integers(
+                high, size=self.start_batch).tolist())
+            idx = next(self.starts)
+        self.idx = idx
 
     def reset(self):
         self.set_random_index()
@@ -132,16 +486,28 @@ class MarketEnvBase(gym.Env):
         return spaces.Discrete(self.n_actions)
 
     def create_observation_space(self):
-        """Create a discrete space of size self.observation_size"""
+        """Create a space of size self.observation_size
+            By default a single Box shaped like the observations:
+            (observation_size,) for single variable series, and
+            (observation_size, n_columns) for DataFrames.
+        """
+        if self.flat_observation_space:
+            low, high = self.observation_bounds()
+            return spaces.Box(
+                low=low,
+                high=high,
+                shape=(self.observation_size,) + self.values.shape[1:],
+                dtype=self.dtype,
+            )
         return spaces.Tuple(
             [self.create_observation_point() for ix in range(self.observation_size)]
         )
 
     def create_observation_point(self):
         """Create a tuple of gradients n_features wide"""
-        # Range is 0-1 for normalized gradients
+        low, high = self.observation_bounds()
         return spaces.Tuple(
-            [spaces.Box(low=0, high=1, shape=(1,), dtype=np.float32)
+            [spaces.Box(low=low, high=high, shape=(1,), dtype=self.dtype)
                 for ix in range(self.n_features)]
         )
 
@@ -153,7 +519,7 @@ class OHLCVMixin:
     time_start = '1/1/2018'
     time_end = '1/2/2018'
     time_freq = 'S'  # Nanosecond-level granularity
-    ohclv_freq = '30Sec'
+    ohclv_freq = '30S'
 
     # Add this many samples for downsample to OHLCV. This should be the
     #  average number of order executions per generated OHLCV period.
@@ -162,84 +528,254 @@ class OHLCVMixin:
     # Base volume by which to generate random movement
     volume_base = .1
 
-    lastrow = None
+    raw_data: pd.DataFrame = None
     generated_row_count = 0
 
+    # Coarser frequencies, multiples of ohclv_freq, observed alongside it
+    ohlcv_levels = []
+    pyramid: list = None  # Padded (bars, OHLCV) array per level
+    ohlcv_columns: list = None  # Columns of the OHLCV bars in values
+    level_starts: list = None  # Window start per level, per base bar
+    level_norms: list = None  # (offset, scale) per level, by window start
+
+    configurables = [
+        'ohlcv_levels',
+    ]
+
+    stochastic_data = True
+    generation_params = [
+        'time_start',
+        'time_end',
+        'time_freq',
+        'ohclv_freq',
+        'samplesize',
+    ]
+    cache_attrs = [
+        'raw_data',
+    ]
+
+    def is_tick_data(self):
+        """Test, returning True if the backend data holds raw ticks"""
+        return isinstance(self.data, pd.DataFrame) and \
+            all(col in self.data.columns for col in ['price', 'quantity'])
+
     def convert_to_ohlcv(self):
-        self.raw_data = self.data.copy()
-        ohlc = self.data['price'].resample(self.ohclv_freq)
-        volume = self.data['quantity'].resample(self.ohlcv_freq).sum().fillna(0)
+        """Downsample ticks to OHLCV bars
+            Ticks are binned by timestamp and reduced per bar in one pass, and
+            kept, sorted by time, in raw_data.
+            Bars without volume carry the previous close through open, high,
+            low and close.
+        """
+        ticks = self.data
+        if not ticks.index.is_monotonic_increasing:
+            ticks = ticks.sort_index(kind='stable')
+        self.raw_data = ticks
+
+        # Bin ticks on the frequency grid, anchored at midnight like resample
+        freq = to_offset(self.ohclv_freq).nanos
+        origin = ticks.index[0].normalize().value
+        bins = (ticks.index.asi8 - origin) // freq
+        start = ticks.index[0].normalize() + pd.Timedelta(int(bins[0]) * freq)
+        bins -= bins[0]
+        starts = np.flatnonzero(np.diff(bins, prepend=-1))
+        ends = np.append(starts[1:], len(bins)) - 1
+
+        price = ticks['price'].to_numpy(dtype=np.float64)
+        quantity = ticks['quantity'].to_numpy(dtype=np.float64)
 
-        ohlcv = pd.concat([ohlc, volume], axis=1)
-        ohlcv.columns.values[-1] = 'volume'
+        ohlcv = np.zeros((bins[-1] + 1, 5))
+        filled = bins[starts]
+        ohlcv[filled, 0] = price[starts]
+        ohlcv[filled, 1] = np.maximum.reduceat(price, starts)
+        ohlcv[filled, 2] = np.minimum.reduceat(price, starts)
+        ohlcv[filled, 3] = price[ends]
+        ohlcv[filled, 4] = np.add.reduceat(quantity, starts)
 
-        self.lastrow = ohlcv.iloc[0].copy()
+        # Forward fill the close of the last bar with volume
+        empty = ohlcv[:, 4] == 0
+        last = np.maximum.accumulate(
+            np.where(empty, 0, np.arange(len(ohlcv))))
+        ohlcv[empty, :4] = ohlcv[last[empty], 3, np.newaxis]
 
-        def update_nan(row):
-            """Forward fill NaN in OHLC fields"""
-            if row.volume == 0:
-                row.open = self.lastrow.close
-                row.high = self.lastrow.close
-                row.low = self.lastrow.close
-                row.close = self.lastrow.close
-            self.lastrow = row.copy()
-            return row
+        self.data = pd.DataFrame(
+            ohlcv,
+            index=pd.date_range(
+                start=start,
+                periods=len(ohlcv),
+                freq=self.ohclv_freq,
+                name=ticks.index.name,
+            ),
+            columns=['open', 'high', 'low', 'close', 'volume'],
+        )
 
-        self.data = ohlcv.apply(update_nan, axis=1)
-        self.lastrow = None
+    def bar_ticks(self, idx):
+        """Raw ticks traded during the bar at idx"""
+        start = self.data.index[idx]
+        index = self.raw_data.index
+        return self.raw_data.iloc[
+            index.searchsorted(start):
+            index.searchsorted(start + to_offset(self.ohclv_freq))
+        ]
 
     def add_time_index(self, length=None):
-        length = self.generated_row_count if length is None else length
-        dates = pd.DataFrame(
-            {
-                'timestamp': pd.date_range(
-                    start=self.time_start,
-                    end=self.time_end,
-                    freq=self.time_freq,
-                ),
-            },
-            index='timestamp',
-        ).sample(self.generated_row_count)
-
-        self.data = pd.concat([dates, self.data], axis=1)
-        self.data.set_index('timestamp')
+        """Index ticks by sorted timestamps drawn between time_start and
+            time_end"""
+        length = len(self.data) if length is None else length
+        start = pd.Timestamp(self.time_start)
+        step = to_offset(self.time_freq).nanos
+        steps = (pd.Timestamp(self.time_end) - start).value // step + 1
+        offsets = np.sort(self.np_random.integers(steps, size=length))
+
+        self.data.index = pd.DatetimeIndex(
+            start.value + offsets * step, name='timestamp')
 
     def _generate_data(self, length=None):
+        """Generate random walk ticks in one batch from self.np_random
+            Each tick moves the price by up to +/- volitility, and trades a
+            random fraction of the size of that move.
+        """
         length = self.generated_row_count if length is None else length
-        prices = [self.start_price]
-        for a in range(length):
-            new_price = self._gen_element(prices[-1])
-            amount = random.random() * (new_price - prices[-1])
-            prices.append([new_price, amount])
-        return pd.DataFrame.from_records(prices, columns=self.columns)
+        changes = self.np_random.uniform(
+            -self.volitility, self.volitility, length)
+        prices = self.start_price * np.cumprod(1 + changes)
+        moves = np.abs(np.diff(prices, prepend=self.start_price))
+        quantity = self.np_random.random(length) * moves
+        return pd.DataFrame(
+            {'price': prices, 'quantity': quantity},
+            columns=self.columns,
+        )
 
     def add_data(self, data=None, length=None):
         """Add data to backend"""
         if data is None:
             self.generated_row_count = \
                 round((1 + self.samplesize) * self.total_space_size)
-        else:
+        elif not is_dataset(data):
             self.generated_row_count = len(data)
 
-        length = self.generated_row_count if length is None else length
-        #self.data = self._generate_data(length)
         super().add_data(data=data, length=self.generated_row_count)
 
-        self.add_time_index()
-        self.convert_to_ohlcv()
+    def prepare_data(self):
+        """Build OHLCV bars when the backend holds raw ticks"""
+        if self.is_tick_data():
+            if not isinstance(self.data.index, pd.DatetimeIndex):
+                self.add_time_index()
+            self.convert_to_ohlcv()
+            self.fit_data_size()
+        if isinstance(self.data, pd.DataFrame) and \
+                'close' in self.data.columns:
+            self.price_column = 'close'
+        super().prepare_data()
+        if self.ohlcv_levels:
+            self.build_pyramid()
+
+    def build_pyramid(self):
+        """Resample the bars once to each of ohlcv_levels
+            Each level is binned like convert_to_ohlcv. Base bar i maps to
+            the last level bar closed by the end of bar i, so observations
+            never see a level bar before it completes. Levels are padded in
+            front with observation_size flat bars at the first open, so
+            every window is one slice.
+        """
+        assert isinstance(self.frame_index, pd.DatetimeIndex) and \
+            'volume' in self.column_index, "ohlcv_levels need OHLCV bars"
+        self.ohlcv_columns = [self.column_index[col] for col in
+                              ['open', 'high', 'low', 'close', 'volume']]
+        ohlcv = self.values[:, self.ohlcv_columns]
+        base = to_offset(self.ohclv_freq).nanos
+        stamps = self.frame_index.asi8
+        origin = self.frame_index[0].normalize().value
+        pad = np.zeros((self.observation_size, 5), dtype=self.values.dtype)
+        pad[:, :4] = ohlcv[0, 0]
+
+        self.pyramid = []
+        self.level_starts = []
+        for level in self.ohlcv_levels:
+            freq = to_offset(level).nanos
+            assert freq > base and not freq % base, \
+                f"Level {level} isn't a multiple of {self.ohclv_freq}"
+            bins = (stamps - origin) // freq
+            starts = np.flatnonzero(np.diff(bins, prepend=bins[0] - 1))
+            ends = np.append(starts[1:], len(bins)) - 1
+
+            bars = np.empty((len(starts), 5), dtype=self.values.dtype)
+            bars[:, 0] = ohlcv[starts, 0]
+            bars[:, 1] = np.maximum.reduceat(ohlcv[:, 1], starts)
+            bars[:, 2] = np.minimum.reduceat(ohlcv[:, 2], starts)
+            bars[:, 3] = ohlcv[ends, 3]
+            bars[:, 4] = np.add.reduceat(ohlcv[:, 4], starts)
+            closed = np.searchsorted(ends, np.arange(len(bins)), side='right')
+            self.pyramid.append(np.concatenate([pad, bars]))
+            self.level_starts.append(closed)
+        self.n_features = self.values.shape[1] + 5 * len(self.ohlcv_levels)
+        if self.normalize:
+            self.level_norms = [self.create_normalization(bars)
+                                for bars in self.pyramid]
+
+    def get_observation(self):
+        """Grab the base window, and the latest window of every level
+            Each level window is normalized by its own statistics, so it
+            keeps to the bounds of the observation space.
+        """
+        observation = super().get_observation()
+        if not self.ohlcv_levels:
+            return observation
+        last = self.idx + self.observation_size - 1
+        starts = [starts[last] for starts in self.level_starts]
+        windows = [bars[start:start + self.observation_size]
+                   for bars, start in zip(self.pyramid, starts)]
+        if self.level_norms is not None:
+            windows = [
+                (window - offset[start]) * scale[start]
+                for window, (offset, scale), start in zip(
+                    windows, self.level_norms, starts)
+            ]
+        return np.concatenate([observation] + windows, axis=1)
+
+    def create_observation_space(self):
+        """Widen the observation Box by each level's OHLCV columns"""
+        if not self.ohlcv_levels or not self.flat_observation_space:
+            return super().create_observation_space()
+        low, high = self.observation_bounds()
+        return spaces.Box(
+            low=low,
+            high=high,
+            shape=(self.observation_size, self.n_features),
+            dtype=self.dtype,
+        )
 
 
 class ContinuousMixin:
     """Provides a continuous action interface"""
     amount_range = 1000
-    bids: dict = defaultdict(int)  # bid_price => amount
+    accounting = 'highest'  # Lot sold first: highest, lifo, fifo, average
     money: int
 
+    configurables = [
+        'accounting',
+    ]
+    trading_state = [
+        '_ledger',
+    ]
+
+    _ledger: LotLedger = None
+
     n_actions = 1  # Amount
 
     position = 0  # Amount vested
     vested = 0  # Money vested
 
+    @property
+    def bids(self):
+        """Open lots of this market, bid_price => amount"""
+        if self._ledger is None:
+            self._ledger = LotLedger(self.accounting)
+        return self._ledger
+
+    @bids.setter
+    def bids(self, bids):
+        self._ledger = LotLedger(self.accounting, bids)
+
     def create_action_space(self):
         """Amount of currency to purchase at the current price"""
         return spaces.Box(
@@ -249,6 +785,66 @@ class ContinuousMixin:
             dtype=np.float32,
         )
 
+    def evaluate_amounts(self, amounts, prices):
+        """Run the accounting of steps trading amounts at prices
+            Follows calculate_reward in one loop over floats, from the
+            current money, position and open lots, without changing them.
+        """
+        amounts = np.asarray(amounts, dtype=np.float64).reshape(-1)
+        steps = min(len(amounts), len(prices))
+        rewards = []
+        money = []
+        position = []
+        vested = []
+
+        bids = self.bids.copy()
+        cash, held, spent = self.money, self.position, self.vested
+        fee, fail = self.fee, self.fail_reward
+        last = self.max_observations - 1
+        done = False
+        for step, amount, price in zip(
+                range(steps), amounts.tolist(), prices[:steps].tolist()):
+            total_price = amount * price
+            if total_price > 0:  # buy
+                reward = fee * total_price
+                reward -= fail if cash < total_price else total_price
+                bids.add(price, amount)
+                held += amount
+                spent += total_price
+                cash += reward
+            elif total_price < 0:  # sell
+                amount = abs(amount)
+                total_price = amount * price
+                reward = fee * total_price
+                if held < amount:
+                    returns = -1 * fail
+                else:
+                    selling_vested = 0
+                    for _bid, _amt in bids.consume(amount):
+                        selling_vested += _bid * _amt
+                        held -= _amt
+                    spent -= selling_vested
+                    returns = amount * price - selling_vested
+                reward += total_price + returns
+                cash += reward
+                reward *= self.reward_multiplier
+            else:  # stay
+                cash += fee
+                reward = fee
+
+            rewards.append(reward)
+            money.append(cash)
+            position.append(held)
+            vested.append(spent)
+            if cash <= 0 or step == last:
+                done = True
+                break
+
+        return self.episode_result(
+            len(rewards), done, rewards=np.array(rewards),
+            money=np.array(money), position=np.array(position),
+            vested=np.array(vested))
+
     def calculate_reward(self, amount, price):
         total_price = amount * price
         if total_price > 0:  # buy
@@ -267,7 +863,7 @@ class ContinuousMixin:
         else:
             reward -= total_price
 
-        self.bids[price] += amount
+        self.bids.add(price, amount)
         self.position += amount
         self.vested += total_price
         self.money += reward
@@ -290,21 +886,181 @@ class ContinuousMixin:
             return -1 * self.fail_reward
 
         selling_vested = 0
-        amt = amount
-        for _bid, _amt in reversed(sorted(self.bids.items())):
-            if amt > 0:
-                if amt >= _amt:
-                    selling_vested += _bid * _amt
-                    self.bids.pop(_bid)
-                    self.position -= _amt
-                    amt -= _amt
-                else:
-                    selling_vested += _bid * amt
-                    self.bids[_bid] -= amt
-                    self.position -= amt
-                    amt = 0
-            else:
-                break
+        for _bid, _amt in self.bids.consume(amount):
+            selling_vested += _bid * _amt
+            self.position -= _amt
 
         self.vested -= selling_vested
         return amount * price - selling_vested
+
+
+class PortfolioMixin:
+    """Provides data and accounting for trading many assets at once
+        Data is a panel shaped (n_assets, time, n_features). It may be given
+            as such an array, an (n_assets, time) array of prices, a list of
+            per asset DataFrames sharing their columns, or a DataFrame with
+            one column of prices per asset.
+
+        Actions are a vector with one entry per asset: target weights of
+            equity, or amounts to buy (positive) and sell (negative), per
+            action_mode. Fills, fees and holdings are computed across every
+            asset with array operations; assets are never sold short, and
+            buys are scaled down to the cash available.
+    """
+    n_assets = 8
+    n_features = 1
+    action_mode = 'weights'  # weights or amounts
+    amount_range = 1000
+
+    assets = None  # Asset names, when the data provides them
+    prices: np.ndarray = None  # (n_assets, time) at price_column
+    holdings: np.ndarray = None  # Units held per asset
+    vested: np.ndarray = None  # Cost basis per asset
+
+    configurables = [
+        'n_assets',
+        'action_mode',
+    ]
+    trading_state = [
+        'holdings',
+    ]
+
+    stochastic_data = True
+    generation_params = [
+        'n_assets',
+    ]
+    profiled_phases = [
+        'rebalance',
+    ]
+
+    def as_panel(self, data):
+        """Coerce data to an (n_assets, time, n_features) array"""
+        if isinstance(data, pd.DataFrame):
+            self.assets = list(data.columns)
+            self.columns = [self.price_column]
+            data = data.to_numpy(dtype=np.float64).T
+        elif isinstance(data, (list, tuple)) and \
+                isinstance(data[0], pd.DataFrame):
+            self.columns = list(data[0].columns)
+            data = np.stack([frame.to_numpy(dtype=np.float64)
+                             for frame in data])
+        data = np.asarray(data, dtype=np.float64)
+        if data.ndim == 2:
+            data = data[:, :, np.newaxis]
+        return data
+
+    def _generate_data(self, length=None):
+        """Generate a random walk of prices per asset from self.np_random"""
+        length = self.total_space_size if length is None else length
+        changes = self.np_random.uniform(
+            -self.volitility, self.volitility, (self.n_assets, length))
+        prices = self.start_price * np.cumprod(1 + changes, axis=1)
+        return prices[:, :, np.newaxis]
+
+    def add_data(self, data=None, length=None):
+        """Add data to backend"""
+        if data is not None:
+            self.data = data
+        if is_dataset(self.data):
+            self.data = DatasetStore.open(self.data).frame()
+        if self.data is not None:
+            self.data = self.as_panel(self.data)
+        super().add_data(length=length)
+
+    def fit_data_size(self):
+        """Fit the space, window and run sizes to the panel"""
+        self.n_assets, self.total_space_size, self.n_features = self.data.shape
+        if self.observation_size > self.total_space_size:
+            self.observation_size = self.total_space_size
+        if self.max_observations > self.total_space_size:
+            self.max_observations = self.total_space_size
+
+    def prepare_data(self):
+        """Slice prices from the panel and open empty positions"""
+        assert not self.normalize, "Portfolio markets have no normalize"
+        if 'close' in self.columns:
+            self.price_column = 'close'
+        price_feature = self.columns.index(self.price_column) \
+            if self.price_column in self.columns else 0
+        self.prices = np.ascontiguousarray(self.data[:, :, price_feature])
+        self.holdings = np.zeros(self.n_assets)
+        self.vested = np.zeros(self.n_assets)
+
+    def shape(self):
+        return self.data.shape
+
+    def get_observation(self):
+        """Grab every asset's window as one view into the panel
+            Panels are held as float64; other dtypes get a converted copy.
+        """
+        observation = self.data[
+            :, self.idx:self.idx + self.observation_size].astype(
+                self.dtype, copy=False)
+        return observation.copy() if self.copy_observation else observation
+
+    def get_price(self):
+        return self.prices[:, self.idx + self.observation_size - 1]
+
+    def equity(self, price):
+        """Value of cash and holdings at price"""
+        return self.money + self.holdings @ price
+
+    def create_action_space(self):
+        """One target weight or amount per asset"""
+        if self.action_mode == 'weights':
+            return spaces.Box(
+                low=0, high=1, shape=(self.n_assets,), dtype=np.float32)
+        return spaces.Box(
+            low=-self.amount_range * self.money,
+            high=self.amount_range * self.money,
+            shape=(self.n_assets,),
+            dtype=np.float32,
+        )
+
+    def create_observation_space(self):
+        """A Box of every asset's observation window"""
+        # Panels are observed as they are, without normalize
+        return spaces.Box(
+            low=-np.inf,
+            high=np.inf,
+            shape=(self.n_assets, self.observation_size, self.n_features),
+            dtype=self.dtype,
+        )
+
+    def target_trades(self, action, price):
+        """Units to trade per asset to carry out action at price"""
+        action = np.asarray(action, dtype=np.float64).reshape(self.n_assets)
+        if self.action_mode != 'weights':
+            return action
+        weights = np.clip(action, 0, None)
+        total = weights.sum()
+        if total > 1:
+            weights /= total
+        target = np.divide(weights * self.equity(price), price,
+                           out=np.zeros(self.n_assets), where=price > 0)
+        return target - self.holdings
+
+    def rebalance(self, action, price):
+        """Fill action at price, returning units filled and fees per asset"""
+        trades = np.maximum(self.target_trades(action, price), -self.holdings)
+
+        # Scale buys down to the cash left after sells and fees
+        notional = trades * price
+        fees = -self.fee * np.abs(notional)
+        buying = notional > 0
+        cost = notional[buying].sum() + fees[buying].sum()
+        cash = self.money - notional[~buying].sum() - fees[~buying].sum()
+        if cost > max(cash, 0):
+            scale = max(cash, 0) / cost
+            trades[buying] *= scale
+            notional[buying] *= scale
+            fees[buying] *= scale
+
+        # Sells release cost basis at the average cost of the asset
+        held = self.holdings
+        sold = np.divide(-trades, held, out=np.zeros(self.n_assets),
+                         where=~buying & (held > 0))
+        self.vested = self.vested * (1 - sold) + np.maximum(notional, 0)
+        self.holdings = held + trades
+        self.money -= notional.sum() + fees.sum()
+        return trades, fees
@@ -0,0 +1,171 @@
+"""Limit order book for executing against trade ticks"""
+
+from collections import deque
+import heapq
+import math
+
+import numpy as np
+
+
+class OrderBook:
+    """Resting orders matched against a stream of trade ticks
+        Orders rest in price levels, each a FIFO queue, until a tick trades
+            through them: buys fill on ticks at or below their limit, and
+            sells on ticks at or above it. A tick's quantity is shared by
+            both sides, buys first, so it never fills more than it traded.
+            Limit orders fill at their limit price and market orders at the
+            tick's.
+
+        Fills are returned by match and replay, as (timestamp, order id,
+            side, price, amount), and not kept by the book.
+
+        The best price of each side is kept in a heap, so placing an order,
+            and each fill, costs O(log n) in the number of price levels.
+            Cancelled orders are dropped from their queue lazily.
+
+        replay scans a batch of ticks with NumPy for those that could cross
+            the book, and only matches those one at a time.
+    """
+    sides = ['buy', 'sell']
+
+    def __init__(self):
+        self.levels = ({}, {})  # per side: price => [order ids, live count]
+        self.heaps = ([], [])  # per side: best first, so buys are negated
+        self.orders = {}  # order id => [side, price, remaining]
+        self.next_id = 0
+        self.last_price = None
+
+    def __len__(self):
+        return len(self.orders)
+
+    def __contains__(self, order_id):
+        return order_id in self.orders
+
+    def _side(self, side):
+        assert side in self.sides, f"Invalid side: {side}"
+        return self.sides.index(side)
+
+    def limit(self, side, price, amount):
+        """Rest an order to trade amount at price or better, returning its
+            id"""
+        assert amount > 0, f"Invalid amount: {amount}"
+        side = self._side(side)
+        order_id = self.next_id
+        self.next_id += 1
+        self.orders[order_id] = [side, price, amount]
+
+        level = self.levels[side].get(price)
+        if level is None:
+            self.levels[side][price] = [deque([order_id]), 1]
+            heapq.heappush(self.heaps[side], -price if side == 0 else price)
+        else:
+            level[0].append(order_id)
+            level[1] += 1
+        return order_id
+
+    def market(self, side, amount):
+        """Rest an order to trade amount at the next ticks, returning its id"""
+        return self.limit(side, math.inf if side == 'buy' else -math.inf,
+                          amount)
+
+    def cancel(self, order_id):
+        """Cancel an order, returning its unfilled amount"""
+        side, price, remaining = self.orders.pop(order_id)
+        level = self.levels[side][price]
+        level[1] -= 1
+        if not level[1]:
+            del self.levels[side][price]
+        return remaining
+
+    def best(self, side):
+        """Best resting price of side, or None"""
+        side = self._side(side)
+        return self._best(side)
+
+    def _best(self, side):
+        heap = self.heaps[side]
+        levels = self.levels[side]
+        while heap:
+            price = -heap[0] if side == 0 else heap[0]
+            if price in levels:
+                return price
+            heapq.heappop(heap)
+        return None
+
+    def match(self, price, quantity, timestamp=None):
+        """Trade a tick of quantity at price against the book, returning
+            the fills"""
+        self.last_price = price
+        fills = []
+        remaining = quantity
+        for side in (0, 1):
+            while remaining > 0:
+                best = self._best(side)
+                if best is None or \
+                        (best < price if side == 0 else best > price):
+                    break
+                remaining = self._fill_level(
+                    side, best, price, remaining, timestamp, fills)
+        return fills
+
+    def _fill_level(self, side, best, price, quantity, timestamp, fills):
+        level = self.levels[side][best]
+        queue = level[0]
+        fill_price = price if math.isinf(best) else best
+        while quantity > 0 and queue:
+            order_id = queue[0]
+            order = self.orders.get(order_id)
+            if order is None:  # cancelled
+                queue.popleft()
+                continue
+            amount = min(order[2], quantity)
+            order[2] -= amount
+            quantity -= amount
+            fills.append(
+                (timestamp, order_id, self.sides[side], fill_price, amount))
+            if not order[2]:
+                queue.popleft()
+                del self.orders[order_id]
+                level[1] -= 1
+        if not level[1]:
+            del self.levels[side][best]
+        return quantity
+
+    def replay(self, prices, quantities, timestamps=None):
+        """Trade a batch of ticks against the book, returning the fills"""
+        prices = np.asarray(prices, dtype=np.float64)
+        if not len(prices):
+            return []
+        fills = []
+
+        # Fills only lower the best bid and raise the best ask, so ticks
+        #  that can't cross the book now never will during this batch
+        bid, ask = self._bounds()
+        crossing = np.flatnonzero((prices <= bid) | (prices >= ask))
+        if len(crossing):
+            quantities = np.asarray(quantities, dtype=np.float64)
+            for ix in crossing.tolist():
+                price = prices[ix]
+                if bid < price < ask:
+                    continue
+                fills += self.match(
+                    float(price), float(quantities[ix]),
+                    None if timestamps is None else timestamps[ix])
+                bid, ask = self._bounds()
+        self.last_price = float(prices[-1])
+        return fills
+
+    def replay_frame(self, ticks):
+        """Trade a DataFrame of price and quantity ticks, such as an
+            OHLCV market's raw_data, against the book"""
+        return self.replay(
+            ticks['price'].to_numpy(dtype=np.float64),
+            ticks['quantity'].to_numpy(dtype=np.float64),
+            ticks.index,
+        )
+
+    def _bounds(self):
+        bid = self._best(0)
+        ask = self._best(1)
+        return (-math.inf if bid is None else bid,
+                math.inf if ask is None else ask)
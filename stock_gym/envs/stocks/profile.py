@@ -0,0 +1,104 @@
+"""Opt-in timing of market environment phases"""
+
+import functools
+import time
+
+
+class PhaseTimer:
+    """Call count and histogram of call times for one phase
+        Times are binned in powers of two nanoseconds, so recording a call
+            is constant work and memory regardless of how many are made.
+    """
+    n_buckets = 64
+
+    def __init__(self):
+        self.calls = 0
+        self.total = 0  # nanoseconds
+        self.buckets = [0] * self.n_buckets
+
+    def record(self, elapsed):
+        self.calls += 1
+        self.total += elapsed
+        self.buckets[min(elapsed.bit_length(), self.n_buckets - 1)] += 1
+
+    def percentile(self, q):
+        """Upper bound, in seconds, of the bucket holding percentile q"""
+        if not self.calls:
+            return 0.
+        rank = q / 100 * self.calls
+        seen = 0
+        for bucket, count in enumerate(self.buckets):
+            seen += count
+            if seen >= rank and count:
+                return 2 ** bucket / 1e9
+        return 2 ** (self.n_buckets - 1) / 1e9
+
+    def stats(self):
+        return {
+            'calls': self.calls,
+            'total': self.total / 1e9,
+            'mean': self.total / self.calls / 1e9 if self.calls else 0.,
+            'p50': self.percentile(50),
+            'p99': self.percentile(99),
+            'histogram': {
+                2 ** bucket / 1e9: count
+                for bucket, count in enumerate(self.buckets) if count
+            },
+        }
+
+
+class Profiler:
+    """Times the phases of an environment's step
+        Each profiled method is replaced on the instance by a timing wrapper,
+            leaving the class, and environments that aren't profiled,
+            untouched.
+    """
+    def __init__(self, env, phases, info=False):
+        self.timers = {}
+        for phase in phases:
+            method = getattr(env, phase, None)
+            if method is None:
+                continue
+            self.timers[phase] = PhaseTimer()
+            setattr(env, phase, self.wrap(method, self.timers[phase]))
+
+        if info and 'step' in self.timers:
+            env.step = self.wrap_info(env.step)
+
+    @staticmethod
+    def wrap(method, timer):
+        clock = time.perf_counter_ns
+
+        @functools.wraps(method)
+        def timed(*args, **kwargs):
+            start = clock()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                timer.record(clock() - start)
+        return timed
+
+    def wrap_info(self, step):
+        """Add the time spent in each phase during a step, in seconds, to
+            the step's info"""
+        timers = list(self.timers.items())
+
+        @functools.wraps(step)
+        def step_info(action):
+            before = [timer.total for _, timer in timers]
+            result = step(action)
+            result[-1]['profile'] = {
+                phase: (timer.total - total) / 1e9
+                for (phase, timer), total in zip(timers, before)
+                if timer.total != total
+            }
+            return result
+        return step_info
+
+    def stats(self):
+        """Timings of every phase, in seconds"""
+        return {phase: timer.stats() for phase, timer in self.timers.items()}
+
+    def clear(self):
+        for timer in self.timers.values():
+            timer.__init__()
@@ -0,0 +1,177 @@
+"""Columnar recording of market trajectories"""
+
+import glob
+import os
+
+import numpy as np
+
+
+class TrajectoryRecorder:
+    """Records every step of a market into columnar chunks on disk
+        Steps are written into preallocated NumPy column buffers and flushed
+            chunk_size rows at a time to compressed .npz files, named in
+            recording order. Observations aren't copied; each row holds the
+            index of the window the action was taken on, which indexes the
+            market's data.
+
+        Recording into a path that holds chunks resumes it: new chunks and
+            episode numbers follow on from those already stored.
+
+        Columns:
+            episode     run number, counted by reset
+            idx         observation index the action was taken on
+            action      action taken
+            reward      reward returned
+            money       bank after the step
+            position    position after the step; holdings for portfolios
+            done        run ended
+
+        Everything else is passed through to the wrapped market.
+    """
+    chunk_file = 'chunk-{:06d}.npz'
+
+    def __init__(self, env, path, chunk_size=2 ** 16):
+        self.env = env
+        self.path = os.fspath(path)
+        self.chunk_size = chunk_size
+        os.makedirs(self.path, exist_ok=True)
+        chunks = TrajectoryReader(self.path).chunks
+        self.chunks = len(chunks)
+
+        action_shape = env.action_space.shape or ()
+        position_shape = np.shape(self.get_position())
+        self.buffers = {
+            'episode': np.zeros(chunk_size, dtype=np.int64),
+            'idx': np.zeros(chunk_size, dtype=np.int64),
+            'action': np.zeros((chunk_size,) + action_shape),
+            'reward': np.zeros(chunk_size),
+            'money': np.zeros(chunk_size),
+            'position': np.zeros((chunk_size,) + position_shape),
+            'done': np.zeros(chunk_size, dtype=bool),
+        }
+        self.rows = 0
+        self.episode = -1
+        if chunks:  # count on from the last episode recorded
+            with np.load(chunks[-1]) as arrays:
+                self.episode = int(arrays['episode'][-1])
+
+    def __getattr__(self, name):
+        return getattr(self.env, name)
+
+    def get_position(self):
+        holdings = getattr(self.env, 'holdings', None)
+        return self.env.position if holdings is None else holdings
+
+    def reset(self):
+        self.episode += 1
+        return self.env.reset()
+
+    def step(self, action):
+        idx = self.env.idx
+        result = self.env.step(action)
+        self.record(idx, action, result[1], result[2])
+        return result
+
+    def record(self, idx, action, reward, done):
+        """Write one step to the buffers, flushing them when full"""
+        row = self.rows
+        buffers = self.buffers
+        buffers['episode'][row] = self.episode
+        buffers['idx'][row] = idx
+        buffers['action'][row] = action
+        buffers['reward'][row] = reward
+        buffers['money'][row] = self.env.money
+        buffers['position'][row] = self.get_position()
+        buffers['done'][row] = done
+        self.rows += 1
+        if self.rows == self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        """Write buffered steps to the next chunk file"""
+        if not self.rows:
+            return
+        np.savez_compressed(
+            os.path.join(self.path, self.chunk_file.format(self.chunks)),
+            **{name: buffer[:self.rows]
+               for name, buffer in self.buffers.items()}
+        )
+        self.chunks += 1
+        self.rows = 0
+
+    def close(self):
+        self.flush()
+        close = getattr(self.env, 'close', None)
+        if close is not None:
+            close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class TrajectoryReader:
+    """Loads the chunks written by a TrajectoryRecorder
+        load joins every chunk in memory. memmap consolidates the chunks once
+            into one uncompressed .npy file per column, beside the chunks,
+            and opens those read-only with np.memmap.
+    """
+    column_file = '{}.npy'
+
+    def __init__(self, path):
+        self.path = os.fspath(path)
+
+    @property
+    def chunks(self):
+        return sorted(glob.glob(os.path.join(self.path, 'chunk-*.npz')))
+
+    def load(self, columns=None):
+        """Dict of column => array over every recorded step"""
+        parts = {}
+        for chunk in self.chunks:
+            with np.load(chunk) as arrays:
+                for name in arrays.files if columns is None else columns:
+                    parts.setdefault(name, []).append(arrays[name])
+        return {name: np.concatenate(arrays) for name, arrays in parts.items()}
+
+    def consolidate(self):
+        """Write each column to its own .npy file"""
+        for name, values in self.load().items():
+            np.save(os.path.join(self.path, self.column_file.format(name)),
+                    values)
+
+    def memmap(self, columns=None):
+        """Dict of column => read-only memory map over every recorded step"""
+        mapped = {}
+        for name in self._columns() if columns is None else columns:
+            path = os.path.join(self.path, self.column_file.format(name))
+            if not self._is_current(path):
+                self.consolidate()
+            mapped[name] = np.load(path, mmap_mode='r')
+        return mapped
+
+    def _columns(self):
+        chunks = self.chunks
+        if not chunks:
+            return []
+        with np.load(chunks[0]) as arrays:
+            return list(arrays.files)
+
+    def _is_current(self, path):
+        """Test, returning True if path was consolidated after every chunk"""
+        return os.path.exists(path) and all(
+            os.path.getmtime(chunk) <= os.path.getmtime(path)
+            for chunk in self.chunks)
+
+    def episodes(self, columns=None):
+        """Split the recorded steps into a list of runs"""
+        data = self.load(columns)
+        episode = data['episode'] if 'episode' in data else \
+            self.load(['episode'])['episode']
+        splits = np.flatnonzero(np.diff(episode)) + 1
+        return [
+            {name: values[start:end] for name, values in data.items()}
+            for start, end in zip(np.r_[0, splits], np.r_[splits, len(episode)])
+        ]
@@ -0,0 +1,338 @@
+"""Serve markets to remote agents over a local socket"""
+
+import asyncio
+import socket
+import struct
+
+import numpy as np
+
+from stock_gym.envs.stocks.mixins import create_rng
+
+
+# Commands, and the status of their responses
+MAKE, RESET, STEP, SEED, CLOSE = range(5)
+OK, ERROR = range(2)
+
+# command, env id, payload bytes
+REQUEST = struct.Struct('<BII')
+# status, env id, reward, done, payload bytes
+RESPONSE = struct.Struct('<BIdBI')
+
+# Observations and actions travel as little endian float64
+DTYPE = np.dtype('<f8')
+SHAPE_DTYPE = np.dtype('<u4')
+
+
+def pack_shapes(*shapes):
+    """Pack shapes as their length followed by their sizes"""
+    sizes = []
+    for shape in shapes:
+        sizes += [len(shape), *shape]
+    return np.array(sizes, dtype=SHAPE_DTYPE).tobytes()
+
+
+def unpack_shapes(payload):
+    """Unpack the shapes packed by pack_shapes"""
+    sizes = np.frombuffer(payload, dtype=SHAPE_DTYPE).tolist()
+    shapes = []
+    while sizes:
+        length, sizes = sizes[0], sizes[1:]
+        shapes.append(tuple(sizes[:length]))
+        sizes = sizes[length:]
+    return shapes
+
+
+class MarketServer:
+    """Host many markets of one class for agents in other processes
+        Agents connect over TCP, with a (host, port) address, or a Unix
+            socket, with a path, and drive their markets with a binary
+            protocol: each request is a REQUEST header and payload, and is
+            answered by a RESPONSE header and payload.
+
+            MAKE opens a market, answering with its id in the header and the
+                observation and action shapes as the payload.
+            RESET and STEP answer with the observation; STEP is sent the
+                action, and answers with the reward and done flag too.
+            SEED reseeds a market with the uint64 payload.
+            CLOSE returns a market to the pool.
+
+        Requests arriving in the same turn of the event loop are coalesced
+            into one batch. The batch steps each market in turn, through its
+            own step, so any market class can be served; what's batched is
+            the I/O: each connection's responses are sent with one write,
+            and agents pipelining requests for many markets over one
+            connection get one round trip per batch.
+
+        Markets are built with the same data seed, so with cache_data they
+            share one dataset, then reseeded with streams spawned from seed
+            so their episodes differ. Closed markets are kept for reuse, and
+            reopen with the money, position and lots of a new market.
+
+        Connections may only drive the markets they opened.
+    """
+    def __init__(self, market_class, max_envs=4096, seed=None, **kwargs):
+        self.market_class = market_class
+        self.max_envs = max_envs
+        _, self.seed_sequence = create_rng(seed)
+        kwargs.setdefault(
+            'random_seed', int(self.seed_sequence.generate_state(1)[0]))
+        self.kwargs = kwargs
+
+        self.markets = {}  # env id => market
+        self.owners = {}  # env id => writer of the connection that made it
+        self.idle = []  # closed markets, for reuse
+        self.opening = None  # trading state of a new market
+        self.next_id = 0
+
+        self.pending = []  # (writer, command, env id, payload)
+        self.flushing = None
+        self.batches = 0
+        self.requests = 0
+        self.server = None
+        self.connections = {}  # writer => task handling its requests
+
+    async def start(self, address):
+        """Listen on a (host, port) tuple or a Unix socket path"""
+        if isinstance(address, tuple):
+            self.server = await asyncio.start_server(self.handle, *address)
+        else:
+            self.server = await asyncio.start_unix_server(self.handle, address)
+        return self.server
+
+    @property
+    def address(self):
+        """Address the server listens on, with the port bound for port 0"""
+        return self.server.sockets[0].getsockname()
+
+    async def serve(self, address):
+        """Listen on address until cancelled"""
+        await self.start(address)
+        async with self.server:
+            await self.server.serve_forever()
+
+    async def close(self):
+        """Stop listening and drop every connection"""
+        if self.server is not None:
+            self.server.close()
+        for writer in list(self.connections):
+            writer.close()
+        await asyncio.gather(*self.connections.values(),
+                             return_exceptions=True)
+
+    def make(self, owner=None):
+        """Open a market, returning its id"""
+        assert len(self.markets) < self.max_envs, \
+            f"Serving the most markets: {self.max_envs}"
+        if self.idle:
+            market = self.idle.pop()
+            market.restore_trading_state(self.opening)
+        else:
+            market = self.market_class(**self.kwargs)
+            if self.opening is None:
+                self.opening = market.save_trading_state()
+        market.seed(self.seed_sequence.spawn(1)[0])
+        env = self.next_id
+        self.next_id += 1
+        self.markets[env] = market
+        self.owners[env] = owner
+        return env
+
+    def market(self, writer, env):
+        """Market env, if the connection of writer opened it"""
+        if env not in self.owners or self.owners[env] is not writer:
+            raise KeyError(f"Market {env} isn't open on this connection")
+        return self.markets[env]
+
+    def release(self, env):
+        """Close a market, keeping it for reuse"""
+        self.idle.append(self.markets.pop(env))
+        del self.owners[env]
+
+    async def handle(self, reader, writer):
+        """Queue the requests of one connection until it closes"""
+        self.connections[writer] = asyncio.current_task()
+        try:
+            while True:
+                try:
+                    header = await reader.readexactly(REQUEST.size)
+                except asyncio.IncompleteReadError:
+                    break
+                command, env, size = REQUEST.unpack(header)
+                payload = await reader.readexactly(size) if size else b''
+                self.pending.append((writer, command, env, payload))
+                if self.flushing is None:
+                    self.flushing = asyncio.get_running_loop().call_soon(
+                        self.flush)
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            for env, owner in list(self.owners.items()):
+                if owner is writer:
+                    self.release(env)
+            writer.close()
+            self.connections.pop(writer, None)
+
+    def flush(self):
+        """Run the pending batch, then write each connection's responses"""
+        self.flushing = None
+        pending, self.pending = self.pending, []
+        responses = {}
+        for writer, command, env, payload in pending:
+            if writer.is_closing():  # its markets are already released
+                continue
+            responses.setdefault(writer, []).append(
+                self.respond(writer, command, env, payload))
+        for writer, chunks in responses.items():
+            writer.write(b''.join(chunks))
+        self.batches += 1
+        self.requests += len(pending)
+
+    def respond(self, writer, command, env, payload):
+        """Run one request, returning its response"""
+        reward, done, body = 0., False, b''
+        try:
+            if command == MAKE:
+                env = self.make(writer)
+                market = self.markets[env]
+                body = pack_shapes(
+                    np.shape(market.reset()),
+                    market.action_space.shape or ())
+            elif command == RESET:
+                body = self.observe(self.market(writer, env).reset())
+            elif command == STEP:
+                market = self.market(writer, env)
+                action = np.frombuffer(payload, dtype=DTYPE)
+                observation, reward, done, _ = market.step(
+                    float(action[0]) if not market.action_space.shape
+                    else action.reshape(market.action_space.shape))
+                body = self.observe(observation)
+            elif command == SEED:
+                seed, = struct.unpack('<Q', payload)
+                self.market(writer, env).seed(seed)
+            elif command == CLOSE:
+                self.market(writer, env)
+                self.release(env)
+            else:
+                raise ValueError(f"Invalid command: {command}")
+        except Exception as error:
+            body = f"{type(error).__name__}: {error}".encode()
+            return RESPONSE.pack(ERROR, env, 0., False, len(body)) + body
+        return RESPONSE.pack(OK, env, float(np.sum(reward)), bool(done),
+                             len(body)) + body
+
+    @staticmethod
+    def observe(observation):
+        return np.ascontiguousarray(observation, dtype=DTYPE).tobytes()
+
+
+class MarketClient:
+    """Blocking connection to a MarketServer
+        One connection may drive any number of markets. step_many and
+            reset_many send all of their requests before reading a response,
+            so the server runs them as one batch.
+    """
+    def __init__(self, address, timeout=None):
+        if isinstance(address, tuple):
+            self.sock = socket.create_connection(address, timeout=timeout)
+            self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        else:
+            self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self.sock.settimeout(timeout)
+            self.sock.connect(address)
+        self.reader = self.sock.makefile('rb')
+        self.shapes = {}  # env id => (observation shape, action shape)
+
+    def send(self, command, env=0, payload=b''):
+        self.sock.sendall(self.request(command, env, payload))
+
+    @staticmethod
+    def request(command, env=0, payload=b''):
+        return REQUEST.pack(command, env, len(payload)) + payload
+
+    def recv(self):
+        """Read a response, returning its env id, reward, done and payload"""
+        status, env, reward, done, size = RESPONSE.unpack(
+            self._read(RESPONSE.size))
+        payload = self._read(size)
+        if status == ERROR:
+            raise RuntimeError(payload.decode())
+        return env, reward, bool(done), payload
+
+    def _read(self, size):
+        data = self.reader.read(size)
+        if len(data) < size:
+            raise ConnectionError("Server closed the connection")
+        return data
+
+    def observation(self, env, payload):
+        return np.frombuffer(payload, dtype=DTYPE).reshape(self.shapes[env][0])
+
+    def make(self):
+        """Open a market on the server, returning its id"""
+        self.send(MAKE)
+        env, _, _, payload = self.recv()
+        self.shapes[env] = unpack_shapes(payload)
+        return env
+
+    def reset(self, env):
+        return self.reset_many([env])[0]
+
+    def step(self, env, action):
+        observations, rewards, dones = self.step_many([env], [action])
+        return observations[0], rewards[0], dones[0], {}
+
+    def reset_many(self, envs):
+        self.sock.sendall(b''.join(self.request(RESET, env) for env in envs))
+        return [self.observation(env, self.recv()[3]) for env in envs]
+
+    def step_many(self, envs, actions):
+        """Step each of envs with its action, in one batch"""
+        self.sock.sendall(b''.join(
+            self.request(STEP, env, np.asarray(action, dtype=DTYPE).tobytes())
+            for env, action in zip(envs, actions)))
+        observations, rewards, dones = [], [], []
+        for env in envs:
+            _, reward, done, payload = self.recv()
+            observations.append(self.observation(env, payload))
+            rewards.append(reward)
+            dones.append(done)
+        return observations, np.array(rewards), np.array(dones)
+
+    def seed(self, env, seed=None):
+        """Reseed a market, with fresh entropy if seed is None"""
+        if seed is None:
+            seed = int(np.random.SeedSequence().generate_state(1, np.uint64)[0])
+        self.send(SEED, env, struct.pack('<Q', seed))
+        self.recv()
+        return seed
+
+    def close_env(self, env):
+        self.send(CLOSE, env)
+        self.recv()
+        del self.shapes[env]
+
+    def close(self):
+        self.reader.close()
+        self.sock.close()
+
+
+class RemoteMarketEnv:
+    """One market served by a MarketServer, driven like a local market"""
+    def __init__(self, address, timeout=None):
+        self.client = MarketClient(address, timeout=timeout)
+        self.env = self.client.make()
+        self.observation_shape, self.action_shape = \
+            self.client.shapes[self.env]
+
+    def reset(self):
+        return self.client.reset(self.env)
+
+    def step(self, action):
+        return self.client.step(self.env, action)
+
+    def seed(self, seed=None):
+        return [self.client.seed(self.env, seed)]
+
+    def close(self):
+        self.client.close()
@@ -0,0 +1,97 @@
+"""On-disk dataset store for market data"""
+
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+
+class DatasetStore:
+    """Prepared market data written once and memory-mapped by every env
+        A store is a directory holding:
+            values.npy   C-contiguous float64 rows x columns
+            index.npy    int64 nanosecond timestamps, for time indexed data
+            meta.json    column names and index name
+
+        Values are opened read-only with np.memmap, so every env and process
+            reading the same store shares the page cache rather than holding
+            a private copy.
+    """
+    values_file = 'values.npy'
+    index_file = 'index.npy'
+    meta_file = 'meta.json'
+
+    def __init__(self, path):
+        self.path = os.fspath(path)
+        with open(os.path.join(self.path, self.meta_file)) as meta:
+            self.meta = json.load(meta)
+        self.columns = self.meta['columns']
+        self._values = None
+        self._index = None
+
+    @classmethod
+    def open(cls, dataset):
+        """Open a store from a path, passing opened stores through"""
+        return dataset if isinstance(dataset, cls) else cls(dataset)
+
+    @classmethod
+    def write(cls, path, data, columns=None):
+        """Write data (a DataFrame or array) to a store at path"""
+        path = os.fspath(path)
+        os.makedirs(path, exist_ok=True)
+
+        if isinstance(data, pd.DataFrame):
+            columns = list(data.columns) if columns is None else columns
+            index = data.index
+            values = data.to_numpy(dtype=np.float64)
+        else:
+            index = None
+            values = np.asarray(data, dtype=np.float64)
+            if values.ndim == 1:
+                values = values[:, np.newaxis]
+            columns = [f'{ix}' for ix in range(values.shape[1])] \
+                if columns is None else columns
+        np.save(os.path.join(path, cls.values_file),
+                np.ascontiguousarray(values))
+
+        meta = {'columns': list(columns), 'index': None}
+        if isinstance(index, pd.DatetimeIndex):
+            np.save(os.path.join(path, cls.index_file), index.asi8)
+            meta['index'] = index.name or 'timestamp'
+
+        # Metadata goes last; a store without it is incomplete
+        with open(os.path.join(path, cls.meta_file), 'w') as meta_fh:
+            json.dump(meta, meta_fh)
+        return cls(path)
+
+    @property
+    def values(self):
+        """Read-only memory map of the stored values"""
+        if self._values is None:
+            self._values = np.load(
+                os.path.join(self.path, self.values_file), mmap_mode='r')
+        return self._values
+
+    @property
+    def index(self):
+        """Timestamps of the stored rows, or None"""
+        if self._index is None and self.meta['index'] is not None:
+            stamps = np.load(
+                os.path.join(self.path, self.index_file), mmap_mode='r')
+            self._index = pd.DatetimeIndex(
+                stamps.view('M8[ns]'), name=self.meta['index'])
+        return self._index
+
+    def frame(self):
+        """DataFrame over the memory map, without copying the values"""
+        return pd.DataFrame(
+            self.values, index=self.index, columns=self.columns, copy=False)
+
+    def __len__(self):
+        return len(self.values)
+
+
+def is_dataset(data):
+    """Test, returning True if data refers to a DatasetStore"""
+    return isinstance(data, (DatasetStore, str, os.PathLike))
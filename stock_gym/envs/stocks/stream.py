@@ -0,0 +1,154 @@
+"""Streaming market data: tick feeds and incrementally built OHLCV bars"""
+
+import socket
+
+import numpy as np
+import pandas as pd
+from pandas.tseries.frequencies import to_offset
+
+
+def to_nanos(timestamp):
+    """Nanoseconds since the epoch of an int, datetime or string timestamp"""
+    if isinstance(timestamp, (int, np.integer)):
+        return int(timestamp)
+    return pd.Timestamp(timestamp).value
+
+
+def parse_tick(line):
+    """Parse a 'timestamp,price,quantity' line into a tick"""
+    timestamp, price, quantity = line.strip().split(',')
+    timestamp = int(timestamp) if timestamp.isdigit() else timestamp
+    return to_nanos(timestamp), float(price), float(quantity)
+
+
+def frame_feed(ticks):
+    """Yield (timestamp, price, quantity) ticks from a time indexed DataFrame"""
+    yield from zip(
+        ticks.index.asi8.tolist(),
+        ticks['price'].to_numpy(dtype=np.float64).tolist(),
+        ticks['quantity'].to_numpy(dtype=np.float64).tolist(),
+    )
+
+
+def socket_feed(address, timeout=None):
+    """Yield ticks read from a local socket
+        The peer writes one 'timestamp,price,quantity' line per tick, where
+            timestamp is integer nanoseconds or any string pd.Timestamp
+            parses. The feed ends when the peer closes the connection.
+    """
+    with socket.create_connection(address, timeout=timeout) as conn:
+        with conn.makefile('r') as lines:
+            for line in lines:
+                if line.strip():
+                    yield parse_tick(line)
+
+
+class BarBuffer:
+    """Ring buffer of the most recent OHLCV bars, built one tick at a time
+        Each tick updates only the bar it falls in, or opens the next one,
+            so the work per tick is constant. Bars are binned like
+            OHLCVMixin.convert_to_ohlcv: on a frequency grid anchored at
+            midnight, with bars lacking volume carrying the previous close
+            through open, high, low and close.
+
+        Every bar is written twice, capacity rows apart, so the latest bars
+            are always one contiguous slice and windows are views rather
+            than copies. Windows are overwritten as the buffer wraps.
+    """
+    columns = ['open', 'high', 'low', 'close', 'volume']
+
+    def __init__(self, capacity, freq):
+        self.capacity = capacity
+        self.freq = to_offset(freq).nanos
+        self.bars = np.zeros((2 * capacity, len(self.columns)))
+        self.starts = np.zeros(2 * capacity, dtype=np.int64)
+
+        self.count = 0  # Bars built, including the current one
+        self.head = -1  # Row of the current bar
+        self.bin = None  # Grid bin of the current bar
+        self.origin = None
+
+        # The current bar as traded, and the close carried into empty bars
+        self.open = self.high = self.low = self.close = None
+        self.volume = 0
+        self.carry = None
+
+    def __len__(self):
+        return min(self.count, self.capacity)
+
+    def add(self, timestamp, price, quantity):
+        """Add a tick, updating the current bar or opening a new one
+            Late ticks, timestamped before the current bar, are added to it.
+        """
+        timestamp = to_nanos(timestamp)
+        if self.origin is None:
+            self.origin = pd.Timestamp(timestamp).normalize().value
+            self.bin = (timestamp - self.origin) // self.freq
+            self._open(price, quantity)
+            return
+
+        tick_bin = (timestamp - self.origin) // self.freq
+        if tick_bin > self.bin:
+            if self.volume or self.carry is None:
+                self.carry = self.close
+            # Carry the close through skipped bars; at most a buffer's worth
+            skipped = tick_bin - self.bin - 1
+            self.count += skipped - min(skipped, self.capacity)
+            for empty_bin in range(tick_bin - min(skipped, self.capacity),
+                                   tick_bin):
+                self._advance(empty_bin)
+                self._write(self.carry, self.carry, self.carry, self.carry, 0)
+            self._open(price, quantity, tick_bin)
+            return
+
+        self.high = max(self.high, price)
+        self.low = min(self.low, price)
+        self.close = price
+        self.volume += quantity
+        self._write_current()
+
+    def _advance(self, bin_):
+        self.bin = bin_
+        self.head = (self.head + 1) % self.capacity
+        self.count += 1
+        start = self.origin + bin_ * self.freq
+        self.starts[self.head] = self.starts[self.head + self.capacity] = start
+
+    def _open(self, price, quantity, bin_=None):
+        self._advance(self.bin if bin_ is None else bin_)
+        self.open = self.high = self.low = self.close = price
+        self.volume = quantity
+        self._write_current()
+
+    def _write_current(self):
+        if self.volume:
+            self._write(self.open, self.high, self.low, self.close,
+                        self.volume)
+        else:
+            carry = self.close if self.carry is None else self.carry
+            self._write(carry, carry, carry, carry, 0)
+
+    def _write(self, *bar):
+        self.bars[self.head] = self.bars[self.head + self.capacity] = bar
+
+    def latest(self, column='close'):
+        """Value of column in the current bar"""
+        return self.bars[self.head, self.columns.index(column)]
+
+    def window(self, size):
+        """View of the latest size bars, oldest first"""
+        assert size <= len(self), \
+            f"Window of {size} bars exceeds the {len(self)} buffered"
+        end = self.head + self.capacity + 1
+        return self.bars[end - size:end]
+
+    def frame(self, size=None):
+        """DataFrame of the latest size bars, indexed by bar start"""
+        size = len(self) if size is None else size
+        end = self.head + self.capacity + 1
+        return pd.DataFrame(
+            self.window(size).copy(),
+            index=pd.DatetimeIndex(
+                self.starts[end - size:end], name='timestamp'),
+            columns=self.columns,
+        )
@@ -0,0 +1,306 @@
+"""Vectorized environments for trading"""
+
+import multiprocessing
+from multiprocessing import shared_memory
+import os
+
+import numpy as np
+
+from stock_gym.envs.stocks.imarket import ILinearMarketEnv
+from stock_gym.envs.stocks.mixins import create_rng
+
+
+class VecMarketEnv:
+    """Vectorized linear market environment
+        Steps num_envs copies of a linear market (buy, sell, stay) at once.
+            The accounting of each copy matches ILinearMarketEnv.step, but
+            money, position and indices are held as arrays and updated with
+            masked NumPy operations.
+
+        Environments that finish are reset automatically; their final
+            observation is returned in info['terminal_observation']. Unlike
+            ILinearMarketEnv.reset, resetting also returns their money to
+            start_money and closes their position, so an environment that
+            went broke starts its next run trading again.
+    """
+    n_actions = 3  # buy, sell, stay
+
+    def __init__(self, market_class, num_envs=1, **kwargs):
+        assert issubclass(market_class, ILinearMarketEnv), \
+            f"Only linear markets can be vectorized: {market_class.__name__}"
+        self.num_envs = num_envs
+
+        # Build one market to resolve data and parameters
+        market = market_class(**kwargs)
+        self.market = market
+        self.observation_size = market.observation_size
+        self.max_observations = market.max_observations
+        self.total_space_size = market.total_space_size
+        self.fee = market.fee
+        self.start_money = market.money
+        self.reward_multiplier = market.reward_multiplier
+        self.fail_reward = market.fail_reward
+
+        self.prices = np.asarray(market.values, dtype=np.float64)
+        assert self.prices.ndim == 1, \
+            f"Only single variable markets can be vectorized: " \
+            f"{self.prices.shape}"
+        self.windows = np.lib.stride_tricks.sliding_window_view(
+            self.prices, self.observation_size)
+        self.norm_offset = market.norm_offset
+        self.norm_scale = market.norm_scale
+
+        self.action_space = market.action_space
+        self.observation_space = market.observation_space
+
+        self.money = np.full(num_envs, self.start_money, dtype=np.float64)
+        self.position = np.zeros(num_envs, dtype=np.float64)
+        self.idx = np.full(num_envs, -1, dtype=np.int64)
+        self.observed = np.zeros(num_envs, dtype=np.int64)
+
+        self.seed()
+
+    def seed(self, seed=None):
+        self.np_random, sequence = create_rng(seed)
+        return [sequence.entropy]
+
+    def _reset_envs(self, mask):
+        """Reset the pointer and bank of the masked environments"""
+        count = int(np.count_nonzero(mask))
+        self.idx[mask] = self.np_random.integers(
+            self.total_space_size -
+            (self.observation_size + self.max_observations - 2),
+            size=count,
+        )
+        self.observed[mask] = 0
+        self.money[mask] = self.start_money
+        self.position[mask] = 0
+
+    def get_observation(self):
+        """Grab the current window of every environment"""
+        if self.norm_scale is not None:
+            return (self.windows[self.idx] - self.norm_offset[self.idx, None]) \
+                * self.norm_scale[self.idx, None]
+        return self.windows[self.idx]
+
+    def reset(self):
+        self._reset_envs(np.ones(self.num_envs, dtype=bool))
+        return self.get_observation()
+
+    def step(self, actions):
+        actions = np.asarray(actions)
+        assert actions.shape == (self.num_envs,), \
+            f"Invalid Actions shape: {actions.shape}"
+        assert ((actions >= 0) & (actions < self.n_actions)).all(), \
+            f"Invalid Actions: {actions}"
+
+        buy = actions == 0
+        sell = actions == 1
+
+        # calculate price, reward, position, and bank (money)
+        price = self.prices[self.idx + self.observation_size - 1]
+        position = self.position
+
+        # Only invest once at a time, and can't buy if you have no money
+        buy_reward = self.fee \
+            - self.fail_reward * (position > 0) \
+            - np.where(self.money <= 0, self.fail_reward, price)
+
+        # Can't sell if you aren't vested
+        returns = np.where(position <= 0, -1 * self.fail_reward,
+                           price - position)
+        sell_reward = self.fee + (position + returns)
+
+        reward = np.select([buy, sell], [buy_reward, sell_reward], self.fee)
+        self.money = self.money + reward
+        self.position = np.where(buy, position + price,
+                                 np.where(sell, 0, position))
+        reward = np.where(sell, reward * self.reward_multiplier, reward)
+
+        # End if we're out of money
+        done = self.money <= 0
+
+        # Prep index for next observation or end run if we're out of time
+        moving = self.observed != self.max_observations - 1
+        self.observed += moving
+        self.idx += moving
+        done |= ~moving
+
+        info = {}
+        if done.any():
+            info['terminal_observation'] = self.get_observation()
+            self._reset_envs(done)
+
+        return (
+            self.get_observation(),
+            reward,
+            done,
+            info,
+        )
+
+
+def _market_worker(conn, market_class, kwargs, envs):
+    """Step a slice of markets, exchanging data through shared memory
+        Sends the spaces and observation shape of its markets, then attaches
+            the shared buffers the parent sends back.
+    """
+    markets = [market_class(**kwargs) for _ in envs]
+    opening = [market.save_trading_state() for market in markets]
+    conn.send((markets[0].action_space, markets[0].observation_space,
+               np.asarray(markets[0].reset()).shape))
+
+    buffers = conn.recv()
+    shms = [shared_memory.SharedMemory(name=name) for name, _, _ in buffers]
+    observations, rewards, dones, actions = [
+        np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+        for shm, (_, shape, dtype) in zip(shms, buffers)
+    ]
+    cast = float if actions.ndim == 1 else np.array
+
+    try:
+        while True:
+            command, arg = conn.recv()
+            if command == 'step':
+                for ix, market, state in zip(envs, markets, opening):
+                    observation, rewards[ix], dones[ix], _ = \
+                        market.step(cast(actions[ix]))
+                    if dones[ix]:
+                        market.restore_trading_state(state)
+                        observation = market.reset()
+                    observations[ix] = observation
+            elif command == 'reset':
+                for ix, market in zip(envs, markets):
+                    observations[ix] = market.reset()
+            elif command == 'seed':
+                for ix, market in zip(envs, markets):
+                    market.seed(arg[ix])
+            elif command == 'close':
+                break
+            conn.send(None)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        del observations, rewards, dones, actions
+        for shm in shms:
+            shm.close()
+        conn.close()
+
+
+class SubprocMarketVecEnv:
+    """Markets stepped in parallel worker processes
+        num_envs markets of market_class are split across num_workers
+            processes. Actions, observations, rewards and done flags live in
+            shared memory; the parent and workers only exchange short commands
+            over pipes.
+
+        Environments that finish are reset automatically, with the money,
+            position and lots they started with, and the observation
+            returned for them starts their next run.
+
+        The arrays returned by reset and step are the shared buffers
+            themselves and are overwritten by the next call.
+
+        Every market generates its data from one seed, drawn from seed
+            unless random_seed is given, and is then seeded with its own
+            stream spawned from seed, so seeded runs are reproducible.
+    """
+    def __init__(self, market_class, num_envs=1, num_workers=None,
+                 context=None, seed=None, **kwargs):
+        self.num_envs = num_envs
+        _, sequence = create_rng(seed)
+        kwargs.setdefault(
+            'random_seed', int(sequence.generate_state(1)[0]))
+        num_workers = os.cpu_count() if num_workers is None else num_workers
+        self.num_workers = max(1, min(num_workers, num_envs))
+
+        ctx = multiprocessing.get_context(context)
+        self._conns = []
+        self._processes = []
+        for envs in np.array_split(np.arange(num_envs), self.num_workers):
+            parent_conn, child_conn = ctx.Pipe()
+            process = ctx.Process(
+                target=_market_worker,
+                args=(child_conn, market_class, kwargs, envs.tolist()),
+                daemon=True,
+            )
+            process.start()
+            child_conn.close()
+            self._conns.append(parent_conn)
+            self._processes.append(process)
+
+        # Workers report the spaces and buffer shapes of their markets
+        self.action_space, self.observation_space, observation_shape = \
+            [conn.recv() for conn in self._conns][0]
+        action_shape = self.action_space.shape or ()
+
+        buffers = [
+            ('observations', (num_envs,) + observation_shape, np.float64),
+            ('rewards', (num_envs,), np.float64),
+            ('dones', (num_envs,), np.bool_),
+            ('actions', (num_envs,) + action_shape, np.float64),
+        ]
+        self._shms = []
+        shared = []
+        for name, shape, dtype in buffers:
+            size = max(1, int(np.prod(shape)) * np.dtype(dtype).itemsize)
+            shm = shared_memory.SharedMemory(create=True, size=size)
+            self._shms.append(shm)
+            shared.append((shm.name, shape, dtype))
+            setattr(self, name, np.ndarray(shape, dtype=dtype, buffer=shm.buf))
+        for conn in self._conns:
+            conn.send(shared)
+        self.closed = False
+        self.seed(sequence)
+
+    def _command(self, command, arg=None):
+        for conn in self._conns:
+            conn.send((command, arg))
+        for conn in self._conns:
+            conn.recv()
+
+    def seed(self, seed=None):
+        """Seed each market with its own stream, spawned from seed
+            Data is generated when markets are built, so this varies only
+            what they draw while running, such as episode starts.
+            Returns the spawned SeedSequences.
+        """
+        _, sequence = create_rng(seed)
+        sequences = sequence.spawn(self.num_envs)
+        self._command('seed', sequences)
+        return sequences
+
+    def reset(self):
+        self._command('reset')
+        return self.observations
+
+    def step(self, actions):
+        self.actions[...] = np.reshape(actions, self.actions.shape)
+        self._command('step')
+        return (
+            self.observations,
+            self.rewards,
+            self.dones,
+            {},
+        )
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        for conn in self._conns:
+            try:
+                conn.send(('close', None))
+            except (BrokenPipeError, EOFError):
+                pass
+        for process in self._processes:
+            process.join()
+        for conn in self._conns:
+            conn.close()
+        del self.observations, self.rewards, self.dones, self.actions
+        for shm in self._shms:
+            shm.close()
+            shm.unlink()
+
+    def __del__(self):
+        if not getattr(self, 'closed', True):
+            self.close()
@@ -0,0 +1,113 @@
+"""Parallel rollouts of registered stock_gym environments"""
+
+import importlib
+import multiprocessing
+import time
+
+import numpy as np
+
+from gym.envs.registration import load, registry
+
+from stock_gym.envs import stocks  # noqa: F401, registers the environments
+
+
+def load_policy(policy):
+    """Resolve a policy: 'random', or 'module:function' called with
+        (observation, env) and returning an action"""
+    if policy == 'random':
+        return lambda observation, env: env.action_space.sample()
+    module, _, name = policy.partition(':')
+    return getattr(importlib.import_module(module), name)
+
+
+def run_episodes(env_id, episodes, steps=1000, seed=None, policy='random',
+                 worker=0, **kwargs):
+    """Run episodes of env_id, each ending when done or after steps steps"""
+    # Generate the data from seed too, so seeded runs trade the same data
+    kwargs.setdefault('random_seed', seed)
+    market = load(registry[env_id].entry_point)(**kwargs)
+    market.seed(seed)
+    # Sample actions from a stream of their own, spawned from the market's
+    action_seed, = market.seed_sequence.spawn(1)
+    market.action_space.seed(int(action_seed.generate_state(1)[0]))
+    act = load_policy(policy)
+    # Every episode starts with the money of a new market
+    state = market.save_trading_state()
+
+    rewards = []
+    lengths = []
+    start = time.perf_counter()
+    for _ in range(episodes):
+        market.restore_trading_state(state)
+        observation = market.reset()
+        total = 0.
+        for step in range(1, steps + 1):
+            observation, reward, done, info = market.step(
+                act(observation, market))
+            total += float(np.sum(reward))
+            if done:
+                break
+        rewards.append(total)
+        lengths.append(step)
+    seconds = time.perf_counter() - start
+
+    return {
+        'worker': worker,
+        'episodes': episodes,
+        'steps': sum(lengths),
+        'seconds': seconds,
+        'steps_per_second': sum(lengths) / seconds if seconds else 0.,
+        'rewards': rewards,
+    }
+
+
+def _run_episodes(args):
+    args, kwargs = args
+    return run_episodes(*args, **kwargs)
+
+
+def run(env_id, episodes=20, steps=1000, workers=1, seed=0, policy='random',
+        context=None, **kwargs):
+    """Split episodes across worker processes and report throughput
+        Each worker runs its share of the episodes seeded with its own
+        stream, spawned from seed.
+        Returns a machine readable report, suitable for json.dump.
+    """
+    workers = max(1, min(workers, episodes))
+    sequences = np.random.SeedSequence(seed).spawn(workers)
+    jobs = [
+        ((env_id, len(share), steps, sequences[worker], policy, worker),
+         kwargs)
+        for worker, share in enumerate(
+            np.array_split(np.arange(episodes), workers))
+    ]
+
+    start = time.perf_counter()
+    if workers == 1:
+        results = [_run_episodes(jobs[0])]
+    else:
+        ctx = multiprocessing.get_context(context)
+        with ctx.Pool(workers) as pool:
+            results = pool.map(_run_episodes, jobs)
+    seconds = time.perf_counter() - start
+
+    rewards = np.array([reward for result in results
+                        for reward in result.pop('rewards')])
+    total_steps = sum(result['steps'] for result in results)
+    return {
+        'env_id': env_id,
+        'policy': policy,
+        'episodes': episodes,
+        'workers': workers,
+        'seed': seed,
+        'steps': total_steps,
+        'seconds': seconds,
+        'steps_per_second': total_steps / seconds,
+        'reward': {
+            'mean': float(rewards.mean()),
+            'std': float(rewards.std()),
+            'min': float(rewards.min()),
+            'max': float(rewards.max()),
+        },
+        'worker_results': results,
+    }
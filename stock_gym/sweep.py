@@ -0,0 +1,142 @@
+"""Parameter sweeps of registered stock_gym environments over shared data"""
+
+import itertools
+import json
+import multiprocessing
+import os
+import tempfile
+
+import numpy as np
+
+from gym.envs.registration import load, registry
+
+from stock_gym.envs.stocks.mixins import collect
+from stock_gym.envs.stocks.store import DatasetStore
+from stock_gym.rollout import run_episodes
+
+
+SHARED_MEMORY = '/dev/shm'
+
+# The data of the sweep, opened once per worker process
+_dataset = {}
+
+
+def expand_grid(grid):
+    """Every combination of a {param: [values]} grid, as a list of dicts"""
+    names = list(grid)
+    return [dict(zip(names, values))
+            for values in itertools.product(*(grid[name] for name in names))]
+
+
+def parse_param(spec):
+    """Parse 'name=value,value,...' into the name and its values
+        Values are read as JSON where they parse, and as strings otherwise.
+    """
+    name, _, values = spec.partition('=')
+    assert name and values, f"Invalid param: {spec}"
+    parsed = []
+    for value in values.split(','):
+        try:
+            parsed.append(json.loads(value))
+        except ValueError:
+            parsed.append(value)
+    return name, parsed
+
+
+def write_dataset(market, path):
+    """Store a market's data at path, returning how to load it back
+        Tables keep their columns and index; single variable data is
+            stored as one price column and loaded back as a series.
+    """
+    data = market.data
+    assert getattr(data, 'ndim', 2) <= 2, \
+        f"Only series and tables can be swept: {np.shape(data)}"
+    if getattr(data, 'ndim', 2) == 1:
+        DatasetStore.write(path, data, columns=[market.price_column])
+        return 'series'
+    DatasetStore.write(path, data)
+    return 'frame' if hasattr(data, 'columns') else 'array'
+
+
+def open_dataset(path, kind):
+    """Memory-map the data written by write_dataset, without copying it"""
+    store = DatasetStore.open(path)
+    if kind == 'frame':
+        return store.frame()
+    return store.values[:, 0] if kind == 'series' else store.values
+
+
+def _init_worker(path, kind):
+    _dataset['data'] = open_dataset(path, kind)
+
+
+def _run_config(args):
+    index, config, env_id, episodes, steps, seed, policy, kwargs = args
+    result = run_episodes(env_id, episodes, steps=steps, seed=seed,
+                          policy=policy, worker=index, data=_dataset['data'],
+                          **kwargs, **config)
+    rewards = np.array(result['rewards'])
+    return {
+        'config': index,
+        **config,
+        'episodes': episodes,
+        'steps': result['steps'],
+        'seconds': result['seconds'],
+        'steps_per_second': result['steps_per_second'],
+        'reward_mean': float(rewards.mean()),
+        'reward_std': float(rewards.std()),
+        'reward_min': float(rewards.min()),
+        'reward_max': float(rewards.max()),
+    }
+
+
+def sweep(env_id, grid, episodes=10, steps=1000, workers=1, seed=0,
+          policy='random', dataset=None, context=None, **kwargs):
+    """Run episodes of env_id for every configuration of grid
+        The data is built once, by a market of env_id made with kwargs, and
+            written to a DatasetStore in shared memory, or read from the
+            store at dataset. Worker processes memory-map it once, then
+            build a market for each configuration over the same pages.
+
+        grid maps configurables, such as fee or observation_size, to the
+            values to try. Data generation parameters can't be swept, as
+            every configuration shares one dataset. Each configuration is
+            run from the same seed, so they see the same episode starts.
+
+        Yields one row of metrics per configuration as it finishes.
+    """
+    market_class = load(registry[env_id].entry_point)
+    configurables = market_class.get_configurables()
+    generation = collect(market_class, 'generation_params')
+    for name in grid:
+        assert name in configurables, f"Invalid param: {name}"
+        assert name not in generation, \
+            f"Can't sweep {name}, configurations share their data"
+    configs = expand_grid(grid)
+    kwargs.setdefault('random_seed', seed)
+    workers = max(1, min(workers, len(configs)))
+    jobs = [(index, config, env_id, episodes, steps,
+             np.random.SeedSequence(seed), policy, kwargs)
+            for index, config in enumerate(configs)]
+
+    with tempfile.TemporaryDirectory(
+            prefix='stock_gym-sweep-',
+            dir=SHARED_MEMORY if os.path.isdir(SHARED_MEMORY) else None) \
+            as tmp:
+        kind = 'frame'
+        if dataset is None:
+            dataset = os.path.join(tmp, 'data')
+            kind = write_dataset(market_class(**kwargs), dataset)
+
+        if workers == 1:
+            _init_worker(dataset, kind)
+            try:
+                yield from map(_run_config, jobs)
+            finally:
+                _dataset.clear()
+            return
+
+        ctx = multiprocessing.get_context(context)
+        with ctx.Pool(workers, initializer=_init_worker,
+                      initargs=(dataset, kind)) as pool:
+            yield from pool.imap_unordered(_run_config, jobs)
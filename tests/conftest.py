@@ -9,7 +9,9 @@ import pandas as pd
 from stock_gym.envs.stocks.mixins import MarketEnvBase
 from stock_gym.envs.stocks.imarket import \
         IContinuousLinearMarketEnv, IContinuousOHLCVMarketEnv, \
-        IOHLCVMarketEnv, ILinearMarketEnv
+        IOHLCVMarketEnv, ILinearMarketEnv, IStreamingOHLCVMarketEnv, \
+        IPortfolioMarketEnv
+from stock_gym.envs.stocks.vector import VecMarketEnv
 
 
 #####
@@ -52,12 +54,34 @@ def create_i_cont_ohlcv_market_env(create_market):
         return create_market(IContinuousOHLCVMarketEnv, kwargs)
     return _create_market
 
-## IOHLCVMarketEnv
-#@pytest.fixture
-#def create_i_cont_ohlcv_market_env(create_market):
-#    def _create_market(kwargs=None):
-#        return create_market(IOHLCVMarketEnv, kwargs)
-#    return _create_market
+# VecMarketEnv
+@pytest.fixture
+def create_vec_market_env():
+    def _create_market(num_envs, kwargs=None):
+        kwargs = {} if kwargs is None else kwargs
+        return VecMarketEnv(ILinearMarketEnv, num_envs, **kwargs)
+    return _create_market
+
+# IOHLCVMarketEnv
+@pytest.fixture
+def create_i_ohlcv_market_env(create_market):
+    def _create_market(kwargs=None):
+        return create_market(IOHLCVMarketEnv, kwargs)
+    return _create_market
+
+# IStreamingOHLCVMarketEnv
+@pytest.fixture
+def create_i_streaming_ohlcv_market_env(create_market):
+    def _create_market(kwargs=None):
+        return create_market(IStreamingOHLCVMarketEnv, kwargs)
+    return _create_market
+
+# IPortfolioMarketEnv
+@pytest.fixture
+def create_i_portfolio_market_env(create_market):
+    def _create_market(kwargs=None):
+        return create_market(IPortfolioMarketEnv, kwargs)
+    return _create_market
 
 
 #####
@@ -28,7 +28,7 @@ TEST_NOT_INC_PARAMS = {  # Don't allow for any increments
 # RESET
 def test_reset_to_zero(create_i_cont_ohlcv_market_env):
     mkt = create_i_cont_ohlcv_market_env(TEST_INC_PARAMS)
-    assert_frame_equal(mkt.reset(), mkt.get_observation())
+    np.testing.assert_array_equal(mkt.reset(), mkt.get_observation())
     assert mkt.idx == 0
 
 # LAST STEP
@@ -43,7 +43,7 @@ def test_observation_on_step_buy(create_i_cont_ohlcv_market_env):
     mkt = create_i_cont_ohlcv_market_env(TEST_INC_PARAMS)
     mkt.idx = 0
     (observation, reward, done, info) = mkt.step(0.1)
-    assert_frame_equal(observation, mkt.data[1:])
+    np.testing.assert_array_equal(observation, mkt.data[1:].values)
 
 # CALCULATE_RETURNS CALL
 def test_calculate_returns_on_sell(create_i_cont_ohlcv_market_env):
@@ -159,3 +159,54 @@ def test_money_on_step_no_act(create_i_cont_ohlcv_market_env):
     mkt.money = 3.14
     (observation, reward, done, info) = mkt.step(0)
     assert mkt.money == 3.14 + reward
+
+# EVALUATE
+def step_episode(mkt, amounts):
+    """Step amounts one at a time, as evaluate should in one pass"""
+    rewards, money, position, vested, done = [], [], [], [], False
+    for amount in np.ravel(amounts).tolist():
+        _, reward, done, _ = mkt.step(amount)
+        rewards.append(reward)
+        money.append(mkt.money)
+        position.append(mkt.position)
+        vested.append(mkt.vested)
+        if done:
+            break
+    return rewards, money, position, vested, done
+
+@pytest.mark.parametrize('accounting', ['highest', 'lifo', 'fifo', 'average'])
+@pytest.mark.parametrize('seed', range(3))
+def test_evaluate_matches_steps(create_i_cont_linear_market_env, accounting,
+                                seed):
+    mkt = create_i_cont_linear_market_env({
+        'max_observations': 24,
+        'observation_size': 4,
+        'total_space_size': 40,
+        'data': np.linspace(.1, 1., 40),
+        'accounting': accounting,
+    })
+    rng = np.random.default_rng(seed)
+    amounts = rng.choice([-2, -1, 0, 1, 2], size=(30, 1)) * rng.random((30, 1))
+    mkt.money = rng.choice([.5, 1, 100])
+    mkt.bids = {.05: 1}
+    mkt.position = 1
+    mkt.vested = .05
+    mkt.reset()
+    result = mkt.evaluate(amounts)
+    assert dict(mkt.bids) == {.05: 1}  # the market is untouched
+
+    rewards, money, position, vested, done = step_episode(mkt, amounts)
+    assert result['steps'] == len(rewards)
+    assert result['done'] == done
+    np.testing.assert_allclose(result['rewards'], rewards)
+    np.testing.assert_allclose(result['money'], money)
+    np.testing.assert_allclose(result['position'], position)
+    np.testing.assert_allclose(result['vested'], vested)
+
+def test_evaluate_ohlcv(create_i_cont_ohlcv_market_env):
+    mkt = create_i_cont_ohlcv_market_env(TEST_INC_PARAMS)
+    mkt.idx = 0
+    result = mkt.evaluate([.1, -.1, .1])
+    assert result['steps'] == 2
+    assert result['done']
+    assert result['position'].tolist() == [.1, 0]
@@ -156,3 +156,10 @@ def test_money_on_step_no_act(create_i_cont_linear_market_env):
     mkt.money = 3.14
     (observation, reward, done, info) = mkt.step(0)
     assert mkt.money == 3.14 + reward
+
+# GENERATED OHLCV
+def test_get_price_generated(create_i_cont_ohlcv_market_env):
+    mkt = create_i_cont_ohlcv_market_env({'total_space_size': 256})
+    mkt.reset()
+    assert mkt.get_price() == \
+        mkt.data.close.iloc[mkt.idx + mkt.observation_size - 1]
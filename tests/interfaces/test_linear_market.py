@@ -1,5 +1,7 @@
 import pytest
 
+import numpy as np
+
 
 TEST_INC_PARAMS = {  # Allow for 1 increment
     'max_observations': 2,
@@ -23,7 +25,7 @@ TEST_NOT_INC_PARAMS = {  # Don't allow for any increments
 # RESET
 def test_reset_to_zero(create_i_linear_market_env):
     mkt = create_i_linear_market_env(TEST_INC_PARAMS)
-    assert mkt.reset() == mkt.get_observation()
+    assert (mkt.reset() == mkt.get_observation()).all()
     assert mkt.idx == 0
 
 # LAST STEP
@@ -38,7 +40,7 @@ def test_observation_on_step_buy(create_i_linear_market_env):
     mkt = create_i_linear_market_env(TEST_INC_PARAMS)
     mkt.idx = 0
     (observation, reward, done, info) = mkt.step(0)
-    assert observation == mkt.data[1:]
+    assert (observation == mkt.data[1:]).all()
 
 # REWARD
 def test_reward_on_step_buy(create_i_linear_market_env):
@@ -111,3 +113,62 @@ def test_money_on_step_no_act(create_i_linear_market_env):
     (observation, reward, done, info) = mkt.step(2)
     assert mkt.money == 3.14 + reward
 
+
+# OBSERVATION SPACE
+def test_observation_space(create_i_linear_market_env):
+    mkt = create_i_linear_market_env(TEST_INC_PARAMS)
+    assert mkt.observation_space.shape == (4,)
+
+# EVALUATE
+def step_episode(mkt, actions):
+    """Step actions one at a time, as evaluate should in one pass"""
+    rewards, money, position, done = [], [], [], False
+    for action in actions:
+        _, reward, done, _ = mkt.step(action)
+        rewards.append(reward)
+        money.append(mkt.money)
+        position.append(mkt.position)
+        if done:
+            break
+    return rewards, money, position, done
+
+@pytest.mark.parametrize('seed', range(5))
+def test_evaluate_matches_steps(create_i_linear_market_env, seed):
+    data = np.linspace(.1, 1., 40)
+    mkt = create_i_linear_market_env({
+        'max_observations': 24, 'observation_size': 4,
+        'total_space_size': 40, 'data': data})
+    rng = np.random.default_rng(seed)
+    actions = rng.integers(3, size=30)
+    mkt.money = rng.choice([.05, 1, 100])
+    mkt.reset()
+    result = mkt.evaluate(actions)
+    assert mkt.observed == 0  # the market is untouched
+
+    rewards, money, position, done = step_episode(mkt, actions)
+    assert result['steps'] == len(rewards)
+    assert result['done'] == done
+    np.testing.assert_allclose(result['rewards'], rewards)
+    np.testing.assert_allclose(result['money'], money)
+    np.testing.assert_allclose(result['position'], position, atol=1e-12)
+
+def test_evaluate_start_idx(create_i_linear_market_env):
+    data = np.linspace(.1, 1., 10)
+    mkt = create_i_linear_market_env({
+        'max_observations': 4, 'observation_size': 4,
+        'total_space_size': 10, 'data': data})
+    result = mkt.evaluate([0, 2, 1], start_idx=2)
+    assert result['steps'] == 3
+    assert not result['done']
+    buy, sell = data[5], data[7]
+    assert result['rewards'][0] == pytest.approx(mkt.fee - buy)
+    assert result['position'].tolist() == [buy, buy, 0]
+    assert result['rewards'][2] == \
+        pytest.approx(mkt.reward_multiplier * (mkt.fee + sell))
+
+def test_evaluate_ends_on_last_step(create_i_linear_market_env):
+    mkt = create_i_linear_market_env(TEST_INC_PARAMS)
+    mkt.idx = 0
+    result = mkt.evaluate([2, 2, 2])
+    assert result['steps'] == 2
+    assert result['done']
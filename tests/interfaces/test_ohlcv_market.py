@@ -0,0 +1,213 @@
+import pytest
+import pandas as pd
+import numpy as np
+
+from pandas.testing import assert_frame_equal
+
+
+def get_ticks(length, seed=0, freq='7S'):
+    rng = np.random.default_rng(seed)
+    prices = .1 * np.cumprod(1 + rng.uniform(-.1, .1, length))
+    quantity = rng.random(length)
+    quantity[rng.random(length) < .2] = 0  # bars without volume
+    index = pd.date_range('1/1/2018', periods=length, freq=freq) + \
+        pd.to_timedelta(rng.integers(0, 60, length).cumsum(), unit='S')
+    return pd.DataFrame(
+        {'price': prices, 'quantity': quantity},
+        index=pd.DatetimeIndex(index, name='timestamp'),
+    )
+
+
+def convert_rowwise(ticks, freq):
+    """Reference bar builder, forward filling one row at a time"""
+    ohlc = ticks['price'].resample(freq).ohlc()
+    volume = ticks['quantity'].resample(freq).sum().fillna(0)
+    ohlcv = pd.concat([ohlc, volume], axis=1)
+    ohlcv.columns = ['open', 'high', 'low', 'close', 'volume']
+
+    lastrow = ohlcv.iloc[0].copy()
+    rows = []
+    for _, row in ohlcv.iterrows():
+        row = row.copy()
+        if row.volume == 0:
+            row.open = lastrow.close
+            row.high = lastrow.close
+            row.low = lastrow.close
+            row.close = lastrow.close
+        lastrow = row
+        rows.append(row)
+    return pd.DataFrame(rows, index=ohlcv.index)
+
+
+#####
+# Positive test cases
+###
+
+# CONVERSION
+def test_convert_matches_rowwise(create_i_ohlcv_market_env):
+    ticks = get_ticks(2000)
+    mkt = create_i_ohlcv_market_env({'data': ticks.copy()})
+    assert_frame_equal(mkt.data, convert_rowwise(ticks, mkt.ohclv_freq),
+                       check_freq=False)
+    assert list(mkt.data.columns) == ['open', 'high', 'low', 'close', 'volume']
+
+def test_convert_unsorted_ticks(create_i_ohlcv_market_env):
+    ticks = get_ticks(1000, seed=2)
+    mkt = create_i_ohlcv_market_env({'data': ticks.sample(frac=1)})
+    assert_frame_equal(mkt.data, convert_rowwise(ticks, mkt.ohclv_freq),
+                       check_freq=False)
+
+def test_convert_fills_empty_bars(create_i_ohlcv_market_env):
+    ticks = get_ticks(2000, seed=1, freq='40S')
+    mkt = create_i_ohlcv_market_env({'data': ticks})
+    empty = mkt.data[mkt.data.volume == 0]
+    assert len(empty)
+    assert not mkt.data.isna().any().any()
+    previous = mkt.data.close.shift(1)[mkt.data.volume == 0]
+    assert (empty.open == previous).all()
+    assert (empty.high == previous).all()
+    assert (empty.low == previous).all()
+    assert (empty.close == previous).all()
+
+def test_convert_keeps_raw_data(create_i_ohlcv_market_env):
+    ticks = get_ticks(500)
+    mkt = create_i_ohlcv_market_env({'data': ticks})
+    assert len(mkt.raw_data) == 500
+    assert mkt.raw_data.quantity.sum() == mkt.data.volume.sum()
+
+# SIZES
+def test_sizes_fit_bars(create_i_ohlcv_market_env):
+    ticks = get_ticks(20)
+    mkt = create_i_ohlcv_market_env({
+        'data': ticks,
+        'observation_size': 64,
+        'max_observations': 128,
+    })
+    assert mkt.total_space_size == len(mkt.data)
+    assert mkt.observation_size <= mkt.total_space_size
+    assert mkt.max_observations <= mkt.total_space_size
+
+# TIME INDEX
+def test_time_index_added(create_i_ohlcv_market_env):
+    ticks = get_ticks(500).reset_index(drop=True)
+    mkt = create_i_ohlcv_market_env({'data': ticks})
+    assert isinstance(mkt.raw_data.index, pd.DatetimeIndex)
+    assert mkt.raw_data.index.is_monotonic_increasing
+    assert len(mkt.raw_data) == 500
+
+# PRICE ONLY
+def test_price_data_not_converted(create_i_ohlcv_market_env):
+    data = pd.DataFrame({'price': [.1, .2, .3, .4, .5]})
+    mkt = create_i_ohlcv_market_env({'data': data})
+    assert mkt.raw_data is None
+    assert_frame_equal(mkt.data, data)
+
+# GENERATION
+def test_generate_data_reproducible(create_i_ohlcv_market_env):
+    mkt = create_i_ohlcv_market_env({'total_space_size': 256})
+    mkt.seed(7)
+    data = mkt._generate_data(1000)
+    mkt.seed(7)
+    assert_frame_equal(mkt._generate_data(1000), data)
+    mkt.seed(8)
+    assert not mkt._generate_data(1000).equals(data)
+
+def test_generate_data_bounds(create_i_ohlcv_market_env):
+    mkt = create_i_ohlcv_market_env({'total_space_size': 256})
+    data = mkt._generate_data(1000)
+    assert list(data.columns) == ['price', 'quantity']
+    moves = data.price / data.price.shift(1, fill_value=mkt.start_price) - 1
+    assert (moves.abs() <= mkt.volitility + 1e-12).all()
+    assert (data.quantity >= 0).all()
+
+def test_generated_bars(create_i_ohlcv_market_env):
+    mkt = create_i_ohlcv_market_env({'total_space_size': 256})
+    assert len(mkt.raw_data) == round(1.75 * 256)
+    assert mkt.raw_data.index.is_monotonic_increasing
+    assert list(mkt.data.columns) == ['open', 'high', 'low', 'close', 'volume']
+    assert mkt.total_space_size == len(mkt.data)
+    assert mkt.price_column == 'close'
+
+def test_price_from_values(create_i_cont_ohlcv_market_env):
+    mkt = create_i_cont_ohlcv_market_env({'data': get_ticks(500)})
+    assert mkt.price_index == 3
+    mkt.reset()
+    assert mkt.get_price() == \
+        mkt.data.close.iloc[mkt.idx + mkt.observation_size - 1]
+
+# PYRAMID
+def test_pyramid_levels_match_resample(create_i_ohlcv_market_env):
+    mkt = create_i_ohlcv_market_env({
+        'data': get_ticks(2000), 'ohlcv_levels': ['5min', '1H']})
+    assert len(mkt.pyramid) == 2
+    for level, bars in zip(mkt.ohlcv_levels, mkt.pyramid):
+        expected = mkt.data.resample(level).agg({
+            'open': 'first', 'high': 'max', 'low': 'min', 'close': 'last',
+            'volume': 'sum'})
+        np.testing.assert_allclose(
+            bars[mkt.observation_size:], expected.to_numpy())
+
+def test_pyramid_observation(create_i_ohlcv_market_env):
+    mkt = create_i_ohlcv_market_env({
+        'data': get_ticks(2000), 'observation_size': 8,
+        'ohlcv_levels': ['5min']})
+    assert mkt.observation_space.shape == (8, 10)
+    assert mkt.n_features == 10
+    observation = mkt.reset()
+    assert observation.shape == (8, 10)
+    np.testing.assert_array_equal(
+        observation[:, :5],
+        mkt.values[mkt.idx:mkt.idx + mkt.observation_size])
+
+    # Only level bars closed by the latest base bar are observed
+    last = mkt.data.index[mkt.idx + mkt.observation_size - 1]
+    freq = pd.Timedelta('5min')
+    closed = mkt.data[:last].resample('5min').agg({
+        'open': 'first', 'high': 'max', 'low': 'min', 'close': 'last',
+        'volume': 'sum'})
+    if last + pd.Timedelta(mkt.ohclv_freq) < closed.index[-1] + freq:
+        closed = closed.iloc[:-1]
+    closed = closed.iloc[-8:]
+    np.testing.assert_allclose(observation[-len(closed):, 5:],
+                               closed.to_numpy())
+
+def test_pyramid_pads_start(create_i_ohlcv_market_env):
+    mkt = create_i_ohlcv_market_env({
+        'data': get_ticks(2000), 'observation_size': 4,
+        'ohlcv_levels': ['1H']})
+    mkt.idx = 0
+    observation = mkt.get_observation()
+    first = mkt.data.open.iloc[0]
+    assert (observation[:, 5:9] == first).all()
+    assert (observation[:, 9] == 0).all()
+
+def test_pyramid_level_not_multiple(create_i_ohlcv_market_env):
+    with pytest.raises(AssertionError):
+        create_i_ohlcv_market_env({
+            'data': get_ticks(500), 'ohlcv_levels': ['45S']})
+
+def test_pyramid_normalized(create_i_ohlcv_market_env):
+    mkt = create_i_ohlcv_market_env({
+        'data': get_ticks(2000), 'observation_size': 8,
+        'ohlcv_levels': ['5min'], 'normalize': 'pct_change'})
+    mkt.reset()
+    observation = mkt.get_observation()
+    np.testing.assert_allclose(observation[0, :4], 0, atol=1e-12)
+    # Levels are normalized by their own first bar
+    last = mkt.idx + mkt.observation_size - 1
+    start = mkt.level_starts[0][last]
+    bars = mkt.pyramid[0][start:start + 8]
+    scale = np.divide(1, bars[0], out=np.zeros(5), where=bars[0] != 0)
+    np.testing.assert_allclose(observation[:, 5:], (bars - bars[0]) * scale)
+
+def test_pyramid_minmax_bounds(create_i_ohlcv_market_env):
+    mkt = create_i_ohlcv_market_env({
+        'data': get_ticks(2000), 'observation_size': 8,
+        'ohlcv_levels': ['5min', '1H'], 'normalize': 'minmax'})
+    space = mkt.observation_space
+    for idx in range(0, mkt.total_space_size - mkt.observation_size, 7):
+        mkt.idx = idx
+        observation = mkt.get_observation()
+        assert observation.shape == space.shape
+        assert (observation >= space.low - 1e-9).all()
+        assert (observation <= space.high + 1e-9).all()
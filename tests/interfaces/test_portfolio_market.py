@@ -0,0 +1,142 @@
+import pytest
+import pandas as pd
+import numpy as np
+
+
+PRICES = np.array([
+    [1., 2., 4., 4.],
+    [2., 2., 1., 1.],
+])
+
+TEST_PARAMS = {
+    'max_observations': 3,
+    'observation_size': 2,
+    'money': 10,
+    'fee': -.01,
+    'data': PRICES,
+}
+
+
+#####
+# Positive test cases
+###
+
+# DATA
+def test_panel_from_prices(create_i_portfolio_market_env):
+    mkt = create_i_portfolio_market_env(TEST_PARAMS)
+    assert mkt.data.shape == (2, 4, 1)
+    assert mkt.n_assets == 2
+    assert mkt.total_space_size == 4
+    assert mkt.observation_space.shape == (2, 2, 1)
+    assert mkt.action_space.shape == (2,)
+
+def test_panel_from_frames(create_i_portfolio_market_env):
+    frames = [
+        pd.DataFrame({'open': row, 'close': row * 2}) for row in PRICES
+    ]
+    mkt = create_i_portfolio_market_env({'data': frames})
+    assert mkt.data.shape == (2, 4, 2)
+    assert mkt.price_column == 'close'
+    np.testing.assert_array_equal(mkt.prices, PRICES * 2)
+
+def test_panel_from_wide_frame(create_i_portfolio_market_env):
+    wide = pd.DataFrame(PRICES.T, columns=['AAA', 'BBB'])
+    mkt = create_i_portfolio_market_env({'data': wide})
+    assert mkt.assets == ['AAA', 'BBB']
+    np.testing.assert_array_equal(mkt.prices, PRICES)
+
+def test_generated_panel(create_i_portfolio_market_env):
+    mkt = create_i_portfolio_market_env({
+        'n_assets': 500,
+        'total_space_size': 256,
+        'random_seed': 3,
+    })
+    assert mkt.data.shape == (500, 256, 1)
+    assert (mkt.prices > 0).all()
+    assert mkt.reset().shape == (500, 64, 1)
+
+# OBSERVATION
+def test_observation_is_view(create_i_portfolio_market_env):
+    mkt = create_i_portfolio_market_env(TEST_PARAMS)
+    mkt.idx = 1
+    observation = mkt.get_observation()
+    np.testing.assert_array_equal(observation[:, :, 0], PRICES[:, 1:3])
+    assert np.shares_memory(observation, mkt.data)
+
+def test_observation_dtype(create_i_portfolio_market_env):
+    for dtype in (np.float64, np.float32):
+        mkt = create_i_portfolio_market_env(dict(TEST_PARAMS, dtype=dtype))
+        observation = mkt.reset()
+        assert observation.dtype == dtype
+        assert mkt.observation_space.contains(observation)
+
+# AMOUNTS
+def test_amounts_fill(create_i_portfolio_market_env):
+    mkt = create_i_portfolio_market_env(
+        dict(TEST_PARAMS, action_mode='amounts'))
+    mkt.idx = 0
+    (observation, reward, done, info) = mkt.step([2, 1])
+    np.testing.assert_array_equal(info['fills'], [2, 1])
+    np.testing.assert_allclose(info['fees'], [.04, .02])
+    np.testing.assert_array_equal(mkt.holdings, [2, 1])
+    np.testing.assert_array_equal(mkt.vested, [4, 2])
+    assert mkt.money == pytest.approx(10 - 6 - .06)
+    # Prices move from [2, 2] to [4, 1]
+    assert reward == pytest.approx(2 * 2 - 1 - .06)
+    assert not done
+
+def test_amounts_never_short(create_i_portfolio_market_env):
+    mkt = create_i_portfolio_market_env(
+        dict(TEST_PARAMS, action_mode='amounts'))
+    mkt.idx = 0
+    mkt.step([2, 0])
+    (observation, reward, done, info) = mkt.step([-1, -5])
+    np.testing.assert_array_equal(info['fills'], [-1, 0])
+    np.testing.assert_array_equal(mkt.holdings, [1, 0])
+    np.testing.assert_allclose(mkt.vested, [2, 0])
+
+def test_buys_scaled_to_cash(create_i_portfolio_market_env):
+    mkt = create_i_portfolio_market_env(
+        dict(TEST_PARAMS, action_mode='amounts', fee=-0.))
+    mkt.idx = 0
+    (observation, reward, done, info) = mkt.step([10, 10])
+    np.testing.assert_allclose(info['fills'], [2.5, 2.5])
+    assert mkt.money == pytest.approx(0)
+
+@pytest.mark.filterwarnings('error::RuntimeWarning')
+def test_sells_from_negative_cash(create_i_portfolio_market_env):
+    mkt = create_i_portfolio_market_env(
+        dict(TEST_PARAMS, action_mode='amounts'))
+    mkt.idx = 0
+    mkt.step([2, 1])
+    mkt.money = -10.
+    # Still short of cash after selling, with no buys to scale
+    (observation, reward, done, info) = mkt.step([-1, 0])
+    assert np.isfinite(info['fills']).all()
+    np.testing.assert_array_equal(info['fills'], [-1, 0])
+    np.testing.assert_array_equal(mkt.holdings, [1, 1])
+    assert np.isfinite(mkt.money)
+
+# WEIGHTS
+def test_weights_rebalance(create_i_portfolio_market_env):
+    mkt = create_i_portfolio_market_env(dict(TEST_PARAMS, fee=-0.))
+    mkt.idx = 0
+    mkt.step([.5, .5])
+    np.testing.assert_allclose(mkt.holdings, [2.5, 2.5])
+    # Equity is 2.5 * 4 + 2.5 * 1 = 12.5 at prices [4, 1]
+    mkt.step([0, 2])
+    np.testing.assert_allclose(mkt.holdings, [0, 12.5])
+    assert mkt.money == pytest.approx(0)
+
+def test_weights_normalized(create_i_portfolio_market_env):
+    mkt = create_i_portfolio_market_env(dict(TEST_PARAMS, fee=-0.))
+    mkt.idx = 0
+    mkt.step([3, 1])
+    np.testing.assert_allclose(mkt.holdings * PRICES[:, 1], [7.5, 2.5])
+
+# LAST STEP
+def test_done_on_last_step(create_i_portfolio_market_env):
+    mkt = create_i_portfolio_market_env(dict(TEST_PARAMS, max_observations=1))
+    mkt.idx = 0
+    (observation, reward, done, info) = mkt.step([0, 0])
+    assert done
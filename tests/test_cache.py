@@ -0,0 +1,116 @@
+import pytest
+
+import numpy as np
+import pandas as pd
+
+from pandas.testing import assert_frame_equal
+
+from stock_gym.envs.stocks.basic import SinMarketEnv
+from stock_gym.envs.stocks.cache import DatasetCache, dataset_cache
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    dataset_cache.clear()
+    yield
+    dataset_cache.clear()
+
+
+def test_get_put():
+    cache = DatasetCache()
+    values = np.arange(4.)
+    assert cache.get('a') is None
+    cache.put('a', {'data': values})
+    assert cache.get('a')['data'] is values
+    assert not values.flags.writeable
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert cache.bytes == values.nbytes
+
+def test_evicts_least_recently_used():
+    cache = DatasetCache(max_bytes=2 * 32)
+    for key in 'ab':
+        cache.put(key, {'data': np.zeros(4)})
+    cache.get('a')
+    cache.put('c', {'data': np.zeros(4)})
+    assert 'a' in cache and 'c' in cache
+    assert 'b' not in cache
+    assert cache.bytes == 2 * 32
+
+def test_skips_oversized():
+    cache = DatasetCache(max_bytes=8)
+    cache.put('a', {'data': np.zeros(4)})
+    assert len(cache) == 0
+
+def test_frame_size():
+    cache = DatasetCache()
+    frame = pd.DataFrame({'price': np.zeros(4)})
+    cache.put('a', {'data': frame})
+    assert cache.bytes == frame.memory_usage(index=True).sum()
+
+def test_frames_read_only():
+    cache = DatasetCache()
+    frame = pd.DataFrame({'price': np.arange(4.), 'quantity': np.ones(4)})
+    cache.put('a', {'data': frame})
+    cached = cache.get('a')['data']
+    assert_frame_equal(cached, frame)
+    assert not np.shares_memory(cached.values, frame.values)
+    with pytest.raises(ValueError, match='read-only'):
+        cached.iloc[0, 0] = 1.
+
+def test_writes_dont_leak(create_i_cont_ohlcv_market_env):
+    params = {'total_space_size': 512, 'random_seed': 42}
+    mkt = create_i_cont_ohlcv_market_env(params)
+    other = create_i_cont_ohlcv_market_env(params)
+    third = create_i_cont_ohlcv_market_env(params)
+    close = third.data.close.iloc[0]
+    # The market that generated the data writes to its own copy
+    mkt.data.iloc[0, 3] = close + 1
+    mkt.values[0] = close + 1
+    # and markets built from the cache can't write at all
+    with pytest.raises(ValueError, match='read-only'):
+        other.data.iloc[0, 3] = close + 1
+    with pytest.raises(ValueError, match='read-only'):
+        other.raw_data.iloc[0, 0] = 1.
+    with pytest.raises(ValueError, match='read-only'):
+        other.values[0] = close + 1
+    assert third.data.close.iloc[0] == close
+
+def test_markets_share_data():
+    mkt = SinMarketEnv()
+    other = SinMarketEnv()
+    assert other.data is mkt.data
+    assert dataset_cache.hits == 1
+
+def test_parameters_change_key():
+    mkt = SinMarketEnv()
+    other = SinMarketEnv(total_space_size=1024)
+    assert other.data is not mkt.data
+    assert len(other.data) == 1024
+
+def test_cache_disabled():
+    mkt = SinMarketEnv()
+    other = SinMarketEnv(cache_data=False)
+    assert other.data is not mkt.data
+    np.testing.assert_array_equal(other.data, mkt.data)
+
+def test_ohlcv_seeded(create_i_cont_ohlcv_market_env):
+    params = {'total_space_size': 512, 'random_seed': 42}
+    mkt = create_i_cont_ohlcv_market_env(params)
+    other = create_i_cont_ohlcv_market_env(params)
+    third = create_i_cont_ohlcv_market_env(params)
+    # Markets built from the cache share its read-only copy
+    assert np.shares_memory(other.values, third.values)
+    assert other.raw_data is third.raw_data
+    assert_frame_equal(other.data, mkt.data)
+    assert other.price_column == 'close'
+    assert other.total_space_size == mkt.total_space_size
+
+    reseeded = create_i_cont_ohlcv_market_env(
+        dict(params, random_seed=7, cache_data=False))
+    assert not reseeded.data.equals(mkt.data)
+    fresh = create_i_cont_ohlcv_market_env(dict(params, cache_data=False))
+    assert_frame_equal(fresh.data, mkt.data)
+
+def test_ohlcv_unseeded_not_cached(create_i_cont_ohlcv_market_env):
+    create_i_cont_ohlcv_market_env({'total_space_size': 512})
+    assert len(dataset_cache) == 0
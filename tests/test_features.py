@@ -0,0 +1,80 @@
+import pytest
+
+import numpy as np
+import pandas as pd
+
+from stock_gym.envs.stocks.basic import SinMarketEnv
+from stock_gym.envs.stocks.features import \
+    INDICATORS, rsi, running_moments, sma, vwap
+
+
+PRICE = .5 + np.random.default_rng(0).uniform(-.01, .01, 200).cumsum()
+VOLUME = np.random.default_rng(1).random(200)
+
+
+@pytest.mark.parametrize('name', sorted(INDICATORS))
+def test_no_look_ahead(name):
+    indicator = INDICATORS[name]
+    full = indicator(PRICE, VOLUME)
+    assert len(full) == len(PRICE)
+    assert not np.isnan(full).any()
+    for end in [1, 5, 50]:
+        np.testing.assert_allclose(
+            indicator(PRICE[:end], VOLUME[:end]), full[:end])
+
+def test_sma():
+    np.testing.assert_allclose(sma(np.arange(1., 6.), window=2),
+                               [1, 1.5, 2.5, 3.5, 4.5])
+
+def test_rsi_bounds():
+    values = rsi(PRICE)
+    assert ((values >= 0) & (values <= 1)).all()
+    assert rsi(np.arange(10.))[-1] == 1
+    assert rsi(np.ones(3))[0] == .5
+
+def test_vwap():
+    np.testing.assert_allclose(
+        vwap(np.array([1., 2., 4.]), np.array([1., 3., 0.]), window=2),
+        [1, 7 / 4, 2])
+
+def test_running_moments():
+    values = np.column_stack([PRICE, VOLUME])
+    mean, std = running_moments(values)
+    for end in [1, 2, 50, len(PRICE)]:
+        np.testing.assert_allclose(mean[end - 1], values[:end].mean(axis=0))
+        np.testing.assert_allclose(std[end - 1], values[:end].std(axis=0),
+                                   atol=1e-12)
+
+def test_market_columns(create_market_mixin):
+    data = pd.DataFrame({'price': PRICE, 'volume': VOLUME})
+    mkt = create_market_mixin({
+        'data': data,
+        'observation_size': 16,
+        'indicators': ['returns', 'sma:10', 'vwap:5'],
+    })
+    assert list(mkt.data.columns) == [
+        'price', 'volume', 'returns', 'sma_10', 'vwap_5']
+    assert mkt.n_features == 5
+    assert mkt.observation_space.shape == (16, 5)
+    np.testing.assert_allclose(mkt.data.sma_10, sma(PRICE, window=10))
+    assert mkt.values.flags.c_contiguous
+
+def test_linear_market(create_i_linear_market_env):
+    mkt = create_i_linear_market_env({
+        'data': PRICE,
+        'observation_size': 8,
+        'max_observations': 16,
+        'indicators': ['ema:4'],
+    })
+    assert mkt.values.shape == (200, 2)
+    assert mkt.observation_space.shape == (8, 2)
+    assert mkt.reset().shape == (8, 2)
+    np.testing.assert_array_equal(mkt.prices, PRICE)
+
+def test_cached_market():
+    mkt = SinMarketEnv(indicators=['rsi'])
+    other = SinMarketEnv(indicators=['rsi'])
+    plain = SinMarketEnv()
+    assert list(other.column_index) == ['price', 'rsi']
+    np.testing.assert_array_equal(other.values, mkt.values)
+    assert plain.values.ndim == 1
@@ -0,0 +1,26 @@
+import pytest
+
+from stock_gym.benchmarks.imports import bench_import
+
+
+@pytest.fixture(scope='module')
+def cold_start():
+    return bench_import('stock_gym.envs.stocks')
+
+
+def test_registration_is_light(cold_start):
+    modules = cold_start['modules']
+    assert 'pandas' not in modules
+    assert [name for name in modules if name.startswith('stock_gym')] == [
+        'stock_gym', 'stock_gym.envs', 'stock_gym.envs.stocks']
+
+def test_lazy_classes():
+    import gym
+    from stock_gym.envs import stocks
+    from stock_gym.envs.stocks.basic import SinMarketEnv
+
+    assert stocks.SinMarketEnv is SinMarketEnv
+    assert 'OrderBook' in dir(stocks)
+    assert isinstance(gym.make('SinMarketEnv-v0').unwrapped, SinMarketEnv)
+    with pytest.raises(AttributeError):
+        stocks.MissingMarketEnv
@@ -0,0 +1,85 @@
+import pytest
+
+from stock_gym.envs.stocks.basic import ContSinMarketEnv
+from stock_gym.envs.stocks.ledger import LotLedger
+
+
+LOTS = [(.3, 1), (.1, 2), (.2, 1)]  # in opening order
+
+
+def create_ledger(accounting):
+    ledger = LotLedger(accounting)
+    for price, amount in LOTS:
+        ledger.add(price, amount)
+    return ledger
+
+
+def test_mapping():
+    ledger = LotLedger(lots={.1: 2, .2: 1})
+    assert ledger == {.1: 2, .2: 1}
+    assert ledger[.1] == 2
+    assert len(ledger) == 2
+
+def test_add_same_price():
+    ledger = create_ledger('highest')
+    ledger.add(.1, 1)
+    assert ledger == {.1: 3, .2: 1, .3: 1}
+
+@pytest.mark.parametrize('accounting, taken, remaining', [
+    ('highest', [(.3, 1), (.2, 1)], {.1: 2}),
+    ('lifo', [(.2, 1), (.1, 1)], {.3: 1, .1: 1}),
+    ('fifo', [(.3, 1), (.1, 1)], {.1: 1, .2: 1}),
+])
+def test_consume_order(accounting, taken, remaining):
+    ledger = create_ledger(accounting)
+    assert list(ledger.consume(2)) == taken
+    assert ledger == remaining
+
+def test_consume_average():
+    ledger = create_ledger('average')
+    assert list(ledger.values()) == [4]
+    [(price, amount)] = list(ledger.consume(2))
+    assert round(price, 6) == .175
+    assert amount == 2
+    assert list(ledger.values()) == [2]
+
+def test_consume_more_than_open():
+    for accounting in LotLedger.accountings:
+        ledger = create_ledger(accounting)
+        assert sum(amount for _, amount in ledger.consume(10)) == 4
+        assert ledger == {}
+
+def test_consume_lifo_keeps_shared_level():
+    ledger = LotLedger('lifo')
+    ledger.add(.1, 1)
+    ledger.add(.2, 1)
+    ledger.add(.1, 1)
+    assert list(ledger.consume(1)) == [(.1, 1)]
+    assert ledger == {.1: 1, .2: 1}
+
+@pytest.mark.parametrize('accounting', LotLedger.accountings)
+def test_copy_is_independent(accounting):
+    ledger = create_ledger(accounting)
+    copied = ledger.copy()
+    assert list(copied.consume(2)) == list(create_ledger(accounting).consume(2))
+    copied.add(.4, 1)
+    assert ledger == create_ledger(accounting)
+
+def test_invalid_accounting():
+    with pytest.raises(AssertionError):
+        LotLedger('random')
+
+def test_markets_do_not_share_bids(create_market):
+    mkts = [create_market(ContSinMarketEnv, None) for _ in range(2)]
+    mkts[0].reset()
+    mkts[0].step(0.1)
+    assert len(mkts[0].bids) == 1
+    assert len(mkts[1].bids) == 0
+
+def test_market_accounting(create_i_cont_linear_market_env):
+    mkt = create_i_cont_linear_market_env({'accounting': 'fifo'})
+    mkt.bids = {.3: 1, .1: 1}
+    mkt.position = 2
+    mkt.vested = .4
+    assert round(mkt.calculate_returns(1, .5), 2) == .2
+    assert mkt.bids == {.1: 1}
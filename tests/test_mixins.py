@@ -118,4 +118,188 @@ def test_get_observation(create_market_mixin):
     mkt.idx = 0
     assert mkt._move_index()
     assert len(mkt.get_observation()) == mkt.observation_size
-    assert_frame_equal(mkt.get_observation(), mkt.data[1:])
+    np.testing.assert_array_equal(mkt.get_observation(), mkt.data[1:].values)
+
+def test_get_observation_window_view(create_market_mixin):
+    data = pd.DataFrame({'price': [.1, .2, .3, .4, .5]})
+    mkt = create_market_mixin({
+        'max_observations': 2,
+        'observation_size': len(data) - 1,
+        'total_space_size': len(data),
+        'data': data,
+        'window_view': True,
+    })
+    mkt.idx = 0
+    assert mkt._move_index()
+    observation = mkt.get_observation()
+    assert isinstance(observation, np.ndarray)
+    assert observation.shape == (mkt.observation_size, 1)
+    assert (observation == mkt.data[1:].values).all()
+    assert not observation.flags.writeable
+    assert np.shares_memory(observation, mkt.windows)
+
+def test_get_observation_window_view_copy(create_market_mixin):
+    data = pd.DataFrame({'price': [.1, .2, .3, .4, .5]})
+    mkt = create_market_mixin({
+        'max_observations': 2,
+        'observation_size': len(data) - 1,
+        'total_space_size': len(data),
+        'data': data,
+        'window_view': True,
+        'copy_observation': True,
+    })
+    mkt.idx = 0
+    observation = mkt.get_observation()
+    assert observation.flags.writeable
+    assert not np.shares_memory(observation, mkt.windows)
+    observation[0] = 1
+    assert mkt.get_observation()[0] == .1
+
+def test_flat_observation_space(create_market_mixin):
+    mkt = create_market_mixin(TEST_PARAMS)
+    assert mkt.observation_space.shape == (12, 12)
+    assert mkt.observation_space.dtype == mkt.dtype
+    mkt.reset()
+    assert mkt.get_observation().shape == mkt.observation_space.shape
+    assert mkt.observation_space.contains(mkt.get_observation())
+
+def test_tuple_observation_space(create_market_mixin):
+    mkt = create_market_mixin(dict(TEST_PARAMS, flat_observation_space=False))
+    assert len(mkt.observation_space.spaces) == 12
+    assert len(mkt.observation_space.spaces[0].spaces) == 12
+
+def test_flat_observation_space_fit_to_data(create_market_mixin):
+    data = pd.DataFrame({'price': [.1, .2, .3, .4, .5]})
+    mkt = create_market_mixin({'data': data, 'observation_size': 64})
+    assert mkt.observation_space.shape == (5, 1)
+
+def test_values_contiguous(create_market_mixin):
+    data = pd.DataFrame({'price': [.1, .2, .3], 'quantity': [1, 2, 3]})
+    mkt = create_market_mixin({'data': data})
+    assert mkt.values.flags.c_contiguous
+    assert mkt.values.dtype == np.float64
+    assert mkt.column_index == {'price': 0, 'quantity': 1}
+    np.testing.assert_array_equal(mkt.values, data.values)
+
+def test_data_view_over_values(create_market_mixin):
+    data = pd.DataFrame({'price': [.1, .2, .3]}, index=[3, 4, 5])
+    mkt = create_market_mixin({'data': data})
+    assert mkt._data is None
+    assert_frame_equal(mkt.data, data)
+    assert np.shares_memory(mkt.data.values, mkt.values)
+    assert mkt.data is mkt.data
+
+def test_values_dtype(create_market_mixin):
+    mkt = create_market_mixin(dict(TEST_PARAMS, dtype=np.float32))
+    assert mkt.values.dtype == np.float32
+    assert mkt.observation_space.dtype == np.float32
+    mkt.reset()
+    assert mkt.get_observation().dtype == np.float32
+
+def draw_starts(mkt, count=20):
+    starts = []
+    for _ in range(count):
+        mkt.set_random_index()
+        starts.append(mkt.idx)
+    return starts
+
+def test_random_index_reproducible(create_market_mixin):
+    mkt = create_market_mixin(dict(TEST_PARAMS, random_seed=7))
+    other = create_market_mixin(dict(TEST_PARAMS, random_seed=7))
+    state = np.random.get_state()[1].copy()
+    assert draw_starts(mkt) == draw_starts(other)
+    # The global generator is left alone
+    assert (np.random.get_state()[1] == state).all()
+
+def test_random_index_batched(create_market_mixin):
+    mkt = create_market_mixin(dict(TEST_PARAMS, start_batch=8))
+    mkt.seed(3)
+    starts = draw_starts(mkt)
+    mkt.seed(3)
+    assert draw_starts(mkt) == starts
+    high = mkt.total_space_size - \
+        (mkt.observation_size + mkt.max_observations - 2)
+    assert all(0 <= start < high for start in starts)
+
+def test_spawned_seeds(create_market_mixin):
+    parent = np.random.SeedSequence(11)
+    mkts = [create_market_mixin(TEST_PARAMS) for _ in range(2)]
+    for mkt, sequence in zip(mkts, parent.spawn(2)):
+        mkt.seed(sequence)
+    assert draw_starts(mkts[0]) != draw_starts(mkts[1])
+    mkts[0].seed(np.random.SeedSequence(11).spawn(1)[0])
+    mkts[1].seed(np.random.SeedSequence(11).spawn(1)[0])
+    assert draw_starts(mkts[0]) == draw_starts(mkts[1])
+
+# NORMALIZE
+NORM_DATA = pd.DataFrame({
+    'price': np.linspace(1., 2., 20) + np.sin(np.arange(20)) / 4,
+    'volume': np.r_[0., np.arange(1., 20.)],
+    'flat': np.ones(20),
+})
+
+def create_normalized(create_market_mixin, normalize, **kwargs):
+    return create_market_mixin(dict({
+        'max_observations': 8,
+        'observation_size': 5,
+        'total_space_size': len(NORM_DATA),
+        'data': NORM_DATA,
+        'normalize': normalize,
+    }, **kwargs))
+
+def test_normalize_minmax(create_market_mixin):
+    mkt = create_normalized(create_market_mixin, 'minmax')
+    for idx in [0, 7, 15]:
+        mkt.idx = idx
+        window = NORM_DATA.to_numpy()[idx:idx + 5]
+        window = window[:, :2]
+        observation = mkt.get_observation()
+        np.testing.assert_allclose(
+            observation[:, :2],
+            (window - window.min(axis=0)) / np.ptp(window, axis=0))
+        assert (observation[:, 2] == 0).all()  # no range
+    assert mkt.observation_space.low.min() == 0
+    assert mkt.observation_space.high.max() == 1
+
+def test_normalize_pct_change(create_market_mixin):
+    mkt = create_normalized(create_market_mixin, 'pct_change')
+    mkt.idx = 3
+    window = NORM_DATA.to_numpy()[3:8]
+    np.testing.assert_allclose(mkt.get_observation(), window / window[0] - 1)
+    mkt.idx = 0  # volume starts at 0
+    assert (mkt.get_observation()[:, 1] == 0).all()
+    assert mkt.observation_space.low.min() == -np.inf
+
+def test_normalize_zscore(create_market_mixin):
+    mkt = create_normalized(create_market_mixin, 'zscore')
+    mkt.idx = 6
+    seen = NORM_DATA.to_numpy()[:11, :2]
+    observation = mkt.get_observation()
+    np.testing.assert_allclose(
+        observation[:, :2], (seen[6:] - seen.mean(axis=0)) / seen.std(axis=0))
+    assert (observation[:, 2] == 0).all()  # no deviation
+
+@pytest.mark.parametrize('normalize', ['minmax', 'pct_change', 'zscore'])
+def test_normalize_window_view(create_market_mixin, normalize):
+    mkt = create_normalized(create_market_mixin, normalize)
+    viewed = create_normalized(create_market_mixin, normalize,
+                               window_view=True)
+    for idx in range(len(NORM_DATA) - 5 + 1):
+        mkt.idx = viewed.idx = idx
+        np.testing.assert_array_equal(
+            mkt.get_observation(), viewed.get_observation())
+
+def test_normalize_series(create_market_mixin):
+    mkt = create_market_mixin({
+        'max_observations': 4,
+        'observation_size': 4,
+        'total_space_size': 8,
+        'data': np.arange(1., 9.),
+        'normalize': 'minmax',
+    })
+    mkt.idx = 2
+    np.testing.assert_allclose(mkt.get_observation(), [0, 1 / 3, 2 / 3, 1])
+
+def test_normalize_invalid(create_market_mixin):
+    with pytest.raises(AssertionError):
+        create_normalized(create_market_mixin, 'median')
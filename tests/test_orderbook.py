@@ -0,0 +1,117 @@
+import pytest
+
+import numpy as np
+import pandas as pd
+
+from stock_gym.envs.stocks.orderbook import OrderBook
+
+
+def fills(book, *ticks):
+    return [fill[1:] for fill in book.replay(*zip(*ticks))]
+
+
+def test_best_prices():
+    book = OrderBook()
+    assert book.best('buy') is None
+    book.limit('buy', .1, 1)
+    book.limit('buy', .3, 1)
+    book.limit('sell', .5, 1)
+    book.limit('sell', .4, 1)
+    assert book.best('buy') == .3
+    assert book.best('sell') == .4
+    assert len(book) == 4
+
+def test_limit_fills_at_limit():
+    book = OrderBook()
+    buy = book.limit('buy', .3, 2)
+    sell = book.limit('sell', .5, 1)
+    assert fills(book, (.4, 5), (.25, 1), (.6, 5)) == [
+        (buy, 'buy', .3, 1),
+        (sell, 'sell', .5, 1),
+    ]
+    assert book.orders[buy][2] == 1
+    assert sell not in book
+
+def test_price_priority():
+    book = OrderBook()
+    low = book.limit('buy', .1, 1)
+    high = book.limit('buy', .3, 1)
+    assert fills(book, (.1, 1.5)) == [
+        (high, 'buy', .3, 1),
+        (low, 'buy', .1, .5),
+    ]
+
+def test_time_priority():
+    book = OrderBook()
+    first = book.limit('sell', .5, 1)
+    second = book.limit('sell', .5, 1)
+    assert fills(book, (.5, 1.5)) == [
+        (first, 'sell', .5, 1),
+        (second, 'sell', .5, .5),
+    ]
+
+def test_market_fills_at_tick():
+    book = OrderBook()
+    order = book.market('buy', 2)
+    assert fills(book, (.7, 1), (.9, 3)) == [
+        (order, 'buy', .7, 1),
+        (order, 'buy', .9, 1),
+    ]
+    assert len(book) == 0
+
+def test_tick_quantity_shared_by_sides():
+    book = OrderBook()
+    buy = book.market('buy', 2)
+    sell = book.market('sell', 2)
+    assert fills(book, (.5, 3)) == [
+        (buy, 'buy', .5, 2),
+        (sell, 'sell', .5, 1),
+    ]
+    assert book.orders[sell][2] == 1
+
+def test_cancel():
+    book = OrderBook()
+    first = book.limit('buy', .3, 1)
+    second = book.limit('buy', .3, 2)
+    only = book.limit('buy', .4, 1)
+    assert book.cancel(first) == 1
+    assert book.cancel(only) == 1
+    assert book.best('buy') == .3
+    assert fills(book, (.3, 5)) == [(second, 'buy', .3, 2)]
+    with pytest.raises(KeyError):
+        book.cancel(first)
+
+def test_replay_frame(create_i_ohlcv_market_env):
+    mkt = create_i_ohlcv_market_env({
+        'total_space_size': 256,
+        'random_seed': 1,
+    })
+    idx = int(np.flatnonzero(mkt.data.volume)[0])
+    ticks = mkt.bar_ticks(idx)
+    assert len(ticks)
+    assert (ticks.index >= mkt.data.index[idx]).all()
+    assert (ticks.index < mkt.data.index[idx + 1]).all()
+    assert ticks.quantity.sum() == pytest.approx(mkt.data.volume.iloc[idx])
+
+    book = OrderBook()
+    order = book.limit('buy', ticks.price.max(), ticks.quantity.sum() * 2)
+    filled = book.replay_frame(ticks)
+    assert sum(fill[4] for fill in filled) == pytest.approx(
+        ticks.quantity.sum())
+    assert filled[0][0] == ticks.index[0]
+    assert book.last_price == ticks.price.iloc[-1]
+
+def test_replay_matches_match():
+    rng = np.random.default_rng(0)
+    prices = .5 + rng.uniform(-.1, .1, 5000).cumsum() / 100
+    quantities = rng.random(5000)
+
+    books = [OrderBook(), OrderBook()]
+    for book in books:
+        for price in np.linspace(.3, .7, 41):
+            book.limit('buy' if price < .5 else 'sell', price, 3)
+    replayed = books[0].replay(prices, quantities)
+    matched = []
+    for price, quantity in zip(prices, quantities):
+        matched += books[1].match(price, quantity)
+    assert replayed == matched
@@ -0,0 +1,65 @@
+import pytest
+
+import numpy as np
+
+from stock_gym.envs.stocks.profile import PhaseTimer
+
+
+TEST_PARAMS = {
+    'max_observations': 3,
+    'observation_size': 4,
+    'total_space_size': 8,
+    'data': np.linspace(.1, .8, 8),
+}
+
+
+def test_timer_histogram():
+    timer = PhaseTimer()
+    for elapsed in [1000] * 99 + [10 ** 6]:
+        timer.record(elapsed)
+    stats = timer.stats()
+    assert stats['calls'] == 100
+    assert stats['total'] == pytest.approx((99 * 1000 + 10 ** 6) / 1e9)
+    assert stats['p50'] == 1024 / 1e9
+    assert stats['p99'] == 1024 / 1e9
+    assert stats['histogram'] == {1024 / 1e9: 99, 2 ** 20 / 1e9: 1}
+
+def test_disabled_by_default(create_i_cont_linear_market_env):
+    mkt = create_i_cont_linear_market_env(TEST_PARAMS)
+    assert 'step' not in vars(mkt)
+    mkt.reset()
+    assert 'profile' not in mkt.step(.1)[3]
+    assert mkt.stats() == {}
+
+def test_phase_counts(create_i_cont_linear_market_env):
+    mkt = create_i_cont_linear_market_env(dict(TEST_PARAMS, profile=True))
+    mkt.reset()
+    mkt.step(.1)
+    mkt.step(0)
+    stats = mkt.stats()
+    assert set(stats) == {
+        'step', 'calculate_reward', 'get_price', 'get_observation',
+        '_move_index',
+    }
+    assert stats['step']['calls'] == 2
+    assert stats['get_observation']['calls'] == 3  # reset and steps
+    assert stats['step']['total'] >= stats['calculate_reward']['total']
+    assert 'profile' not in mkt.step(0)[3]
+
+def test_phases_in_info(create_i_linear_market_env):
+    mkt = create_i_linear_market_env(dict(TEST_PARAMS, profile_info=True))
+    mkt.reset()
+    info = mkt.step(2)[3]
+    assert set(info['profile']) <= {'step', 'get_observation', '_move_index'}
+    assert info['profile']['step'] > 0
+
+def test_mixin_phases(create_i_portfolio_market_env):
+    mkt = create_i_portfolio_market_env({
+        'data': np.ones((2, 8)),
+        'max_observations': 2,
+        'observation_size': 4,
+        'profile': True,
+    })
+    mkt.reset()
+    mkt.step([.5, .5])
+    assert mkt.stats()['rebalance']['calls'] == 1
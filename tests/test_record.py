@@ -0,0 +1,83 @@
+import pytest
+
+import numpy as np
+
+from stock_gym.envs.stocks.record import TrajectoryReader, TrajectoryRecorder
+
+
+TEST_PARAMS = {
+    'max_observations': 4,
+    'observation_size': 4,
+    'total_space_size': 16,
+    'money': 10,
+    'data': np.linspace(.1, 1.6, 16),
+}
+
+
+def record_runs(mkt, path, runs=3, chunk_size=5, action=2):
+    with TrajectoryRecorder(mkt, path, chunk_size=chunk_size) as recorder:
+        for _ in range(runs):
+            recorder.reset()
+            done = False
+            while not done:
+                observation, reward, done, info = recorder.step(action)
+    return recorder
+
+
+def test_records_steps(tmp_path, create_i_linear_market_env):
+    mkt = create_i_linear_market_env(TEST_PARAMS)
+    recorder = record_runs(mkt, tmp_path)
+    data = TrajectoryReader(tmp_path).load()
+
+    assert len(data['idx']) == 12  # 4 steps per run
+    assert recorder.chunks == 3
+    np.testing.assert_array_equal(data['episode'], np.repeat([0, 1, 2], 4))
+    np.testing.assert_array_equal(data['done'], np.tile([0, 0, 0, 1], 3))
+    np.testing.assert_array_equal(data['action'], 2)
+    assert data['money'][-1] == mkt.money
+    # Each run walks consecutive windows
+    np.testing.assert_array_equal(np.diff(data['idx'].reshape(3, 4)), 1)
+
+def test_resumes_recording(tmp_path, create_i_linear_market_env):
+    mkt = create_i_linear_market_env(TEST_PARAMS)
+    record_runs(mkt, tmp_path)
+    recorder = record_runs(mkt, tmp_path, runs=2)
+    data = TrajectoryReader(tmp_path).load()
+
+    assert recorder.chunks == 5
+    np.testing.assert_array_equal(data['episode'],
+                                  np.repeat([0, 1, 2, 3, 4], 4))
+    runs = TrajectoryReader(tmp_path).episodes(['idx'])
+    assert len(runs) == 5
+
+def test_passes_through(tmp_path, create_i_linear_market_env):
+    mkt = create_i_linear_market_env(TEST_PARAMS)
+    recorder = TrajectoryRecorder(mkt, tmp_path)
+    assert recorder.observation_size == 4
+    assert recorder.action_space is mkt.action_space
+
+def test_memmap(tmp_path, create_i_linear_market_env):
+    mkt = create_i_linear_market_env(TEST_PARAMS)
+    record_runs(mkt, tmp_path)
+    reader = TrajectoryReader(tmp_path)
+    mapped = reader.memmap(['idx', 'reward'])
+    assert isinstance(mapped['idx'], np.memmap)
+    np.testing.assert_array_equal(mapped['reward'], reader.load()['reward'])
+
+def test_episodes(tmp_path, create_i_linear_market_env):
+    mkt = create_i_linear_market_env(TEST_PARAMS)
+    record_runs(mkt, tmp_path)
+    runs = TrajectoryReader(tmp_path).episodes(['idx', 'done'])
+    assert len(runs) == 3
+    assert all(run['done'][-1] for run in runs)
+
+def test_portfolio_holdings(tmp_path, create_i_portfolio_market_env):
+    mkt = create_i_portfolio_market_env({
+        'data': np.ones((3, 8)),
+        'max_observations': 2,
+        'observation_size': 4,
+    })
+    record_runs(mkt, tmp_path, runs=1, action=[.2, .3, .5])
+    data = TrajectoryReader(tmp_path).load()
+    assert data['position'].shape == (2, 3)
+    assert data['action'].shape == (2, 3)
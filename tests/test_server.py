@@ -0,0 +1,201 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+import numpy as np
+
+from pandas.testing import assert_frame_equal
+
+from stock_gym.envs.stocks.basic import ContSinMarketEnv, OHLCVMarketEnv
+from stock_gym.envs.stocks.imarket import ILinearMarketEnv
+from stock_gym.envs.stocks.server import (
+    MarketClient, MarketServer, RemoteMarketEnv, pack_shapes, unpack_shapes)
+
+
+DATA = (1 + np.sin(np.linspace(0, 8 * np.pi, 64))) / 2
+
+TEST_PARAMS = {
+    'max_observations': 16,
+    'observation_size': 8,
+    'total_space_size': len(DATA),
+    'data': DATA,
+}
+
+
+@pytest.fixture
+def serve():
+    """Run a MarketServer on a background event loop"""
+    loops = []
+
+    def _serve(market_class, address=('127.0.0.1', 0), **kwargs):
+        server = MarketServer(market_class, **kwargs)
+        loop = asyncio.new_event_loop()
+        thread = threading.Thread(target=loop.run_forever, daemon=True)
+        thread.start()
+        asyncio.run_coroutine_threadsafe(
+            server.start(address), loop).result(timeout=10)
+        loops.append((server, loop, thread))
+        return server
+
+    yield _serve
+    for server, loop, thread in loops:
+        asyncio.run_coroutine_threadsafe(
+            server.close(), loop).result(timeout=10)
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(timeout=10)
+        loop.close()
+
+
+def test_pack_shapes():
+    shapes = [(8,), (), (64, 10)]
+    assert unpack_shapes(pack_shapes(*shapes)) == shapes
+
+def test_step_matches_local(serve, create_i_linear_market_env):
+    server = serve(ILinearMarketEnv, **TEST_PARAMS)
+    env = RemoteMarketEnv(server.address)
+    assert env.observation_shape == (8,)
+    assert env.action_shape == ()
+
+    observation = env.reset()
+    local = create_i_linear_market_env(dict(TEST_PARAMS))
+    local.idx = server.markets[env.env].idx
+    local.observed = 0
+    np.testing.assert_array_equal(observation, local.get_observation())
+    for action in [0, 2, 1, 0, 1]:
+        observation, reward, done, _ = env.step(action)
+        expected = local.step(action)
+        np.testing.assert_array_equal(observation, expected[0])
+        assert reward == expected[1]
+        assert done == expected[2]
+    env.close()
+
+def test_unix_socket(serve, tmp_path):
+    address = str(tmp_path / 'markets.sock')
+    serve(ContSinMarketEnv, address=address, **TEST_PARAMS)
+    env = RemoteMarketEnv(address)
+    assert env.reset().shape == env.observation_shape
+    observation, reward, done, _ = env.step(np.full(env.action_shape, .5))
+    assert observation.shape == env.observation_shape
+    env.close()
+
+def test_step_many_batches(serve):
+    server = serve(ILinearMarketEnv, **TEST_PARAMS)
+    client = MarketClient(server.address)
+    envs = [client.make() for _ in range(32)]
+    assert len(server.markets) == 32
+    observations = client.reset_many(envs)
+    assert len(observations) == 32
+
+    batches = server.batches
+    observations, rewards, dones = client.step_many(envs, [2] * 32)
+    assert len(observations) == 32
+    assert rewards.shape == dones.shape == (32,)
+    # Pipelined requests are run in far fewer batches than requests
+    assert server.batches - batches < 32
+    client.close()
+
+def test_markets_share_data(serve):
+    server = serve(OHLCVMarketEnv, total_space_size=256, observation_size=8,
+                   max_observations=16, seed=3)
+    client = MarketClient(server.address)
+    first, second, third = client.make(), client.make(), client.make()
+    markets = server.markets
+    # The first generates the data, and the others share what it cached
+    assert markets[second].raw_data is markets[third].raw_data
+    assert_frame_equal(markets[first].raw_data, markets[second].raw_data)
+    # but draw their own episodes
+    starts = {markets[first].idx, markets[second].idx}
+    for _ in range(4):
+        client.reset_many([first, second])
+        starts.add(markets[first].idx)
+        starts.add(markets[second].idx)
+    assert len(starts) > 2
+    client.close()
+
+def test_seed_reproducible(serve):
+    server = serve(ILinearMarketEnv, **TEST_PARAMS)
+    env = RemoteMarketEnv(server.address)
+    env.seed(7)
+    first = env.reset().copy()
+    env.seed(7)
+    np.testing.assert_array_equal(env.reset(), first)
+    env.close()
+
+def test_close_reuses_markets(serve):
+    server = serve(ILinearMarketEnv, **TEST_PARAMS)
+    client = MarketClient(server.address)
+    env = client.make()
+    market = server.markets[env]
+    client.close_env(env)
+    assert not server.markets
+    assert server.markets[client.make()] is market
+    client.close()
+
+def test_reused_markets_start_clean(serve):
+    server = serve(ContSinMarketEnv, **TEST_PARAMS)
+    client = MarketClient(server.address)
+    env = client.make()
+    market = server.markets[env]
+    money, fresh = market.money, MarketClient(server.address)
+    client.reset(env)
+    for _ in range(3):
+        client.step(env, [.5])
+    assert market.position and market.bids
+    client.close_env(env)
+    # Another connection gets the market back, with none of the trades
+    env = fresh.make()
+    assert server.markets[env] is market
+    assert market.money == money
+    assert market.position == 0 and market.vested == 0
+    assert not market.bids
+    client.close()
+    fresh.close()
+
+def test_disconnect_releases_markets(serve):
+    server = serve(ILinearMarketEnv, **TEST_PARAMS)
+    client = MarketClient(server.address)
+    client.make()
+    client.make()
+    client.close()
+    deadline = time.monotonic() + 10
+    while server.markets and time.monotonic() < deadline:
+        time.sleep(.01)
+    assert not server.markets
+    assert len(server.idle) == 2
+
+#####
+# Negative test cases
+###
+
+def test_unknown_env(serve):
+    server = serve(ILinearMarketEnv, **TEST_PARAMS)
+    client = MarketClient(server.address)
+    with pytest.raises(RuntimeError, match='KeyError'):
+        client.reset(5)
+    # The connection survives errors
+    env = client.make()
+    assert client.reset(env).shape == (8,)
+    client.close()
+
+def test_foreign_env(serve):
+    server = serve(ILinearMarketEnv, **TEST_PARAMS)
+    owner, other = MarketClient(server.address), MarketClient(server.address)
+    env = owner.make()
+    other.shapes[env] = owner.shapes[env]
+    for request in (other.reset, lambda env: other.step(env, 2),
+                    lambda env: other.seed(env, 1), other.close_env):
+        with pytest.raises(RuntimeError, match="isn't open on this connection"):
+            request(env)
+    assert server.owners[env] is not None and env in server.markets
+    owner.close()
+    other.close()
+
+def test_max_envs(serve):
+    server = serve(ILinearMarketEnv, max_envs=1, **TEST_PARAMS)
+    client = MarketClient(server.address)
+    client.make()
+    with pytest.raises(RuntimeError, match='most markets'):
+        client.make()
+    client.close()
@@ -3,12 +3,15 @@
 
 """Tests for `stock_gym` package."""
 
+import json
+
 import pytest
 
 from click.testing import CliRunner
 
 from stock_gym import stock_gym
 from stock_gym import cli
+from stock_gym.rollout import run_episodes
 
 
 @pytest.fixture
@@ -36,3 +39,118 @@ def test_command_line_interface():
     help_result = runner.invoke(cli.main, ['--help'])
     assert help_result.exit_code == 0
     assert '--help  Show this message and exit.' in help_result.output
+
+
+def test_command_line_bench():
+    """Test the benchmark command reports JSON for each setting."""
+    runner = CliRunner()
+    result = runner.invoke(cli.main, [
+        'bench', '--env-id', 'SinMarketEnv-v0', '--env-id', 'FakeMarketEnv-v0',
+        '--total-space-size', '256', '--observation-size', '8',
+        '--observation-size', '16', '--steps', '10', '--resets', '5',
+        '--no-isolate',
+    ])
+    assert result.exit_code == 0
+    report = json.loads(result.output)
+    assert len(report['results']) == 4
+    sin = report['results'][0]
+    assert sin['env_id'] == 'SinMarketEnv-v0'
+    assert sin['observation_size'] == 8
+    assert sin['step']['calls'] == 10
+    assert sin['step']['p50'] <= sin['step']['p99']
+    assert sin['peak_rss'] > 0
+    assert 'error' in report['results'][-1]
+
+
+def hold(observation, env):
+    """Scripted policy for test_command_line_run: always stay"""
+    return 2
+
+
+def buy(observation, env):
+    """Scripted policy for test_run_episodes_restore_money: always buy"""
+    return 0
+
+
+def test_command_line_run():
+    """Test the run command splits episodes across workers."""
+    runner = CliRunner()
+    result = runner.invoke(cli.main, [
+        'run', '--env-id', 'LinMarketEnv-v0', '--episodes', '5',
+        '--steps', '20', '--workers', '2', '--seed', '3',
+    ])
+    assert result.exit_code == 0
+    report = json.loads(result.output)
+    assert report['episodes'] == 5
+    assert 5 <= report['steps'] <= 100
+    assert report['steps_per_second'] > 0
+    assert report['reward']['min'] <= report['reward']['max']
+    workers = report['worker_results']
+    assert [worker['episodes'] for worker in workers] == [3, 2]
+    assert sum(worker['steps'] for worker in workers) == report['steps']
+
+
+def test_command_line_run_reproducible():
+    """Test seeded runs of generated data match."""
+    runner = CliRunner()
+    reports = []
+    for _ in range(2):
+        result = runner.invoke(cli.main, [
+            'run', '--env-id', 'OHLCVMarketEnv-v0', '--episodes', '4',
+            '--steps', '20', '--workers', '2', '--seed', '3',
+        ])
+        assert result.exit_code == 0
+        reports.append(json.loads(result.output))
+    first, second = reports
+    assert first['reward'] == second['reward']
+    assert first['steps'] == second['steps']
+
+
+def test_command_line_run_policy():
+    """Test the run command with a scripted policy."""
+    runner = CliRunner()
+    result = runner.invoke(cli.main, [
+        'run', '--env-id', 'LinMarketEnv-v0', '--episodes', '2',
+        '--steps', '10', '--policy', f'{__name__}:hold',
+    ])
+    assert result.exit_code == 0
+    report = json.loads(result.output)
+    assert report['steps'] == 20
+    # Staying costs the fee every step
+    assert report['reward']['mean'] == pytest.approx(10 * -.001)
+    assert report['reward']['std'] == pytest.approx(0)
+
+
+def test_run_episodes_restore_money():
+    """Test every episode starts with the money of a new market."""
+    # Buying twice fails, ending each episode on its second step
+    result = run_episodes('LinMarketEnv-v0', 10, steps=50,
+                          policy=f'{__name__}:buy')
+    assert result['steps'] == 20
+    # Staying the whole run would break the market over later episodes
+    result = run_episodes('LinMarketEnv-v0', 10, steps=20, money=.03,
+                          policy=f'{__name__}:hold')
+    assert result['steps'] == 200
+    assert result['rewards'] == pytest.approx([20 * -.001] * 10)
+
+
+def test_command_line_serve_help():
+    """Test the serve command is available."""
+    runner = CliRunner()
+    result = runner.invoke(cli.main, ['serve', '--help'])
+    assert result.exit_code == 0
+    assert '--unix' in result.output
+
+
+def test_command_line_sweep():
+    """Test the sweep command writes a CSV row per configuration."""
+    runner = CliRunner()
+    result = runner.invoke(cli.main, [
+        'sweep', '--env-id', 'LinMarketEnv-v0', '--param', 'fee=-0.001,-0.01',
+        '--param', 'max_observations=4,8', '--episodes', '2',
+        '--policy', f'{__name__}:hold',
+    ])
+    assert result.exit_code == 0
+    lines = result.output.strip().splitlines()
+    assert lines[0].startswith('config,fee,max_observations,episodes')
+    assert len(lines) == 5
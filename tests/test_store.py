@@ -0,0 +1,72 @@
+import pytest
+
+import numpy as np
+import pandas as pd
+
+from pandas.testing import assert_frame_equal
+
+from stock_gym.envs.stocks.store import DatasetStore, is_dataset
+
+
+@pytest.fixture
+def ohlcv_store(tmp_path, create_i_cont_ohlcv_market_env):
+    mkt = create_i_cont_ohlcv_market_env({'total_space_size': 512})
+    return mkt.data, DatasetStore.write(tmp_path / 'ohlcv', mkt.data)
+
+
+def test_write_round_trip(ohlcv_store):
+    data, store = ohlcv_store
+    assert store.columns == list(data.columns)
+    assert len(store) == len(data)
+    assert_frame_equal(store.frame(), data, check_freq=False)
+
+def test_values_memory_mapped(ohlcv_store):
+    data, store = ohlcv_store
+    assert isinstance(store.values, np.memmap)
+    assert not store.values.flags.writeable
+    assert np.shares_memory(store.frame().values, store.values)
+
+def test_write_array(tmp_path):
+    store = DatasetStore.write(tmp_path / 'linear', np.linspace(0, 1, 10),
+                               columns=['price'])
+    assert store.index is None
+    assert store.values.shape == (10, 1)
+    assert store.frame().price.iloc[-1] == 1
+
+def test_is_dataset(tmp_path, ohlcv_store):
+    data, store = ohlcv_store
+    assert is_dataset(store)
+    assert is_dataset(str(tmp_path))
+    assert is_dataset(tmp_path)
+    assert not is_dataset(data)
+    assert not is_dataset(None)
+
+def test_market_from_path(ohlcv_store, create_i_cont_ohlcv_market_env):
+    data, store = ohlcv_store
+    mkt = create_i_cont_ohlcv_market_env({'data': store.path})
+    assert_frame_equal(mkt.data, data, check_freq=False)
+    assert mkt.raw_data is None  # Stored bars aren't rebuilt
+    assert mkt.price_column == 'close'
+    assert mkt.total_space_size == len(data)
+    assert not mkt.data.values.flags.writeable  # Mapped, not copied
+
+def test_add_data_from_path(tmp_path, create_i_linear_market_env):
+    prices = np.linspace(.1, 1, 32)
+    store = DatasetStore.write(tmp_path / 'linear', prices, columns=['price'])
+    mkt = create_i_linear_market_env({'data': prices[::-1].copy(),
+                                      'observation_size': 8})
+    mkt.data = None
+    mkt.add_data(data=store.path)
+    np.testing.assert_array_equal(mkt.prices, prices)
+    assert not mkt.values.flags.writeable  # Mapped, not copied
+
+def test_markets_share_store(ohlcv_store, create_i_cont_ohlcv_market_env):
+    data, store = ohlcv_store
+    mkts = [create_i_cont_ohlcv_market_env({
+        'data': store,
+        'window_view': True,
+    }) for _ in range(2)]
+    assert np.shares_memory(mkts[0].windows, mkts[1].windows)
+    mkts[0].reset()
+    (observation, reward, done, info) = mkts[0].step(0)
+    assert reward == mkts[0].fee
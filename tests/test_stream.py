@@ -0,0 +1,156 @@
+import socket
+import threading
+
+import pytest
+
+import numpy as np
+import pandas as pd
+
+from gym import spaces
+from pandas.testing import assert_frame_equal
+
+from stock_gym.envs.stocks.imarket import IOHLCVMarketEnv
+from stock_gym.envs.stocks.stream import \
+    BarBuffer, frame_feed, parse_tick, socket_feed
+
+
+def get_ticks(length, seed=0, freq='7S'):
+    rng = np.random.default_rng(seed)
+    prices = .1 * np.cumprod(1 + rng.uniform(-.1, .1, length))
+    quantity = rng.random(length)
+    quantity[rng.random(length) < .2] = 0  # bars without volume
+    index = pd.date_range('1/1/2018', periods=length, freq=freq) + \
+        pd.to_timedelta(rng.integers(0, 60, length).cumsum(), unit='S')
+    return pd.DataFrame(
+        {'price': prices, 'quantity': quantity},
+        index=pd.DatetimeIndex(index, name='timestamp'),
+    )
+
+
+def fill(buffer, ticks):
+    for tick in frame_feed(ticks):
+        buffer.add(*tick)
+    return buffer
+
+
+# BUFFER
+@pytest.mark.parametrize('freq', ['7S', '40S'])
+def test_bars_match_convert(freq):
+    ticks = get_ticks(2000, freq=freq)
+    bars = IOHLCVMarketEnv(data=ticks.copy()).data
+    buffer = fill(BarBuffer(len(bars), '30S'), ticks)
+    assert len(buffer) == len(bars)
+    assert_frame_equal(buffer.frame(), bars, check_freq=False)
+
+def test_buffer_wraps():
+    ticks = get_ticks(2000, seed=1)
+    bars = IOHLCVMarketEnv(data=ticks.copy()).data
+    buffer = fill(BarBuffer(64, '30S'), ticks)
+    assert len(buffer) == 64
+    assert buffer.count == len(bars)
+    assert_frame_equal(buffer.frame(), bars[-64:], check_freq=False)
+    np.testing.assert_array_equal(buffer.window(8), bars.values[-8:])
+
+def test_window_is_view():
+    buffer = fill(BarBuffer(16, '30S'), get_ticks(100))
+    assert np.shares_memory(buffer.window(8), buffer.bars)
+
+def test_current_bar_updates():
+    buffer = BarBuffer(4, '30S')
+    buffer.add(pd.Timestamp('1/1/2018 00:00:01'), .2, 1)
+    buffer.add(pd.Timestamp('1/1/2018 00:00:02'), .4, 1)
+    buffer.add(pd.Timestamp('1/1/2018 00:00:03'), .1, 2)
+    assert len(buffer) == 1
+    assert list(buffer.window(1)[0]) == [.2, .4, .1, .1, 4]
+    assert buffer.latest() == .1
+
+def test_gap_carries_close():
+    buffer = BarBuffer(4, '30S')
+    buffer.add(pd.Timestamp('1/1/2018 00:00:01'), .2, 1)
+    buffer.add(pd.Timestamp('1/1/2018 01:00:00'), .3, 1)
+    assert buffer.count == 121
+    assert list(buffer.window(4)[:, 3]) == [.2, .2, .2, .3]
+
+# FEEDS
+def test_parse_tick():
+    assert parse_tick('1514764800000000000,.1,2\n') == \
+        (1514764800000000000, .1, 2.)
+    assert parse_tick('2018-01-01 00:00:00,.1,2') == \
+        (pd.Timestamp('1/1/2018').value, .1, 2.)
+
+def test_socket_feed():
+    ticks = get_ticks(50)
+    server = socket.create_server(('127.0.0.1', 0))
+
+    def serve():
+        conn, _ = server.accept()
+        with conn:
+            for timestamp, price, quantity in frame_feed(ticks):
+                conn.sendall(f'{timestamp},{price!r},{quantity!r}\n'.encode())
+
+    thread = threading.Thread(target=serve)
+    thread.start()
+    try:
+        assert list(socket_feed(server.getsockname(), timeout=5)) == \
+            list(frame_feed(ticks))
+    finally:
+        thread.join()
+        server.close()
+
+# ENVIRONMENT
+def test_env_steps_ticks(create_i_streaming_ohlcv_market_env):
+    ticks = get_ticks(500)
+    mkt = create_i_streaming_ohlcv_market_env({
+        'data': ticks,
+        'observation_size': 8,
+        'max_observations': 1000,
+        'buffer_size': 32,
+    })
+    observation = mkt.reset()
+    assert observation.shape == (8, 5)
+    assert mkt.observation_space.shape == (8, 5)
+
+    done = False
+    while not done:
+        observation, reward, done, info = mkt.step(0)
+    bars = IOHLCVMarketEnv(data=ticks.copy()).data
+    np.testing.assert_array_equal(observation, bars.values[-8:])
+    assert mkt.get_price() == bars.close.iloc[-1]
+
+def test_env_action_space(create_i_streaming_ohlcv_market_env):
+    mkt = create_i_streaming_ohlcv_market_env({
+        'feed': frame_feed(get_ticks(500)),
+        'observation_size': 4,
+    })
+    assert isinstance(mkt.action_space, spaces.Box)
+    assert mkt.action_space.shape == (1,)
+    assert mkt.n_actions == 1
+    mkt.reset()
+    observation, reward, done, info = mkt.step(.5)
+    assert mkt.position > 0
+
+def test_env_max_observations(create_i_streaming_ohlcv_market_env):
+    mkt = create_i_streaming_ohlcv_market_env({
+        'feed': frame_feed(get_ticks(500)),
+        'observation_size': 4,
+        'max_observations': 2,
+    })
+    mkt.reset()
+    assert not mkt.step(0)[2]
+    assert mkt.step(0)[2]
+
+def test_env_generates_feed(create_i_streaming_ohlcv_market_env):
+    mkt = create_i_streaming_ohlcv_market_env({
+        'total_space_size': 256,
+        'observation_size': 16,
+    })
+    assert mkt.reset().shape == (16, 5)
+    assert mkt.data is None
+
+def test_env_feed_too_short(create_i_streaming_ohlcv_market_env):
+    mkt = create_i_streaming_ohlcv_market_env({
+        'feed': frame_feed(get_ticks(2)),
+        'observation_size': 64,
+    })
+    with pytest.raises(RuntimeError):
+        mkt.reset()
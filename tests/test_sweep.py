@@ -0,0 +1,114 @@
+import pytest
+
+import numpy as np
+import pandas as pd
+
+from stock_gym.envs.stocks.basic import OHLCVMarketEnv, SinMarketEnv
+from stock_gym.envs.stocks.store import DatasetStore
+from stock_gym.rollout import run_episodes
+from stock_gym.sweep import (
+    expand_grid, open_dataset, parse_param, sweep, write_dataset)
+
+
+def hold(observation, env):
+    """Scripted policy for the sweep tests: always stay"""
+    return 2
+
+
+def buy(observation, env):
+    """Scripted policy for test_sweep_fail_reward: always buy"""
+    return 0
+
+
+GRID = {
+    'fee': [-.001, -.01],
+    'observation_size': [8, 16],
+}
+
+
+def test_expand_grid():
+    assert expand_grid(GRID) == [
+        {'fee': -.001, 'observation_size': 8},
+        {'fee': -.001, 'observation_size': 16},
+        {'fee': -.01, 'observation_size': 8},
+        {'fee': -.01, 'observation_size': 16},
+    ]
+
+def test_parse_param():
+    assert parse_param('fee=-0.001,-0.01') == ('fee', [-.001, -.01])
+    assert parse_param('accounting=fifo,lifo') == \
+        ('accounting', ['fifo', 'lifo'])
+
+@pytest.mark.parametrize('market_class, kind', [
+    (SinMarketEnv, 'series'),
+    (OHLCVMarketEnv, 'frame'),
+])
+def test_dataset_roundtrip(tmp_path, market_class, kind):
+    market = market_class(total_space_size=256, random_seed=1)
+    assert write_dataset(market, tmp_path / 'data') == kind
+    data = open_dataset(tmp_path / 'data', kind)
+    shared = market_class(data=data)
+    np.testing.assert_array_equal(shared.values, market.values)
+    assert np.shares_memory(shared.values, np.asarray(data))
+
+def test_sweep_rows():
+    # Money for one run of stays at the larger fee, not for all three
+    rows = list(sweep('SinMarketEnv-v0', GRID, episodes=3, steps=20,
+                      policy=f'{__name__}:hold', money=.25))
+    assert [row['config'] for row in rows] == [0, 1, 2, 3]
+    assert [{name: row[name] for name in GRID} for row in rows] == \
+        expand_grid(GRID)
+    for row in rows:
+        assert row['episodes'] == 3
+        assert row['steps'] == 60
+        assert row['reward_mean'] == pytest.approx(20 * row['fee'])
+        assert row['reward_min'] <= row['reward_mean'] <= row['reward_max']
+
+def test_sweep_fail_reward():
+    rows = list(sweep('LinMarketEnv-v0', {'fail_reward': [1, 10]},
+                      episodes=2, steps=2, policy=f'{__name__}:buy'))
+    assert [row['fail_reward'] for row in rows] == [1, 10]
+    assert [row['steps'] for row in rows] == [4, 4]
+    # The second buy fails, costing fail_reward
+    assert rows[0]['reward_mean'] - rows[1]['reward_mean'] == \
+        pytest.approx(9)
+
+def test_sweep_matches_rollout():
+    row, = sweep('LinMarketEnv-v0', {'fee': [-.01]}, episodes=2, steps=10,
+                 seed=4)
+    result = run_episodes('LinMarketEnv-v0', 2, steps=10,
+                          seed=np.random.SeedSequence(4), fee=-.01,
+                          random_seed=4)
+    assert row['steps'] == result['steps']
+    assert row['reward_mean'] == pytest.approx(np.mean(result['rewards']))
+
+def test_sweep_workers():
+    rows = list(sweep('OHLCVMarketEnv-v0', GRID, episodes=2, steps=10,
+                      workers=2, total_space_size=256))
+    single = list(sweep('OHLCVMarketEnv-v0', GRID, episodes=2, steps=10,
+                        total_space_size=256))
+    rows.sort(key=lambda row: row['config'])
+    assert [row['reward_mean'] for row in rows] == \
+        pytest.approx([row['reward_mean'] for row in single])
+
+def test_sweep_dataset(tmp_path):
+    prices = pd.DataFrame({'price': np.linspace(.1, 1., 128)})
+    DatasetStore.write(tmp_path / 'prices', prices)
+    rows = list(sweep('LinMarketEnv-v0', {'max_observations': [4, 8]},
+                      episodes=1, steps=100, dataset=tmp_path / 'prices',
+                      policy=f'{__name__}:hold'))
+    assert [row['steps'] for row in rows] == [4, 8]
+    # Staying costs the fee every step
+    assert rows[1]['reward_mean'] == pytest.approx(8 * -.001)
+
+#####
+# Negative test cases
+###
+
+def test_sweep_invalid_param():
+    with pytest.raises(AssertionError, match='Invalid param'):
+        list(sweep('SinMarketEnv-v0', {'missing': [1]}))
+
+def test_sweep_generation_param():
+    with pytest.raises(AssertionError, match='share their data'):
+        list(sweep('SinMarketEnv-v0', {'total_space_size': [64, 128]}))
@@ -0,0 +1,198 @@
+import pytest
+
+import numpy as np
+
+from stock_gym.envs.stocks.basic import ContSinMarketEnv, OHLCVMarketEnv
+from stock_gym.envs.stocks.vector import SubprocMarketVecEnv, VecMarketEnv
+
+
+DATA = (1 + np.sin(np.linspace(0, 8 * np.pi, 64))) / 2
+
+TEST_PARAMS = {
+    'max_observations': 16,
+    'observation_size': 8,
+    'total_space_size': len(DATA),
+    'data': DATA,
+}
+
+
+def test_reset_shape(create_vec_market_env):
+    venv = create_vec_market_env(4, TEST_PARAMS)
+    observation = venv.reset()
+    assert observation.shape == (4, 8)
+    assert (venv.observed == 0).all()
+    assert (venv.money == venv.start_money).all()
+
+def test_reset_reproducible(create_vec_market_env):
+    venv = create_vec_market_env(8, TEST_PARAMS)
+    venv.seed(42)
+    first = venv.reset().copy()
+    venv.seed(42)
+    assert (venv.reset() == first).all()
+
+def test_step_matches_single_env(create_vec_market_env,
+                                 create_i_linear_market_env):
+    venv = create_vec_market_env(6, TEST_PARAMS)
+    venv.reset()
+    mkts = []
+    for idx in venv.idx:
+        mkt = create_i_linear_market_env(dict(TEST_PARAMS))
+        mkt.idx = idx
+        mkt.observed = 0
+        mkts.append(mkt)
+
+    rng = np.random.default_rng(0)
+    for _ in range(TEST_PARAMS['max_observations'] - 1):
+        actions = rng.integers(3, size=6)
+        observation, reward, done, info = venv.step(actions)
+        for ix, mkt in enumerate(mkts):
+            (m_obs, m_reward, m_done, m_info) = mkt.step(actions[ix])
+            assert reward[ix] == m_reward
+            assert done[ix] == m_done
+            if not m_done:
+                assert venv.money[ix] == mkt.money
+                assert venv.position[ix] == mkt.position
+                assert (observation[ix] == m_obs).all()
+        if done.any():
+            break
+
+def test_auto_reset_on_done(create_vec_market_env):
+    venv = create_vec_market_env(3, dict(TEST_PARAMS, max_observations=2))
+    venv.reset()
+    observation, reward, done, info = venv.step(np.full(3, 2))
+    assert not done.any()
+    observation, reward, done, info = venv.step(np.full(3, 2))
+    assert done.all()
+    assert info['terminal_observation'].shape == (3, 8)
+    assert (venv.observed == 0).all()
+    assert (venv.money == venv.start_money).all()
+
+def test_auto_reset_restores_money(create_vec_market_env,
+                                   create_i_linear_market_env):
+    venv = create_vec_market_env(2, TEST_PARAMS)
+    venv.reset()
+    venv.money[0] = .0001  # the fee breaks the first environment
+    observation, reward, done, info = venv.step(np.full(2, 2))
+    assert done.tolist() == [True, False]
+    assert venv.money[0] == venv.start_money
+    assert not venv.step(np.full(2, 2))[2][0]
+
+    # where a single market stays broke after reset
+    mkt = create_i_linear_market_env(dict(TEST_PARAMS))
+    mkt.reset()
+    mkt.money = .0001
+    assert mkt.step(2)[2]
+    mkt.reset()
+    assert mkt.step(2)[2]
+
+def test_invalid_action(create_vec_market_env):
+    venv = create_vec_market_env(2, TEST_PARAMS)
+    venv.reset()
+    with pytest.raises(AssertionError):
+        venv.step(np.array([0, 3]))
+
+def test_invalid_market_class():
+    with pytest.raises(AssertionError, match='linear markets'):
+        VecMarketEnv(ContSinMarketEnv, 2, **TEST_PARAMS)
+
+
+#####
+# SubprocMarketVecEnv
+##
+
+@pytest.fixture
+def create_subproc_market_env():
+    venvs = []
+    def _create_market(num_envs, num_workers, kwargs=None):
+        kwargs = {} if kwargs is None else kwargs
+        venv = SubprocMarketVecEnv(ContSinMarketEnv, num_envs, num_workers,
+                                   **kwargs)
+        venvs.append(venv)
+        return venv
+    yield _create_market
+    for venv in venvs:
+        venv.close()
+
+
+def test_subproc_reset_shape(create_subproc_market_env):
+    venv = create_subproc_market_env(5, 2, TEST_PARAMS)
+    observation = venv.reset()
+    assert observation.shape == (5, 8)
+    windows = np.lib.stride_tricks.sliding_window_view(DATA, 8)
+    for row in observation:
+        assert (windows == row).all(axis=1).any()
+
+def test_subproc_step_stay(create_subproc_market_env):
+    venv = create_subproc_market_env(5, 2, TEST_PARAMS)
+    venv.reset()
+    observation, reward, done, info = venv.step(np.zeros(5))
+    assert (reward == ContSinMarketEnv.fee).all()
+    assert not done.any()
+
+def test_subproc_auto_reset(create_subproc_market_env):
+    venv = create_subproc_market_env(
+        3, 3, dict(TEST_PARAMS, max_observations=2))
+    venv.reset()
+    assert not venv.step(np.zeros(3))[2].any()
+    assert venv.step(np.zeros(3))[2].all()
+    assert not venv.step(np.zeros(3))[2].any()
+
+def test_subproc_auto_reset_restores_money(create_subproc_market_env):
+    venv = create_subproc_market_env(2, 2, dict(TEST_PARAMS, money=.0015))
+    venv.reset()
+    # The fee breaks each market on its second step
+    assert [venv.step(np.zeros(2))[2].all() for _ in range(3)] == \
+        [False, True, False]
+
+def test_subproc_matches_single_env(create_subproc_market_env, create_market):
+    venv = create_subproc_market_env(4, 2, dict(TEST_PARAMS, window_view=True))
+    venv.reset()
+    start = venv.observations.copy()
+    actions = np.array([.5, 0, .25, 0])
+    observation, reward, done, info = venv.step(actions)
+    windows = np.lib.stride_tricks.sliding_window_view(DATA, 8)
+    for ix, action in enumerate(actions):
+        mkt = create_market(ContSinMarketEnv, dict(TEST_PARAMS))
+        mkt.idx = int(np.flatnonzero((windows == start[ix]).all(axis=1))[0])
+        mkt.observed = 0
+        (m_obs, m_reward, m_done, m_info) = mkt.step(action)
+        assert reward[ix] == m_reward
+        assert (observation[ix] == m_obs).all()
+
+def test_subproc_close(create_subproc_market_env):
+    venv = create_subproc_market_env(2, 2, TEST_PARAMS)
+    venv.close()
+    assert venv.closed
+    assert not any(process.is_alive() for process in venv._processes)
+
+def test_subproc_seed_reproducible(create_subproc_market_env):
+    venv = create_subproc_market_env(4, 2, TEST_PARAMS)
+    sequences = venv.seed(42)
+    assert len({sequence.spawn_key for sequence in sequences}) == 4
+    first = venv.reset().copy()
+    venv.seed(42)
+    assert (venv.reset() == first).all()
+
+def test_subproc_generated_reproducible():
+    venvs = [SubprocMarketVecEnv(OHLCVMarketEnv, 2, 2, seed=5,
+                                 total_space_size=256, observation_size=8,
+                                 max_observations=16) for _ in range(2)]
+    try:
+        first, second = (venv.reset().copy() for venv in venvs)
+        np.testing.assert_array_equal(first, second)
+        actions = np.zeros((2,) + venvs[0].actions.shape[1:])
+        np.testing.assert_array_equal(venvs[0].step(actions)[1],
+                                      venvs[1].step(actions)[1])
+    finally:
+        for venv in venvs:
+            venv.close()
+
+def test_normalized_observations(create_vec_market_env,
+                                 create_i_linear_market_env):
+    params = dict(TEST_PARAMS, normalize='zscore')
+    venv = create_vec_market_env(4, params)
+    observations = venv.reset()
+    mkt = create_i_linear_market_env(dict(params))
+    for observation, idx in zip(observations, venv.idx):
+        mkt.idx = idx
+        np.testing.assert_allclose(observation, mkt.get_observation())